@@ -0,0 +1,204 @@
+"""Scalability benchmark for py_athletics.
+
+For each data set size the benchmark generates a synthetic Garmin activity
+file with generate_garmin_data.py and times the main py_athletics operations:
+
+    read                  Athlete.read_garmin_activity_file
+    save                  Athlete.save
+    load                  Athlete.load, then a query that reads every
+                          activity, so every partition is loaded
+    tally                 Activity.tally for every Activity subclass
+    summarize_activities  Athlete.summarize_activities
+    summarize_goals       Athlete.summarize_goals with the goals in
+                          test/goals.cmd
+
+Results are written as JSON.  When a baseline file is given, or the default
+benchmark_baseline.json exists, every timing is compared with the baseline
+for the same size and operation, and timings slower than the baseline by
+more than the tolerance factor, and by more than 10 ms, are reported as
+regressions.  The script exits with status 1 if any regression was found.
+
+Usage
+-----
+python benchmark.py
+python benchmark.py --sizes 10000,100000,1000000 --output results.json
+python benchmark.py --sizes 10000 --update-baseline
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+MISC = Path(__file__).resolve().parent
+SRC = MISC.parent / "src"
+GOALS = MISC.parent / "test" / "goals.cmd"
+BASELINE_FILE = MISC / "benchmark_baseline.json"
+
+sys.path.insert(0, str(SRC))
+
+from generate_garmin_data import generate  # noqa: E402
+from athlete.athlete import Athlete  # noqa: E402
+from activity.activity import Activity  # noqa: E402
+from helpers.helpers import parse  # noqa: E402
+
+DEFAULT_SIZES = "10000,100000"
+
+# Timings that differ from the baseline by less than this many seconds are
+# within the noise of the timer and the machine, whatever the factor.
+
+NOISE = 0.01
+
+
+@contextlib.contextmanager
+def timed(results: dict, name: str):
+    """Record the wall time of the enclosed block in results[name]."""
+
+    begin = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+    results[name] = round(time.perf_counter() - begin, 4)
+
+
+def run_size(rows: int, data_dir: Path) -> dict:
+    """Generate a data set with the given number of rows and return the
+    timings of each operation in seconds."""
+
+    csv_file = data_dir / f"Activities-{rows}.csv"
+    pickle_file = data_dir / f"py_athletics-{rows}.pickle"
+
+    if not csv_file.exists():
+        generate(str(csv_file), rows)
+
+    results = {}
+    athlete = Athlete()
+
+    with timed(results, "read"):
+        athlete.read_garmin_activity_file(str(csv_file))
+
+    with open(GOALS) as goals:
+        for line in goals.read().splitlines():
+            if line.startswith("add_goal"):
+                athlete.add_goal(**parse(line[len("add_goal") :]))
+
+    with timed(results, "save"):
+        athlete.save(str(pickle_file))
+
+    # Athlete.load only reads the manifest, partitions are read when they
+    # are first needed, so the load is timed with a query over all of them.
+
+    with timed(results, "load"):
+        athlete = Athlete.load(str(pickle_file))
+        for _ in athlete.query():
+            pass
+
+    with timed(results, "tally"):
+        for name in Activity.subclass_names():
+            Activity.tally(athlete, name)
+
+    with timed(results, "summarize_activities"):
+        athlete.summarize_activities()
+
+    with timed(results, "summarize_goals"):
+        athlete.summarize_goals()
+
+    # The session is saved as the pickle, its partition directory and its
+    # journal.
+
+    pickle_file.unlink()
+    shutil.rmtree(f"{pickle_file}.partitions", ignore_errors=True)
+    Path(f"{pickle_file}.journal").unlink(missing_ok=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return messages for timings slower than tolerance times the
+    baseline, and by more than NOISE seconds."""
+
+    regressions = []
+    for size, timings in results["sizes"].items():
+        base_timings = baseline["sizes"].get(size, {})
+        for operation, seconds in timings.items():
+            base = base_timings.get(operation)
+            if base and seconds > base * tolerance and seconds - base > NOISE:
+                regressions.append(
+                    f"{operation} at {int(size):,} rows: "
+                    f"{seconds:.3f}s vs baseline {base:.3f}s"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"comma separated row counts, default {DEFAULT_SIZES}",
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="directory for generated files, reused between runs if given",
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="slowdown factor reported as a regression, default 1.5",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to the baseline file",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "sizes": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        if args.data_dir:
+            data_dir = Path(args.data_dir)
+            data_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            data_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+
+        for rows in sizes:
+            timings = run_size(rows, data_dir)
+            results["sizes"][str(rows)] = timings
+            summary = " ".join(f"{key}={value:.3f}s" for key, value in timings.items())
+            print(f"{rows:>10,} rows: {summary}")
+
+    output = args.baseline if args.update_baseline else args.output
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=4)
+        results_file.write("\n")
+    print(f"results written to {output}")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"regression: {message}")
+    if not regressions:
+        print("no regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Startup time benchmark for py_athletics.
+
+Runs python -X importtime against the py_athletics entry modules and reports
+the median cumulative import time of each along with the slowest imports.  It
+also times a short scripted batch invocation end to end.  The medians are
+compared with the budget recorded in startup_budget.json and the script exits
+with status 1 if any budget is exceeded.
+
+Budgets are wall clock figures and depend on the machine, so refresh them
+with --update-budget after a deliberate change or on a new machine.
+
+Usage
+-----
+python benchmark_startup.py
+python benchmark_startup.py --runs 15 --update-budget
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MISC = Path(__file__).resolve().parent
+SRC = MISC.parent / "src"
+BUDGET_FILE = MISC / "startup_budget.json"
+
+ENTRY_MODULES = ("shell.shell", "batch.batch")
+BATCH_ARGUMENTS = [
+    "py_athletics.py",
+    "--load",
+    "../test/py_athletics.pickle",
+    "--summarize-goals",
+    "--format",
+    "json",
+]
+
+# Budgets are set this much above the measured medians by --update-budget.
+HEADROOM = 1.25
+
+
+def import_times(module: str) -> dict:
+    """Return a dictionary of module name to cumulative import time in
+    microseconds for a fresh interpreter importing module."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:   self [us] | cumulative | name".
+
+    result = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        result[name.strip()] = int(cumulative)
+    return result
+
+
+def batch_run_ms() -> float:
+    """Return the wall clock time of a scripted batch invocation in
+    milliseconds."""
+
+    begin = time.perf_counter()
+    subprocess.run(
+        [sys.executable] + BATCH_ARGUMENTS,
+        cwd=SRC,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return (time.perf_counter() - begin) * 1000
+
+
+def measure(runs: int) -> dict:
+    """Return median measurements over the given number of runs."""
+
+    results = {"imports_us": {}, "batch_run_ms": None}
+    slowest = {}
+
+    for module in ENTRY_MODULES:
+        samples = []
+        for _ in range(runs):
+            times = import_times(module)
+            samples.append(times[module])
+            slowest = times
+        results["imports_us"][module] = int(statistics.median(samples))
+
+        ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+        print(f"{module}: median {results['imports_us'][module]:,} us")
+        for name, cumulative in ranked[1:9]:
+            print(f"    {cumulative:>8,} us  {name}")
+
+    samples = [batch_run_ms() for _ in range(runs)]
+    results["batch_run_ms"] = round(statistics.median(samples), 1)
+    print(f"batch run: median {results['batch_run_ms']:,} ms")
+
+    return results
+
+
+def compare(results: dict, budget: dict) -> list:
+    """Return a list of messages describing budget overruns."""
+
+    overruns = []
+    for module, measured in results["imports_us"].items():
+        allowed = budget["imports_us"].get(module)
+        if allowed is not None and measured > allowed:
+            overruns.append(f"import {module}: {measured:,} us > {allowed:,} us")
+
+    allowed = budget.get("batch_run_ms")
+    if allowed is not None and results["batch_run_ms"] > allowed:
+        measured = results["batch_run_ms"]
+        overruns.append(f"batch run: {measured:,} ms > {allowed:,} ms")
+
+    return overruns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument(
+        "--update-budget",
+        action="store_true",
+        help="record the measured medians, plus headroom, as the new budget",
+    )
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+
+    if args.update_budget:
+        budget = {
+            "imports_us": {
+                module: int(measured * HEADROOM)
+                for module, measured in results["imports_us"].items()
+            },
+            "batch_run_ms": round(results["batch_run_ms"] * HEADROOM, 1),
+        }
+        BUDGET_FILE.write_text(json.dumps(budget, indent=4) + "\n")
+        print(f"budget written to {BUDGET_FILE.name}")
+        return 0
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    overruns = compare(results, budget)
+    for message in overruns:
+        print(f"over budget: {message}")
+    if not overruns:
+        print("within budget")
+    return 1 if overruns else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
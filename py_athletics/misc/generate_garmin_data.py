@@ -0,0 +1,244 @@
+"""Generate synthetic Garmin activity files for py_athletics.
+
+The generated CSV files use the exact Garmin Connect export header, including
+the Normalized Power(R) and Training Stress Score(R) columns, and Garmin's
+formatting conventions: CRLF line endings, "--" for missing values, comma
+grouped calories, MPH speeds for cycling and minutes:seconds paces for
+running and walking.
+Rows are written newest first, as Garmin does, and start times are unique so
+every row becomes a distinct py_athletics Activity.
+
+Activity types, titles and values are drawn with a fixed seed from
+distributions modelled on test/Activities.csv, so runs are repeatable.  Rows
+are streamed to disk, so files of ten million rows need little memory.
+
+Usage
+-----
+python generate_garmin_data.py --rows 100000 --output /tmp/Activities-100k.csv
+python generate_garmin_data.py --rows 10000000 --years 20 --output big.csv
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+REGISTERED = "\N{REGISTERED SIGN}"
+
+HEADER = [
+    "Activity Type",
+    "Date",
+    "Favorite",
+    "Title",
+    "Distance",
+    "Calories",
+    "Time",
+    "Avg HR",
+    "Max HR",
+    "Aerobic TE",
+    "Avg Run Cadence",
+    "Max Run Cadence",
+    "Avg Speed",
+    "Max Speed",
+    "Total Ascent",
+    "Total Descent",
+    "Avg Stride Length",
+    "Avg Vertical Ratio",
+    "Avg Vertical Oscillation",
+    "Avg Ground Contact Time",
+    "Avg Bike Cadence",
+    "Max Bike Cadence",
+    f"Normalized Power{REGISTERED} (NP{REGISTERED})",
+    f"Training Stress Score{REGISTERED}",
+    "Max Avg Power (20 min)",
+    "Avg Power",
+    "Max Power",
+    "Grit",
+    "Flow",
+    "Total Strokes",
+    "Dive Time",
+    "Min Temp",
+    "Surface Interval",
+    "Decompression",
+    "Best Lap Time",
+    "Number of Laps",
+    "Max Temp",
+    "Avg Resp",
+    "Min Resp",
+    "Max Resp",
+    "Moving Time",
+    "Elapsed Time",
+    "Min Elevation",
+    "Max Elevation",
+]
+
+# Garmin activity types with their relative frequency in test/Activities.csv.
+
+ACTIVITY_TYPES = {
+    "Tennis": 75,
+    "Gym & Fitness Equipment": 57,
+    "Road Cycling": 54,
+    "Walking": 28,
+    "Indoor Running": 23,
+    "Running": 20,
+    "Virtual Cycling": 19,
+    "Treadmill Running": 9,
+    "Cycling": 4,
+}
+
+PLACES = ("Chicago", "Longboat Key", "Oakland", "Highland Park", "Hawaii County")
+
+TITLES = {
+    "Tennis": ("Tennis", "Tennis", "Tennis", "Tennis Lesson", "Tennis Drill Play"),
+    "Gym & Fitness Equipment": ("Strength and Flexibility", "Flexibility"),
+    "Indoor Running": ("Indoor Running",),
+    "Treadmill Running": ("Treadmill Running",),
+    "Virtual Cycling": ("Virtual Cycling", "Muro Cycling"),
+}
+
+# Typical duration in minutes and calories per minute for each type.
+
+PROFILES = {
+    "Tennis": (60, 7.5),
+    "Gym & Fitness Equipment": (60, 4.8),
+    "Road Cycling": (110, 6.5),
+    "Cycling": (90, 6.5),
+    "Virtual Cycling": (60, 7.0),
+    "Walking": (50, 5.0),
+    "Running": (35, 11.0),
+    "Indoor Running": (30, 10.5),
+    "Treadmill Running": (33, 10.5),
+}
+
+
+def clock(seconds: int) -> str:
+    """Format seconds as HH:MM:SS."""
+
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+def pace(minutes_per_mile: float) -> str:
+    """Format a pace in minutes per mile as M:SS."""
+
+    seconds = int(minutes_per_mile * 60)
+    return f"{seconds // 60}:{seconds % 60:02}"
+
+
+def make_row(rng: random.Random, activity_type: str, start: datetime) -> list:
+    """Return the CSV fields for one synthetic activity."""
+
+    typical_minutes, calories_per_minute = PROFILES[activity_type]
+    seconds = max(300, int(rng.gauss(typical_minutes, typical_minutes / 4) * 60))
+    minutes = seconds / 60
+    calories = int(minutes * rng.uniform(0.8, 1.2) * calories_per_minute)
+    average_hr = rng.randint(95, 150)
+    maximum_hr = average_hr + rng.randint(10, 40)
+    aerobic_te = f"{rng.uniform(0.5, 4.5):.1f}"
+
+    place = rng.choice(PLACES)
+    if activity_type in TITLES:
+        title = rng.choice(TITLES[activity_type])
+    else:
+        title = f"{place} {activity_type}"
+
+    row = dict.fromkeys(HEADER, "--")
+    row.update(
+        {
+            "Activity Type": activity_type,
+            "Date": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "Favorite": "false",
+            "Title": title,
+            "Distance": "0.00",
+            "Calories": f"{calories:,}",
+            "Time": clock(seconds),
+            "Avg HR": str(average_hr),
+            "Max HR": str(maximum_hr),
+            "Aerobic TE": aerobic_te,
+            HEADER[23]: "0.0",
+            "Number of Laps": str(max(1, seconds // 1800)),
+            "Moving Time": clock(seconds),
+            "Elapsed Time": clock(seconds + rng.randint(0, 600)),
+        }
+    )
+
+    if "Cycling" in activity_type:
+        mph = rng.uniform(11.0, 17.5)
+        normalized_power = rng.randint(80, 180)
+        training_stress = minutes / 60 * (normalized_power / 2.2) ** 2 / 100
+        row.update(
+            {
+                "Distance": f"{mph * minutes / 60:.2f}",
+                "Avg Speed": f"{mph:.1f}",
+                "Max Speed": f"{mph * rng.uniform(1.4, 2.2):.1f}",
+                "Avg Bike Cadence": str(rng.randint(70, 95)),
+                "Max Bike Cadence": str(rng.randint(100, 130)),
+                HEADER[22]: str(normalized_power),
+                HEADER[23]: f"{training_stress:.1f}",
+                "Avg Power": str(int(normalized_power * 0.85)),
+                "Max Power": str(normalized_power * rng.randint(3, 6)),
+            }
+        )
+    elif "Running" in activity_type or "Walking" in activity_type:
+        if "Walking" in activity_type:
+            minutes_per_mile = rng.uniform(16.0, 22.0)
+        else:
+            minutes_per_mile = rng.uniform(8.5, 13.0)
+        row.update(
+            {
+                "Distance": f"{minutes / minutes_per_mile:.2f}",
+                "Avg Speed": pace(minutes_per_mile),
+                "Max Speed": pace(minutes_per_mile * rng.uniform(0.55, 0.85)),
+                "Avg Run Cadence": str(rng.randint(110, 170)),
+                "Max Run Cadence": str(rng.randint(170, 230)),
+            }
+        )
+
+    return [row[key] for key in HEADER]
+
+
+def format_row(fields: list) -> str:
+    """Quote fields the way Garmin does: the first three bare, the rest in
+    double quotes."""
+
+    quoted = [f'"{field}"' for field in fields[3:]]
+    return ",".join(fields[:3] + quoted) + "\r\n"
+
+
+def generate(filename: str, rows: int, years: int = 10, seed: int = 2021) -> None:
+    """Write a Garmin activity file with the given number of rows spread
+    evenly over the given number of years ending now."""
+
+    rng = random.Random(seed)
+    types = list(ACTIVITY_TYPES)
+    weights = list(ACTIVITY_TYPES.values())
+
+    # Start times step backwards from now with a jitter smaller than the step,
+    # which keeps them unique and newest first.
+
+    latest = datetime.now().replace(microsecond=0) - timedelta(days=1)
+    step = years * 365 * 86400 / rows
+
+    with open(filename, "w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write(",".join(HEADER) + "\r\n")
+        for index in range(rows):
+            offset = int(index * step + rng.uniform(0, step * 0.9))
+            start = latest - timedelta(seconds=offset)
+            activity_type = rng.choices(types, weights)[0]
+            csv_file.write(format_row(make_row(rng, activity_type, start)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=2021)
+    parser.add_argument("--output", default="Activities-synthetic.csv")
+    args = parser.parse_args()
+
+    generate(args.output, args.rows, years=args.years, seed=args.seed)
+    print(f"wrote {args.rows:,} activities to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ import datetime
 from decimal import Decimal
 from collections import Counter
 from helpers.helpers import parse_date
+from profiling.profiling import span
 
 
 class Activity:
@@ -15,6 +16,18 @@ class Activity:
 
     venue_type_set = {"indoor", "outdoor"}
 
+    # Listings and tallies can be limited to activities with specific values
+    # of these attributes, which the Athlete indexes.
+
+    filter_attributes = ("partner", "trainer", "type", "venue", "venue_type")
+
+    # Activities saved before training stress and aerobic training effect
+    # were read from Garmin activity files lack those attributes, the class
+    # attributes stand in for them.
+
+    training_stress_score = None
+    aerobic_training_effect = None
+
     def __init__(
         self, start: datetime.datetime, duration: datetime.timedelta, **kwargs
     ):
@@ -78,6 +91,18 @@ class Activity:
         if garmin_activity_type and not isinstance(garmin_activity_type, str):
             raise TypeError("garmin activity type must be a string")
 
+        training_stress_score = kwargs.pop("training_stress_score", None)
+        if training_stress_score and not isinstance(training_stress_score, Decimal):
+            raise TypeError("training stress score must be a Decimal")
+        if training_stress_score and training_stress_score <= 0:
+            raise ValueError("training stress score must be positive")
+
+        aerobic_training_effect = kwargs.pop("aerobic_training_effect", None)
+        if aerobic_training_effect and not isinstance(aerobic_training_effect, Decimal):
+            raise TypeError("aerobic training effect must be a Decimal")
+        if aerobic_training_effect and aerobic_training_effect <= 0:
+            raise ValueError("aerobic training effect must be positive")
+
         self.start = start
         self.duration = duration
         self.description = description
@@ -87,6 +112,8 @@ class Activity:
         self.venue = venue
         self.venue_type = venue_type
         self.__garmin_activity_type = garmin_activity_type
+        self.training_stress_score = training_stress_score
+        self.aerobic_training_effect = aerobic_training_effect
 
     @property
     def garmin_activity_type(self) -> str:
@@ -157,6 +184,24 @@ class Activity:
 
         return f_1 + f_2 + f_3
 
+    def as_dict(self) -> dict:
+        """Return a dictionary of the Activity's public attributes, including
+        the exercise name and the Garmin activity type."""
+
+        result = {
+            "exercise": type(self).__name__,
+            "garmin_activity_type": self.garmin_activity_type,
+        }
+
+        # Name mangled attributes are reached through their properties,
+        # everything else set by __init__ is reported as is.
+
+        for key, value in vars(self).items():
+            if not key.startswith("_"):
+                result[key] = value
+
+        return result
+
     @staticmethod
     def subclasses() -> tuple:
         """Return a tuple of Activity subclasses."""
@@ -173,10 +218,32 @@ class Activity:
         return {cls.__name__: cls for cls in Activity.subclasses()}
 
     @staticmethod
-    def tally(athlete, class_name: str, start=None, end=None):
+    def check_filters(filters: dict) -> dict:
+        """Return the attribute filters in filters that are set.
+
+        Each filter must be one of the filter attributes, with a string value
+        or None, which does not filter.
+        """
+
+        result = {}
+        for name, value in filters.items():
+            if name not in Activity.filter_attributes:
+                raise TypeError(f"invalid filter {name}")
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                raise TypeError(f"{name} must be a string")
+            result[name] = value
+        return result
+
+    @staticmethod
+    def tally(athlete, class_name: str, start=None, end=None, **filters):
         """Return a Counter with athlete's aggregated activity data for the specified
         Activity class.  All counters include activity count, calories and
         duration.  Counters for Walk, Cycle and Run include distance.
+
+        The partner, trainer, type, venue and venue_type keywords limit the
+        tally to activities with those attribute values.
         """
 
         if not isinstance(class_name, str):
@@ -185,6 +252,8 @@ class Activity:
         if class_name not in Activity.subclass_names():
             raise ValueError("invalid class name")
 
+        filters = Activity.check_filters(filters)
+
         if start is None:
             start_date = parse_date("1970-01-01")
         else:
@@ -195,21 +264,42 @@ class Activity:
         else:
             end_date = parse_date(end)
 
-        target_class = Activity.activity_dictionary()[class_name]
-
-        tally = Counter({"count": 0, "calories": 0, "duration": datetime.timedelta()})
-
-        if class_name in ("Cycle", "Run", "Walk"):
-            tally.update({"distance": Decimal(0)})
-
-        activities = athlete.get_activities(target_class)
-        for activity in activities:
-            if start_date <= activity.start.date() <= end_date:
-                tally.update({"count": 1, "duration": activity.duration})
-                if activity.calories:
-                    tally.update({"calories": activity.calories})
-                if class_name in ("Cycle", "Run", "Walk") and activity.distance:
-                    tally.update({"distance": activity.distance})
+        has_distance = class_name in ("Cycle", "Run", "Walk")
+
+        with span("tally"):
+            target_class = Activity.activity_dictionary()[class_name]
+
+            tally = Counter(
+                {"count": 0, "calories": 0, "duration": datetime.timedelta()}
+            )
+
+            if has_distance:
+                tally.update({"distance": Decimal(0)})
+
+            # Years that lie entirely in the timeframe are tallied from the
+            # athlete's partition aggregates, the others activity by activity.
+            # Filtered tallies only look at the matching activities, which
+            # the athlete finds with its attribute indexes.
+
+            if filters:
+                aggregates = []
+                activities = athlete.query(
+                    class_name, start=start_date, end=end_date, where=filters
+                )
+            else:
+                aggregates, activities = athlete.partitioned_activities(
+                    target_class, start_date, end_date
+                )
+            for aggregate in aggregates:
+                tally.update(aggregate)
+
+            for activity in activities:
+                if start_date <= activity.start.date() <= end_date:
+                    tally.update({"count": 1, "duration": activity.duration})
+                    if activity.calories:
+                        tally.update({"calories": activity.calories})
+                    if has_distance and activity.distance:
+                        tally.update({"distance": activity.distance})
 
         return tally
 
@@ -217,15 +307,22 @@ class Activity:
 class Cycle(Activity):
     """py_athletics Cycle Activity subclass. A Cycle object may include all
     Activity attributes as well as distance, type, maximum_speed,
-    Average_speed, average_power and maximum_average_power attributes.
-    Cycle type is a string and can be one of 'commute', 'road', 'trail',or
-    'stationary'.  The maximum_speed and average_speed attributes are
-    expressed in miles per hour.  The normalized_power attribute is in watts.
-    Cycle type is accepted but not yet used.
+    average_speed, normalized_power, average_power, maximum_power and
+    maximum_average_power attributes.  Cycle type is a string and can be one
+    of 'commute', 'road', 'trail',or 'stationary'.  The maximum_speed and
+    average_speed attributes are expressed in miles per hour.  The power
+    attributes are in watts, maximum_average_power is the best 20 minute
+    average.  Cycle type is accepted but not yet used.
     """
 
     cycle_type_set = {"commute", "road", "trail", "stationary"}
 
+    # Stand-ins for Cycles saved before the power attributes were read.
+
+    average_power = None
+    maximum_power = None
+    maximum_average_power = None
+
     def __init__(
         self, start: datetime.datetime, duration: datetime.timedelta, **kwargs
     ):
@@ -233,15 +330,18 @@ class Cycle(Activity):
         arguments and will accept keyword arguments for all other Activity and
         Cycle attributes."""
 
-        # Remove distance, type, maximum_speed, average_speed, average_power,
-        # and maximum_average_power from the argument dictionary and pass the
-        # remainder to Activity for handling.
+        # Remove distance, type, maximum_speed, average_speed and the power
+        # attributes from the argument dictionary and pass the remainder to
+        # Activity for handling.
 
         distance = kwargs.pop("distance", None)
         type = kwargs.pop("type", None)
         maximum_speed = kwargs.pop("maximum_speed", None)
         average_speed = kwargs.pop("average_speed", None)
         normalized_power = kwargs.pop("normalized_power", None)
+        average_power = kwargs.pop("average_power", None)
+        maximum_power = kwargs.pop("maximum_power", None)
+        maximum_average_power = kwargs.pop("maximum_average_power", None)
 
         super().__init__(start, duration, **kwargs)
 
@@ -270,11 +370,24 @@ class Cycle(Activity):
         if normalized_power and normalized_power <= 0:
             raise ValueError("normalized power must be positive")
 
+        for name, power in (
+            ("average power", average_power),
+            ("maximum power", maximum_power),
+            ("maximum average power", maximum_average_power),
+        ):
+            if power and not isinstance(power, int):
+                raise TypeError(f"{name} must be an integer")
+            if power and power <= 0:
+                raise ValueError(f"{name} must be positive")
+
         self.distance = distance
         self.type = type
         self.maximum_speed = maximum_speed
         self.average_speed = average_speed
         self.normalized_power = normalized_power
+        self.average_power = average_power
+        self.maximum_power = maximum_power
+        self.maximum_average_power = maximum_average_power
 
     def __repr__(self):
 
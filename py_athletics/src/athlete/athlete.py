@@ -2,22 +2,94 @@
 
 from activity.activity import Activity
 from activity.activity import Cycle, Run, Tennis, Walk, Workout
-from goal.goal import Goal, YearGoal, CumulativeGoal, MonthGoal
 from helpers.helpers import td_cvt, is_date, parse_date, none_factory
-from helpers.garmin_helpers import garmin_to_decimal, garmin_to_int, garmin_to_time
-
+from helpers.helpers import deep_getsizeof
+from profiling.profiling import span
+from store.store import ActivityBlock, ActivitySnapshot, DuplicateIndex, Journal
+from store.store import RecordTable, StreakCounter, StringTable, TextIndex
+from store.store import TrainingLoad
+from store.store import empty_aggregate, accumulate, accumulate_values
+from store.store import read_partition, write_partition, copy_partition
+
+from bisect import bisect_left, insort
 from collections import defaultdict
-from datetime import datetime, timedelta, date
-from csv import DictReader
-from pickle import dump, load
-from typing import Union
-import unicodedata
+from contextlib import contextmanager
+from heapq import merge
+from itertools import chain, islice
+from datetime import datetime, timedelta, date, time
+from decimal import Decimal
+from threading import RLock
 
+# The goal and garmin_helpers modules, csv, os, pickle and unicodedata are
+# imported by the methods that need them.  Most invocations only use a few
+# commands, so deferring these imports keeps startup fast.  For the same
+# reason this module avoids typing.
 
-class Athlete:
 
+class Athlete:
     """py_athletics Athlete class."""
 
+    DUPLICATE_SETTINGS = {
+        "mode": "flag",
+        "start": 120,
+        "duration": 120,
+        "distance": Decimal("0.1"),
+    }
+
+    # Saving writes the whole session again, compacting the journal, once
+    # the journal is larger than this fraction of the session file or this
+    # many bytes, whichever is larger.
+
+    JOURNAL_COMPACTION_RATIO = 0.5
+    JOURNAL_COMPACTION_BYTES = 1 << 20
+
+    # Activities that started before the first day of the month this many
+    # months ago are frozen into blocks.
+
+    HOT_MONTHS = 3
+
+    # Activity files are read this many rows at a time.
+
+    READ_CHUNK_SIZE = 1000
+
+    # Activity summaries can be grouped by these.
+
+    GROUP_BY = (
+        "year",
+        "month",
+        "iso_week",
+        "weekday",
+        "hour",
+        "type",
+        "garmin_activity_type",
+    )
+
+    # Personal records are kept for these metrics of each exercise, this
+    # many for each metric, and for the exercises with distance bands also
+    # for each band, given by its lower bound in miles.
+
+    RECORD_METRICS = {
+        "Cycle": (
+            "duration",
+            "distance",
+            "calories",
+            "average_speed",
+            "normalized_power",
+            "maximum_average_power",
+            "training_stress_score",
+        ),
+        "Run": ("duration", "distance", "calories", "average_speed"),
+        "Tennis": ("duration", "calories"),
+        "Walk": ("duration", "distance", "calories", "average_speed"),
+        "Workout": ("duration", "calories"),
+    }
+    RECORD_COUNT = 5
+    RECORD_BANDS = {
+        "Cycle": (Decimal(0), Decimal(10), Decimal(25), Decimal(50), Decimal(100)),
+        "Run": (Decimal(0), Decimal("3.1"), Decimal("6.2"), Decimal("13.1")),
+        "Walk": (Decimal(0), Decimal(3), Decimal(6), Decimal(10)),
+    }
+
     def __init__(self):
         """Create an Athlete."""
 
@@ -40,6 +112,102 @@ class Athlete:
         # The activities and goals attributes are hidden and should be
         # accessed with add_activity, add_goal, get_activities and
         # get_goals methods.
+        #
+        # The generation attribute counts changes to activities and goals.
+        # Caches of derived results use it to detect stale entries.
+        #
+        # The activities dictionaries belong to the writer, a single thread
+        # adding activities while holding the writer lock.  Readers use
+        # snapshots instead: each Activity subclass also has an append-only
+        # activity list, and an ActivitySnapshot records every list with its
+        # length.  The writer publishes a new snapshot after each insert, or
+        # once at the end of a batch, by replacing the snapshot attribute,
+        # which is atomic, so readers never see a partial batch and never
+        # iterate a dictionary that is changing.
+        #
+        # The duplicate settings control near-duplicate detection across
+        # Activity subclasses: activities whose starts and durations are
+        # within the start and duration tolerances, in seconds, and whose
+        # distances, if both have one, are within the distance tolerance, in
+        # miles.  In flag mode add_activity adds a near-duplicate and records
+        # it, in merge mode the near-duplicate is merged into the activity it
+        # duplicates instead.  The time-sorted DuplicateIndex used to find
+        # near-duplicates is built from the activities when first needed.
+        #
+        # Once an Athlete has been saved or loaded, every change to its
+        # activities, goals and duplicate settings is also appended to a
+        # Journal next to the session file, so changes survive without
+        # another save.  Loading a session replays its journal and saving
+        # to the same file only writes the whole session again when the
+        # journal has grown large.
+        #
+        # A saved session is a manifest, the Athlete without its activities,
+        # and a directory of partition files, one per Activity subclass and
+        # year.  The aggregates attribute maps (subclass, year) partition
+        # keys to the partition's count, calories, duration and, where it
+        # applies, distance, and is kept current as activities are added and
+        # removed.  The partition files attribute maps keys to file names in
+        # the partition directory.  A loaded session starts with no
+        # partitions loaded; a partition is loaded, and its key added to the
+        # loaded set, when a query or change first needs its activities.
+        # Partitions changed since they were saved are in the dirty set.
+        #
+        # Activities are kept as objects in the activities dictionaries and
+        # lists only while they are recent, see HOT_MONTHS.  Older ones are
+        # frozen: the blocks attribute maps (subclass, year, month) keys to
+        # ActivityBlocks holding a month of activities in arrays, with the
+        # month's aggregate.  Activities are frozen when a session or
+        # partition is loaded and when a batch ends.  Snapshots include the
+        # blocks, so readers see both tiers.  A block is thawed, turned back
+        # into activity objects, when an activity is added near its month or
+        # activities are merged.  The unfrozen attribute maps (subclass,
+        # year, month) keys to the activity objects added, loaded or thawed
+        # since the month was last frozen, so only those months are frozen.
+        #
+        # Blocks store the categorical string attributes, such as
+        # descriptions and Garmin activity types, as codes in the strings
+        # attribute, a StringTable saved with the Athlete, so each distinct
+        # string is kept once and filters compare integers.
+        #
+        # The attribute indexes map each Activity subclass to a dictionary of
+        # the filter attributes, see Activity.filter_attributes, each mapping
+        # an attribute value to the sorted starts of the activities with that
+        # value.  A subclass's indexes are built from all its activities,
+        # frozen or not, the first time a filtered query needs them, and are
+        # kept current by add_activity, so a filtered query only looks at
+        # matching activities.  Merging and removing activities discards the
+        # indexes.
+        #
+        # The text index is an inverted index of the words in every
+        # activity's description, saved with the Athlete and kept current as
+        # activities are added, merged and removed.  Sessions saved before
+        # it existed build it the first time search needs it.
+        #
+        # The training load holds the daily training stress of the
+        # activities with a training stress score and the acute and chronic
+        # training loads computed from it, see TrainingLoad.  It is saved
+        # with the Athlete and kept current with the partition aggregates,
+        # so adding an activity does not look at the others.  Sessions saved
+        # before it existed build it the first time it is needed.
+        #
+        # The streak counters map each Activity subclass to a pair of
+        # StreakCounters, one counting days and one counting ISO weeks with
+        # activities, kept current the same way, so streaks and gaps are
+        # known without looking at the activities.
+        #
+        # The record tables map each Activity subclass to a RecordTable of
+        # its personal records, see RECORD_METRICS, also kept current with
+        # the aggregates.  Removing or merging an activity that holds a
+        # record discards its subclass's table, which is rebuilt from the
+        # subclass's activities when next needed, as are the tables of
+        # sessions saved before they existed.
+        #
+        # The goals map each Activity subclass to its Goals, keyed by
+        # (metric, timeframe).  Composite Goals, which count several
+        # subclasses or only some Garmin activity types, are kept in the
+        # composite goals dictionary instead, keyed by (subclasses, Garmin
+        # activity types, metric, timeframe).  Every Goal's live counter is
+        # kept current with the aggregates, see Goal.count.
 
         self.__activities = defaultdict(none_factory)
 
@@ -51,10 +219,237 @@ class Athlete:
         for activity_subclass in Activity.subclasses():
             self.__goals[activity_subclass] = defaultdict(none_factory)
 
+        self.__composite_goals = {}
+
+        self.__generation = 0
+        self.__duplicate_settings = dict(Athlete.DUPLICATE_SETTINGS)
+        self.__journal = None
+        self.__aggregates = {}
+        self.__partition_files = {}
+        self.__partition_directory = None
+        self.__partition_sequence = 0
+        self.__loaded = set()
+        self.__dirty = set()
+        self.__blocks = {}
+        self.__strings = StringTable()
+        self.__text_index = TextIndex()
+        self.__training_load = TrainingLoad()
+        self.__streak_counters = {}
+        self.__record_tables = {
+            activity_subclass: Athlete.__new_record_table(activity_subclass)
+            for activity_subclass in Activity.subclasses()
+        }
+        self.__initialize_snapshots()
+
+    def __initialize_snapshots(self) -> None:
+        """Create the activity lists, writer and saver state and first
+        snapshot from the activities dictionaries."""
+
+        self.__activity_lists = {
+            activity_subclass: [
+                activity
+                for activity in self.__activities[activity_subclass].values()
+                if activity is not None
+            ]
+            for activity_subclass in Activity.subclasses()
+        }
+        self.__unfrozen = defaultdict(list)
+        for activity_subclass, activities in self.__activity_lists.items():
+            for activity in activities:
+                key = (activity_subclass, activity.start.year, activity.start.month)
+                self.__unfrozen[key].append(activity)
+        self.__writer = RLock()
+        self.__batch_depth = 0
+        self.__batched_records = defaultdict(list)
+        self.__batched_streaks = defaultdict(list)
+        self.__batched_stress = []
+        self.__batched_text = []
+        self.__saver = None
+        self.__duplicate_index = None
+        self.__attribute_indexes = {}
+        self.__flagged_duplicates = []
+        self.__published_blocks = None
+        self.__published_aggregates = None
+        self.__publish()
+
+    def __publish(self) -> None:
+        """Publish a snapshot of the activity lists, blocks and partition
+        aggregates as they are now."""
+
+        lists = {
+            activity_subclass: (activities, len(activities))
+            for activity_subclass, activities in self.__activity_lists.items()
+        }
+
+        # The blocks are regrouped only when they have changed.
+
+        if self.__published_blocks is None:
+            keys = defaultdict(list)
+            for key in self.__blocks:
+                keys[key[0]].append(key)
+            self.__published_blocks = {
+                activity_subclass: tuple(
+                    self.__blocks[key] for key in sorted(keys[activity_subclass])
+                )
+                for activity_subclass in sorted(keys, key=lambda key: key.__name__)
+            }
+
+        # The aggregates change while a batch is open, so readers are given
+        # a copy made when it is published.
+
+        if self.__published_aggregates is None:
+            self.__published_aggregates = {
+                key: dict(aggregate) for key, aggregate in self.__aggregates.items()
+            }
+
+        self.__snapshot = ActivitySnapshot(
+            self.__generation,
+            lists,
+            self.__published_blocks,
+            self.__strings,
+            self.__published_aggregates,
+        )
+
+    def __getstate__(self) -> dict:
+        """Return the Athlete's state for pickling.
+
+        Activity lists, snapshots, the writer lock and the duplicate index are
+        derived from the activities dictionaries and are rebuilt when the
+        Athlete is loaded.  The journal belongs to the session file, not the
+        Athlete, and is attached by load and save.
+        """
+
+        derived = (
+            "activity_lists",
+            "unfrozen",
+            "snapshot",
+            "writer",
+            "batch_depth",
+            "batched_records",
+            "batched_streaks",
+            "batched_stress",
+            "batched_text",
+            "duplicate_index",
+            "attribute_indexes",
+            "flagged_duplicates",
+            "journal",
+            "saver",
+            "published_blocks",
+            "published_aggregates",
+        )
+        state = self.__dict__.copy()
+        for name in derived:
+            state.pop(f"_Athlete__{name}", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore an Athlete from a pickle.
+
+        Sessions saved by earlier versions of py_athletics lack attributes
+        added since, so those are given their initial values here.
+        """
+
+        self.__dict__.update(state)
+
+        if "_Athlete__generation" not in state:
+            self.__generation = 0
+
+        if "_Athlete__duplicate_settings" not in state:
+            self.__duplicate_settings = dict(Athlete.DUPLICATE_SETTINGS)
+
+        if "_Athlete__training_load" not in state:
+            self.__training_load = None
+
+        if "_Athlete__streak_counters" not in state:
+            self.__streak_counters = None
+
+        if "_Athlete__record_tables" not in state:
+            self.__record_tables = {}
+
+        if "_Athlete__composite_goals" not in state:
+            self.__composite_goals = {}
+
+        # Sessions saved before partitioning hold every activity.
+
+        if "_Athlete__aggregates" not in state:
+            self.__aggregates = {}
+            self.__partition_files = {}
+            self.__partition_directory = None
+            self.__partition_sequence = 0
+            self.__loaded = set()
+            self.__dirty = set()
+            for activities in self.__activities.values():
+                for activity in activities.values():
+                    if activity is not None:
+                        self.__account(activity, 1)
+
+        if "_Athlete__blocks" not in state:
+            self.__blocks = {}
+
+        if "_Athlete__strings" not in state:
+            self.__strings = StringTable()
+
+        if "_Athlete__text_index" not in state:
+            self.__text_index = None
+
+        self.__journal = None
+
+        self.__initialize_snapshots()
+        self.__freeze()
+
+    def snapshot(self) -> ActivitySnapshot:
+        """Return the current ActivitySnapshot.
+
+        A snapshot never changes, so it can be iterated while activities are
+        being added from another thread.
+        """
+
+        return self.__snapshot
+
+    @contextmanager
+    def batch(self):
+        """Return a context manager that groups activity inserts.
+
+        Inside a batch, add_activity does not publish snapshots.  A single
+        snapshot with every activity added in the batch is published when the
+        outermost batch ends, so readers see all of the batch or none of it.
+        The batch holds the writer lock, so other writers wait for it.
+        """
+
+        with self.__writer:
+            self.__batch_depth += 1
+            try:
+                yield self
+            finally:
+                self.__batch_depth -= 1
+                if self.__batch_depth == 0:
+                    self.__add_batched_records()
+                    self.__add_batched_streaks()
+                    self.__add_batched_stress()
+                    self.__add_batched_text()
+                    self.__freeze()
+                    self.__publish()
+                    self.__commit()
+
+    @property
+    def generation(self) -> int:
+        """Get the number of changes made to the Athlete's activities and
+        goals."""
+
+        return self.__generation
+
+    @property
+    def session_file(self) -> str:
+        """Get the absolute path of the session file the Athlete was most
+        recently loaded from or saved to, whose journal records its changes,
+        or None if it has not been loaded or saved."""
+
+        if self.__journal is None:
+            return None
+        return self.__journal.path.removesuffix(".journal")
+
     def __repr__(self) -> str:
-        activity_count = 0
-        for class_dict in self.__activities.values():
-            activity_count += len(class_dict)
+        activity_count = self.activity_count()
 
         goal_count = 0
         for goal_dict in self.__goals.values():
@@ -68,13 +463,301 @@ class Athlete:
         The default filename is py_athletics.pickle, a different name can be
         specified with the filename keyword argument.
 
+        The file holds the Athlete without its activities, which are saved
+        in partition files, one for each Activity subclass and year, in a
+        directory named after the file with a .partitions suffix.
+
+        Changes made since the Athlete was loaded from or saved to the file
+        are already in the file's journal, so saving to the same file only
+        makes sure they are on disk.  The session is written again, and the
+        journal emptied, when the journal has grown large or the file is a
+        different one.  Only changed partitions are written, other partition
+        files are kept or copied.
+
+        Optional Parameters
+        -------------------
+        filename: string
+        """
+
+        future = self.save_in_background(filename)
+        if future is not None:
+            future.result()
+
+    def save_in_background(self, filename: str = "py_athletics.pickle", callback=None):
+        """Save Athlete data to a file on a background thread.
+
+        The Athlete is copied, which is cheap because the activities
+        themselves are shared, and the copy is written as save would write
+        the Athlete, so changes made while the file is being written are
+        kept in the journal.  Saves are written one at a time in the order
+        they were started.  When the save is complete callback, if given, is
+        called with the filename and None, or the exception if the save
+        failed.  Return a Future for the save, or None if the save was
+        completed immediately because only the journal had to be made
+        durable.
+
         Optional Parameters
         -------------------
         filename: string
+        callback: function
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self.__writer:
+            copy = self.__prepare_save(filename)
+
+            if copy is None:
+                if callback is not None:
+                    callback(filename, None)
+                return None
+
+            if self.__saver is None:
+                self.__saver = ThreadPoolExecutor(1, thread_name_prefix="save")
+            future = self.__saver.submit(self.__write_session, filename, *copy)
+
+        if callback is not None:
+            future.add_done_callback(
+                lambda future: callback(filename, future.exception())
+            )
+        return future
+
+    def __prepare_save(self, filename: str) -> tuple:
+        """Start saving to a file.
+
+        Return None if syncing the journal was enough, otherwise a tuple of
+        the manifest to write, the partition directory, a dictionary of the
+        activities of each partition to write, a dictionary of the existing
+        files of partitions to copy into the directory and of the unchanged
+        partition files already there, the file's journal and the journal
+        position up to which the manifest and partitions include its changes.
+        Called with the writer lock held.
         """
 
-        with open(filename, "wb") as pickle_out:
-            dump(self, pickle_out)
+        from os.path import abspath, getsize, join
+
+        journal_path = abspath(filename) + ".journal"
+        directory = abspath(filename) + ".partitions"
+
+        journal = self.__journal
+
+        if journal is not None and journal.path == journal_path:
+            try:
+                session_size = getsize(filename)
+            except FileNotFoundError:
+                session_size = None
+            if session_size is not None:
+                limit = max(
+                    Athlete.JOURNAL_COMPACTION_BYTES,
+                    Athlete.JOURNAL_COMPACTION_RATIO * session_size,
+                )
+                if journal.size() <= limit:
+                    journal.sync()
+                    return None
+
+        # A new file gets a new, empty journal straight away, so changes made
+        # from now on are recorded there.  For the same file, the changes up
+        # to the current end of the journal will be in the copy and are
+        # discarded once it has been written.
+
+        if journal is None or journal.path != journal_path:
+            if journal is not None:
+                journal.close()
+            journal = Journal(journal_path)
+            journal.reset()
+            self.__journal = journal
+        else:
+            journal.flush()
+
+        # Changed partitions and partitions without a file are written from
+        # the loaded activities.  The files of other partitions are kept if
+        # they are already in the directory and copied there otherwise.
+
+        same_directory = self.__partition_directory == directory
+        written = {}
+        files = {}
+        for key in self.__aggregates:
+            if key in self.__dirty or key not in self.__partition_files:
+                written[key] = []
+            elif same_directory:
+                files[key] = self.__partition_files[key]
+            else:
+                files[key] = join(
+                    self.__partition_directory, self.__partition_files[key]
+                )
+
+        for activity_subclass, activities in self.__activities.items():
+            for activity in activities.values():
+                if activity is None:
+                    continue
+                key = (activity_subclass, activity.start.year)
+                if key in written:
+                    written[key].append(activity)
+
+        for (activity_subclass, year, _), block in self.__blocks.items():
+            if (activity_subclass, year) in written:
+                written[(activity_subclass, year)].append(block)
+
+        self.__dirty.difference_update(written)
+        self.__partition_sequence += 1
+
+        return (
+            self.__manifest(directory),
+            directory,
+            written,
+            files,
+            journal,
+            journal.position(),
+        )
+
+    def __manifest(self, directory: str):
+        """Return a copy of the Athlete without activities, to be saved as
+        the manifest of a session with the specified partition directory.
+        Called with the writer lock held."""
+
+        self.__add_batched_records()
+        self.__add_batched_streaks()
+        self.__add_batched_stress()
+        self.__add_batched_text()
+        state = self.__getstate__()
+        state["_Athlete__activities"] = defaultdict(
+            none_factory,
+            {
+                activity_subclass: defaultdict(none_factory)
+                for activity_subclass in Activity.subclasses()
+            },
+        )
+        state["_Athlete__goals"] = defaultdict(
+            none_factory,
+            {
+                activity_subclass: defaultdict(
+                    none_factory,
+                    {
+                        key: goal.copy()
+                        for key, goal in goals.items()
+                        if goal is not None
+                    },
+                )
+                for activity_subclass, goals in self.__goals.items()
+            },
+        )
+        state["_Athlete__composite_goals"] = {
+            key: goal.copy() for key, goal in self.__composite_goals.items()
+        }
+        state["_Athlete__duplicate_settings"] = dict(self.__duplicate_settings)
+        state["_Athlete__aggregates"] = {
+            key: dict(aggregate) for key, aggregate in self.__aggregates.items()
+        }
+        state["_Athlete__partition_directory"] = directory
+        state["_Athlete__loaded"] = set()
+        state["_Athlete__dirty"] = set()
+        state["_Athlete__blocks"] = {}
+        state["_Athlete__strings"] = self.__strings.copy()
+        if self.__text_index is not None:
+            state["_Athlete__text_index"] = self.__text_index.copy()
+        if self.__training_load is not None:
+            state["_Athlete__training_load"] = self.__training_load.copy()
+        if self.__streak_counters is not None:
+            state["_Athlete__streak_counters"] = {
+                activity_subclass: (daily.copy(), weekly.copy())
+                for activity_subclass, (daily, weekly) in self.__streak_counters.items()
+            }
+        state["_Athlete__record_tables"] = {
+            activity_subclass: record_table.copy()
+            for activity_subclass, record_table in self.__record_tables.items()
+        }
+
+        manifest = Athlete.__new__(Athlete)
+        manifest.__dict__.update(state)
+        return manifest
+
+    def __write_session(
+        self,
+        filename: str,
+        manifest,
+        directory: str,
+        written: dict,
+        files: dict,
+        journal: Journal,
+        position: int,
+    ) -> None:
+        """Write the partitions and manifest of a session, discard the
+        journal records they include and remove partition files no longer
+        used.  Runs on the save thread."""
+
+        from os import fsync, listdir, makedirs, remove, replace
+        from os.path import dirname, join
+        from pickle import dump, HIGHEST_PROTOCOL
+
+        try:
+            makedirs(directory, exist_ok=True)
+            sequence = manifest.__partition_sequence
+
+            # Partition files are never overwritten: each save writes new
+            # files, named with the save's sequence number, so the previous
+            # manifest and its partitions stay complete until the new
+            # manifest replaces it.  Frozen blocks are written as they are.
+
+            partition_files = {}
+            for key, items in written.items():
+                name = f"{key[0].__name__}-{key[1]}-{sequence}.pickle"
+                activities = sorted(
+                    (item for item in items if isinstance(item, Activity)),
+                    key=lambda activity: activity.start,
+                    reverse=True,
+                )
+                blocks = sorted(
+                    (item for item in items if isinstance(item, ActivityBlock)),
+                    key=lambda block: block.month,
+                )
+                write_partition(join(directory, name), activities + blocks)
+                partition_files[key] = name
+
+            for key, name in files.items():
+                if dirname(name):
+                    source = name
+                    name = f"{key[0].__name__}-{key[1]}-{sequence}.pickle"
+                    copy_partition(source, join(directory, name))
+                partition_files[key] = name
+
+            manifest.__partition_files = partition_files
+
+            # Write the manifest to a temporary file and rename it, so the
+            # session file is always complete.  The journal records included
+            # are discarded after the rename.  Should that not happen,
+            # replaying them again on load is harmless because every change
+            # the journal records is idempotent.
+
+            temporary = filename + ".tmp"
+            with open(temporary, "wb") as pickle_out:
+                dump(manifest, pickle_out, HIGHEST_PROTOCOL)
+                pickle_out.flush()
+                fsync(pickle_out.fileno())
+            replace(temporary, filename)
+
+        except BaseException:
+            with self.__writer:
+                self.__dirty.update(written)
+            raise
+
+        with self.__writer:
+
+            # The journal may have been replaced by a save to another file in
+            # the meantime, its records are discarded just the same.
+
+            journal.discard(position)
+
+            # From now on partitions are loaded from the new files.  The
+            # partitions written were written from loaded activities.
+
+            self.__partition_directory = directory
+            self.__partition_files = dict(partition_files)
+            self.__loaded.update(written)
+
+            in_use = set(partition_files.values())
+            for name in listdir(directory):
+                if name not in in_use:
+                    remove(join(directory, name))
 
     @staticmethod
     def load(filename: str = "py_athletics.pickle"):
@@ -83,259 +766,1675 @@ class Athlete:
         The default filename is py_athletics.pickle, a different name can be
         specified with the filename keyword argument.
 
+        Activities are not read until they are needed, see save.
+
         Optional Parameters
         -------------------
         filename: string
         """
 
+        from os.path import abspath
+        from pickle import load
+
         with open(filename, "rb") as pickle_in:
             athlete = load(pickle_in)
+
+        # Partitions are loaded from the directory next to the file, even if
+        # the session was moved since it was saved.
+
+        if athlete.__partition_files:
+            athlete.__partition_directory = abspath(filename) + ".partitions"
+
+        # Replay the changes recorded in the journal since the session was
+        # saved, then attach the journal to record further changes.
+
+        journal = Journal(abspath(filename) + ".journal")
+        records = journal.records()
+        if records:
+            with athlete.batch():
+                for record in records:
+                    athlete.__replay(record)
+        athlete.__journal = journal
+
         return athlete
 
+    def __replay(self, record: tuple) -> None:
+        """Apply a change recorded in the journal."""
+
+        action, *arguments = record
+
+        if action == "add_activity":
+            self.add_activity(*arguments)
+        elif action == "add_goal":
+            self.add_goal(*arguments)
+        elif action == "delete_goal":
+            self.delete_goal(*arguments)
+        elif action == "dedupe":
+            self.__apply_duplicate_settings(*arguments)
+        else:
+            raise ValueError(f"invalid journal record {action}")
+
+    def __log(self, *record) -> None:
+        """Append a change to the journal, if the Athlete has one."""
+
+        if self.__journal is not None:
+            self.__journal.append(record)
+
+    def __commit(self) -> None:
+        """Make journal records durable unless a batch is in progress, in
+        which case they are made durable when the batch ends."""
+
+        if self.__journal is not None and self.__batch_depth == 0:
+            self.__journal.sync()
+
     def add_activity(self, activity: Activity) -> None:
         """Add an Activity if the Athlete does not already have an Activity
         of the same type and with the same start datetime.
+
+        An Activity that is a near-duplicate of one the Athlete already has,
+        of any type, is added and flagged, or in merge mode merged into the
+        existing Activity instead of being added.  See dedupe.
         """
 
         if not isinstance(activity, Activity):
             raise TypeError("activity must be an Activity")
 
         activity_type = type(activity)
+        start = activity.start
+        key = (activity_type, start.year, start.month)
 
-        # Grab the relevant activity type dictionary
+        with self.__writer:
 
-        subclass_activities = self.__activities[activity_type]
+            # Load the partitions of every subclass the activity or its
+            # near-duplicates could be in.
 
-        # Then add activity if it is not already in that dictionary
+            if len(self.__loaded) < len(self.__partition_files):
+                first, last = self.__duplicate_window(start)
+                self.__load_partitions(Activity.subclasses(), first.year, last.year)
 
-        if subclass_activities[activity.start] is None:
-            subclass_activities[activity.start] = activity
+            # Grab the relevant activity type dictionary
 
-    def get_activities(self, activity_subclass=None) -> list:
-        """Return a list containing an Athlete's activities.  The activities_subclass
-        parameter is used to limit the results to the specified subclass.
-        """
+            subclass_activities = self.__activities[activity_type]
 
-        if activity_subclass and activity_subclass not in Activity.subclasses():
-            raise ValueError("invalid activity subclass")
+            # Then add activity if it is not already in that dictionary, or
+            # frozen in the block for its month
 
-        # If the activity_subclass parameter is specified, return a list
-        # of activities for that activity subclass, otherwise return a list
-        # of all activities.
+            if subclass_activities.get(start) is not None:
+                return
 
-        if activity_subclass:
-            activities = self.__activities[activity_subclass].values()
-            result = [activity for activity in activities]
+            block = self.__blocks.get(key)
+            if block is not None and block.contains(start):
+                return
 
-        else:
-            result = [
-                activity
-                for sub_dict in self.__activities.values()
-                for activity in sub_dict.values()
-            ]
+            # Near-duplicates are found among activity objects, so the blocks
+            # of the months they could be in are thawed.
 
-        return result
+            if self.__blocks:
+                self.__thaw_months(*self.__duplicate_window(start))
 
-    def add_goal(self, exercise: str, metric: str, timeframe: str, target: int) -> None:
-        """Add a Goal.
+            duplicate_index = self.__get_duplicate_index()
+            kept = duplicate_index.find(activity)
 
-        A Goal replaces existing Goals for the same activity class and metric.
-        The distance metric is only valid for Cycle, Run and Walk activities.
+            if kept is not None and self.__duplicate_settings["mode"] == "merge":
+                self.__merge(kept, activity)
+                self.__replace_merged((type(kept),))
+                self.__generation += 1
+                self.__log("add_activity", activity)
+                if self.__batch_depth == 0:
+                    self.__publish()
+                    self.__commit()
+                return
 
-        Parameters
-        ----------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
-        metric: string = {count|distance|duration}
-        timeframe: string = {month|year|cumulative}
-        target: a positive integer
-        """
+            if kept is not None:
+                self.__flagged_duplicates.append((kept, activity))
 
-        if not isinstance(exercise, str):
-            raise TypeError("exercise must be a string")
+            subclass_activities[start] = activity
+            self.__activity_lists[activity_type].append(activity)
+            self.__unfrozen[key].append(activity)
+            duplicate_index.add(activity)
 
-        if exercise not in Activity.subclass_names():
-            raise ValueError("invalid exercise")
+            # Inside a batch the words are indexed in bulk when it ends.
 
-        if not isinstance(timeframe, str):
-            raise TypeError("timeframe must be a string")
+            if self.__text_index is not None and self.__batch_depth > 0:
+                self.__batched_text.append(
+                    (activity_type.__name__, start, activity.description)
+                )
+            elif self.__text_index is not None:
+                self.__text_index.add(activity)
+
+            attribute_indexes = self.__attribute_indexes.get(activity_type)
+            if attribute_indexes is not None:
+                for name, attribute_index in attribute_indexes.items():
+                    value = getattr(activity, name, None)
+                    if value is not None:
+                        insort(attribute_index[value], activity.start)
+            self.__account(activity, 1)
+            self.__generation += 1
+            self.__log("add_activity", activity)
+
+            if self.__batch_depth == 0:
+                self.__publish()
+                self.__commit()
+
+    def __account(self, activity: Activity, sign: int) -> None:
+        """Add an activity to the aggregates of its partition, the training
+        load, the streak counters, the record tables and the live counters
+        of its Goals, or with a sign of -1 remove it, and mark the partition
+        changed."""
+
+        activity_subclass = type(activity)
+        key = (activity_subclass, activity.start.year)
+
+        aggregate = self.__aggregates.get(key)
+        if aggregate is None:
+            aggregate = empty_aggregate(activity_subclass)
+            self.__aggregates[key] = aggregate
+
+        # The aggregates add up exactly what Activity.tally adds up.
+
+        accumulate(aggregate, activity, sign)
+        self.__published_aggregates = None
+
+        # Inside a batch the training stress is added in bulk when it ends.
+
+        if self.__training_load is not None and activity.training_stress_score:
+            stress = (activity.start.date(), activity.training_stress_score)
+            if sign > 0 and self.__batch_depth > 0:
+                self.__batched_stress.append(stress)
+            else:
+                self.__add_batched_stress()
+                self.__training_load.add(*stress, sign)
 
-        if timeframe not in Goal.GOAL_TIMEFRAMES:
-            raise ValueError("invalid timeframe")
+        # Inside a batch the streak days are counted in bulk when it ends.
 
-        if not isinstance(metric, str):
-            raise TypeError("metric must be a string")
+        if self.__streak_counters is not None:
+            if sign > 0 and self.__batch_depth > 0:
+                self.__batched_streaks[activity_subclass].append(activity.start)
+            else:
+                self.__add_batched_streaks((activity_subclass,))
+                self.__count_streaks(activity_subclass, [activity.start], sign)
 
-        if metric not in Goal.GOAL_METRICS:
-            raise ValueError("invalid metric")
+        # Inside a batch the records are added in bulk when it ends.
 
-        target_class = Activity.activity_dictionary()[exercise]
+        record_table = self.__record_tables.get(activity_subclass)
+        if record_table is not None:
+            if sign > 0 and self.__batch_depth > 0:
+                self.__batched_records[activity_subclass].append(
+                    (activity.start, vars(activity))
+                )
+            elif sign > 0:
+                record_table.add(activity.start, vars(activity))
+            else:
+                self.__add_batched_records((activity_subclass,))
+                if record_table.remove(activity.start):
+                    del self.__record_tables[activity_subclass]
+
+        goals = self.__goals.get(activity_subclass)
+        if goals:
+            for goal in goals.values():
+                if goal is not None:
+                    goal.count(activity, sign)
+
+        for goal in self.__composite_goals.values():
+            if activity_subclass in goal.activity_types:
+                goal.count(activity, sign)
+
+        self.__dirty.add(key)
+
+        # A partition left without activities is forgotten.
+
+        if aggregate["count"] == 0:
+            del self.__aggregates[key]
+            self.__partition_files.pop(key, None)
+            self.__loaded.discard(key)
+            self.__dirty.discard(key)
+
+    def __merge(self, kept: Activity, duplicate: Activity) -> Activity:
+        """Merge a near-duplicate into a copy of the activity kept, or of
+        the copy that already replaced it, and put the merged copy in its
+        place in the activities dictionary, the indexes and the aggregates
+        of its partition.  Return the merged copy.  Called with the writer
+        lock held; the caller replaces the activity lists, see
+        __replace_merged, and publishes.
+
+        The kept activity itself is not changed, as published snapshots may
+        refer to it.
+        """
 
-        if timeframe == "month":
-            goal = MonthGoal(target_class, metric, int(target))
-        elif timeframe == "year":
-            goal = YearGoal(target_class, metric, int(target))
-        else:
-            goal = CumulativeGoal(target_class, metric, int(target))
+        activity_subclass = type(kept)
+        subclass_activities = self.__activities[activity_subclass]
+        kept = subclass_activities.get(kept.start) or kept
+        merged = DuplicateIndex.merge(kept, duplicate)
+
+        self.__account(kept, -1)
+        if self.__text_index is not None:
+            self.__add_batched_text()
+            self.__text_index.remove(kept)
+        if self.__duplicate_index is not None:
+            self.__duplicate_index.remove(kept)
+
+        subclass_activities[merged.start] = merged
+        month = (merged.start.year, merged.start.month)
+        self.__unfrozen[(activity_subclass, *month)].append(merged)
+
+        self.__account(merged, 1)
+        if self.__text_index is not None:
+            self.__text_index.add(merged)
+        if self.__duplicate_index is not None:
+            self.__duplicate_index.add(merged)
+        self.__attribute_indexes.clear()
+        return merged
+
+    def __replace_merged(self, activity_subclasses) -> None:
+        """Replace the activities of the Activity subclasses' lists that
+        were merged with the copies in the activities dictionaries.
+
+        The lists are replaced rather than changed, so snapshots published
+        earlier are unaffected.
+        """
 
-        # Grab the relevant goal dictionary
+        for activity_subclass in activity_subclasses:
+            subclass_activities = self.__activities[activity_subclass]
+            self.__activity_lists[activity_subclass] = [
+                subclass_activities.get(activity.start) or activity
+                for activity in self.__activity_lists[activity_subclass]
+            ]
 
-        subclass_goals = self.__goals[target_class]
+    def __load_partitions(self, activity_subclasses, first_year, last_year) -> None:
+        """Load the saved partitions of the Activity subclasses for the years
+        from first_year to last_year that are not loaded yet.
 
-        # The class specific goal dictionary uses (metric, timeframe)
-        # tuples as keys.  New goals supersede prior goals.
+        Loading a partition is not a change to the Athlete, but the loaded
+        activities are published in a new snapshot like added ones.
+        """
 
-        subclass_goals[(metric, timeframe)] = goal
+        keys = [
+            key
+            for key in list(self.__partition_files)
+            if key[0] in activity_subclasses and first_year <= key[1] <= last_year
+        ]
 
-    def get_goals(self, activity_subclass=None) -> list:
-        """Return a list containing an Athlete's goals.  If the optional
-        activity_subclass parameter is specified, the result is limited to
-        goals for that subclass.
-        """
+        if all(key in self.__loaded for key in keys):
+            return
 
-        if activity_subclass and activity_subclass not in Activity.subclasses():
-            raise ValueError("invalid activity subclass")
+        from os.path import join
 
-        # If the activity_subclass parameter is specified, return a list
-        # of goals for that activity subclass, otherwise return a list
-        # of all goals.
+        with self.__writer:
+            for key in keys:
+                if key in self.__loaded or key not in self.__partition_files:
+                    continue
 
-        if activity_subclass:
-            goals = self.__goals[activity_subclass].values()
-            result = [goal for goal in goals]
+                filename = self.__partition_files[key]
+                items = read_partition(join(self.__partition_directory, filename))
 
-        else:
-            result = [
-                goal for sub_dict in self.__goals.values() for goal in sub_dict.values()
-            ]
+                activity_subclass = key[0]
+                subclass_activities = self.__activities[activity_subclass]
+                activity_list = self.__activity_lists[activity_subclass]
+                for activity in items:
+                    if isinstance(activity, ActivityBlock):
+                        self.__blocks[activity.key] = activity
+                        self.__published_blocks = None
+                    elif subclass_activities.get(activity.start) is None:
+                        subclass_activities[activity.start] = activity
+                        activity_list.append(activity)
+                        month = (activity.start.year, activity.start.month)
+                        self.__unfrozen[(activity_subclass, *month)].append(activity)
+                        if self.__duplicate_index is not None:
+                            self.__duplicate_index.add(activity)
 
-        return result
+                self.__loaded.add(key)
 
-    def delete_goal(self, exercise: str, metric: str, timeframe: str) -> None:
-        """Delete a Goal.
+            # Partitions saved before their activities were old enough are
+            # frozen now.
 
-        Parameters
-        ----------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
-        metric: string = {count|distance|duration}
-        timeframe: string = {month|year|cumulative}
-        """
+            self.__freeze()
 
-        if not isinstance(exercise, str):
-            raise TypeError("exercise must be a string")
+            if self.__batch_depth == 0:
+                self.__publish()
 
-        if exercise not in Activity.subclass_names():
-            raise ValueError("invalid exercise")
+    def __load_all_partitions(self, activity_subclasses=None) -> None:
+        """Load every saved partition of the Activity subclasses, or of all
+        subclasses."""
+
+        if len(self.__loaded) == len(self.__partition_files):
+            return
 
-        target_class = Activity.activity_dictionary()[exercise]
+        if activity_subclasses is None:
+            activity_subclasses = Activity.subclasses()
 
-        # Grab the relevant goal dictionary
+        self.__load_partitions(activity_subclasses, date.min.year, date.max.year)
 
-        subclass_goals = self.__goals[target_class]
+    def __cutoff(self) -> datetime:
+        """Return the datetime before which activities are frozen."""
 
-        # The class specific goal dictionary uses (metric, timeframe)
-        # tuples as keys.  Delete the key if it exists, otherwise
-        # return None.
+        today = date.today()
+        month = today.year * 12 + today.month - 1 - Athlete.HOT_MONTHS
+        return datetime(month // 12, month % 12 + 1, 1)
 
-        subclass_goals.pop((metric, timeframe), None)
+    def __freeze(self) -> None:
+        """Freeze the activity objects that started before the cutoff into
+        blocks, one for each Activity subclass and month.  Called with the
+        writer lock held.
 
-        return None
+        Only the months in the unfrozen dictionary are visited, and its
+        months that are still recent are kept there until they are old
+        enough.  Freezing is not a change to the Athlete, the activities stay
+        the same, but the activity lists are replaced, the frozen activities
+        are removed from the duplicate index and, outside a batch, a
+        snapshot with the new blocks is published.
+        """
 
-    def show_goals(self, exercise: str = None) -> None:
-        """Display a list of Goals.
+        cutoff = self.__cutoff()
+        keys = [key for key in self.__unfrozen if datetime(key[1], key[2], 1) < cutoff]
+        frozen_ids = defaultdict(set)
+
+        months = defaultdict(dict)
+
+        for key in keys:
+            activities = self.__activities[key[0]]
+
+            # Activities removed or frozen since they were recorded are
+            # skipped.
+
+            month_activities = list(
+                {
+                    activity.start: activity
+                    for activity in self.__unfrozen.pop(key)
+                    if activities.get(activity.start) is activity
+                }.values()
+            )
+            if month_activities:
+                months[key[0]][key] = month_activities
+
+        # The months of each subclass are frozen together, see
+        # ActivityBlock.freeze, with the activities of their existing blocks.
+
+        for activity_subclass, subclass_months in months.items():
+            block_activities = dict(subclass_months)
+            for key in block_activities:
+                block = self.__blocks.get(key)
+                if block is not None:
+                    frozen = block.activities(self.__strings)
+                    block_activities[key] = block_activities[key] + frozen
+
+            # Activities whose attributes differ, as after changes by hand,
+            # stay objects, so the months are then frozen one at a time.
+
+            try:
+                blocks = ActivityBlock.freeze(
+                    activity_subclass,
+                    list(chain.from_iterable(block_activities.values())),
+                    self.__strings,
+                )
+            except ValueError:
+                blocks = []
+                for month_activities in block_activities.values():
+                    try:
+                        blocks.append(
+                            ActivityBlock(
+                                activity_subclass, month_activities, self.__strings
+                            )
+                        )
+                    except ValueError:
+                        continue
+
+            activities = self.__activities[activity_subclass]
+            for block in blocks:
+                self.__blocks[block.key] = block
+                for activity in subclass_months[block.key]:
+                    frozen_ids[activity_subclass].add(id(activity))
+                    activities.pop(activity.start, None)
+
+        if not frozen_ids:
+            return
 
-        If exercise is specified, the listing is limited to that exercise.
+        # The frozen activities are removed from the duplicate index, or
+        # when they are most of it, as after reading a file, the index is
+        # left to be rebuilt from the activities that are still objects.
 
-        Optional Parameters
-        -------------------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        if self.__duplicate_index is not None:
+            frozen_count = sum(
+                len(subclass_ids) for subclass_ids in frozen_ids.values()
+            )
+            if 2 * frozen_count > len(self.__duplicate_index):
+                self.__duplicate_index = None
+            else:
+                for activity_subclass, subclass_ids in frozen_ids.items():
+                    for activity in self.__activity_lists[activity_subclass]:
+                        if id(activity) in subclass_ids:
+                            self.__duplicate_index.remove(activity)
+
+        # The dictionaries are copied because dictionaries do not shrink.
+
+        for activity_subclass, subclass_ids in frozen_ids.items():
+            self.__activities[activity_subclass] = defaultdict(
+                none_factory, self.__activities[activity_subclass]
+            )
+            self.__activity_lists[activity_subclass] = [
+                activity
+                for activity in self.__activity_lists[activity_subclass]
+                if id(activity) not in subclass_ids
+            ]
+
+        self.__published_blocks = None
+        if self.__batch_depth == 0:
+            self.__publish()
+
+    def __thaw(self, keys) -> None:
+        """Turn the blocks with the specified keys back into activity
+        objects.  Called with the writer lock held; the caller publishes."""
+
+        for key in keys:
+            block = self.__blocks.pop(key, None)
+            if block is None:
+                continue
+
+            self.__published_blocks = None
+            subclass_activities = self.__activities[block.activity_subclass]
+            activity_list = self.__activity_lists[block.activity_subclass]
+            for activity in block.activities(self.__strings):
+                subclass_activities[activity.start] = activity
+                activity_list.append(activity)
+                self.__unfrozen[key].append(activity)
+                if self.__duplicate_index is not None:
+                    self.__duplicate_index.add(activity)
+
+    def __duplicate_window(self, start: datetime) -> tuple:
+        """Return the first and last starts of the activities that can be
+        near-duplicates of an activity with the specified start."""
+
+        tolerance = timedelta(seconds=self.__duplicate_settings["start"])
+        return (start - tolerance, start + tolerance)
+
+    def __thaw_months(self, first: datetime, last: datetime) -> None:
+        """Thaw the blocks of every Activity subclass for the months from the
+        first datetime to the last."""
+
+        keys = []
+        month = first.year * 12 + first.month - 1
+        while month <= last.year * 12 + last.month - 1:
+            for activity_subclass in Activity.subclasses():
+                keys.append((activity_subclass, month // 12, month % 12 + 1))
+            month += 1
+        self.__thaw(keys)
+
+    def __get_duplicate_index(self) -> DuplicateIndex:
+        """Return the DuplicateIndex, building it from the activities if
+        necessary.  Called with the writer lock held."""
+
+        if self.__duplicate_index is None:
+            settings = self.__duplicate_settings
+            duplicate_index = DuplicateIndex(
+                settings["start"], settings["duration"], settings["distance"]
+            )
+            for activity in sorted(
+                self.__all_activities(), key=lambda activity: activity.start
+            ):
+                duplicate_index.add(activity)
+            self.__duplicate_index = duplicate_index
+
+        return self.__duplicate_index
+
+    def __get_attribute_indexes(self, activity_subclass) -> dict:
+        """Return the attribute indexes of an Activity subclass, loading its
+        partitions and building them if necessary.  Called with the writer
+        lock held."""
+
+        attribute_indexes = self.__attribute_indexes.get(activity_subclass)
+        if attribute_indexes is not None:
+            return attribute_indexes
+
+        self.__load_all_partitions((activity_subclass,))
+
+        attribute_indexes = {
+            name: defaultdict(list) for name in Activity.filter_attributes
+        }
+
+        for start, activity in self.__activities[activity_subclass].items():
+            if activity is None:
+                continue
+            for name, attribute_index in attribute_indexes.items():
+                value = getattr(activity, name, None)
+                if value is not None:
+                    attribute_index[value].append(start)
+
+        for (key_subclass, _, _), block in self.__blocks.items():
+            if key_subclass is not activity_subclass:
+                continue
+            starts = block.values("start", self.__strings)
+            for name, attribute_index in attribute_indexes.items():
+                values = block.values(name, self.__strings)
+                if values is None:
+                    continue
+                for start, value in zip(starts, values):
+                    if value is not None:
+                        attribute_index[value].append(start)
+
+        for attribute_index in attribute_indexes.values():
+            for starts in attribute_index.values():
+                starts.sort()
+
+        self.__attribute_indexes[activity_subclass] = attribute_indexes
+        return attribute_indexes
+
+    def __query_index(self, activity_subclass, start, end, where, descending):
+        """Generate the activities of an Activity subclass that started on
+        or between the start and end dates and have the filter attribute
+        values in where, in start order or, if descending, reverse start
+        order, looking only at the activities matching the most selective of
+        them."""
+
+        with self.__writer:
+            attribute_indexes = self.__get_attribute_indexes(activity_subclass)
+            starts = min(
+                (
+                    attribute_indexes[name].get(value, ())
+                    for name, value in where.items()
+                ),
+                key=len,
+            )
+
+            first = 0
+            last = len(starts)
+            if start is not None:
+                first = bisect_left(
+                    starts, datetime(start.year, start.month, start.day)
+                )
+            if end is not None:
+                last = bisect_left(
+                    starts, datetime(end.year, end.month, end.day) + timedelta(days=1)
+                )
+            starts = starts[first:last]
+
+        if descending:
+            starts = starts[::-1]
+
+        # Each activity is only created from its block when it is reached.
+
+        subclass_activities = self.__activities[activity_subclass]
+        for activity_start in starts:
+            with self.__writer:
+                activity = subclass_activities.get(activity_start)
+                if activity is None:
+                    month = (activity_start.year, activity_start.month)
+                    block = self.__blocks.get((activity_subclass, *month))
+                    if block is None:
+                        continue
+                    activity = block.activity(activity_start, self.__strings)
+            if activity is not None and all(
+                getattr(activity, name, None) == value for name, value in where.items()
+            ):
+                yield activity
+
+    def __query_partitions(self, activity_subclass, start, end, where, descending):
+        """Generate the activities of an Activity subclass that started on
+        or between the start and end dates and whose attributes have the
+        values in where, in start order or, if descending, reverse start
+        order.
+
+        Years are visited in order and the partition for a year is only
+        loaded when it is reached.  Blocks are only turned into activities
+        for the months in the timeframe, and only their matching activities.
         """
 
-        # If exercise is not specified, make recursive calls
-        # over every Activity subclass.
+        first = start or date.min
+        last = end or date.max
+        where = where or {}
+
+        years = sorted(
+            {
+                year
+                for key_subclass, year in self.__snapshot.aggregates
+                if key_subclass is activity_subclass and first.year <= year <= last.year
+            },
+            reverse=descending,
+        )
+
+        def start_of(activity):
+            return activity.start
+
+        snapshot = None
+        for year in years:
+            if len(self.__loaded) < len(self.__partition_files):
+                self.__load_partitions((activity_subclass,), year, year)
+
+            # Loading a partition publishes a new snapshot, whose recent
+            # activities are sorted once and whose blocks are grouped by year.
+
+            if self.__snapshot is not snapshot:
+                snapshot = self.__snapshot
+                recent = sorted(
+                    (
+                        activity
+                        for activity in snapshot.recent_activities(activity_subclass)
+                        if first <= activity.start.date() <= last
+                        and all(
+                            getattr(activity, name, None) == value
+                            for name, value in where.items()
+                        )
+                    ),
+                    key=start_of,
+                )
+                recent_years = [activity.start.year for activity in recent]
+                blocks = defaultdict(list)
+                for block in snapshot.blocks(activity_subclass):
+                    month = (block.year, block.month)
+                    if (first.year, first.month) <= month <= (last.year, last.month):
+                        blocks[block.year].append(block)
+
+            year_recent = recent[
+                bisect_left(recent_years, year) : bisect_left(recent_years, year + 1)
+            ]
+            year_blocks = sorted(blocks.get(year, ()), key=lambda block: block.month)
+            if descending:
+                year_recent.reverse()
+                year_blocks.reverse()
+
+            # Years before the recent months have only blocks, which are
+            # already in order.
+
+            year_activities = self.__query_blocks(
+                year_blocks, first, last, where, descending
+            )
+            if year_recent:
+                year_activities = merge(
+                    year_recent, year_activities, key=start_of, reverse=descending
+                )
+            yield from year_activities
 
-        if exercise is None:
-            for name in Activity.subclass_names():
-                self.show_goals(exercise=name)
-            return
+    def __query_blocks(self, blocks, first, last, where, descending):
+        """Generate the activities of the blocks, in order, that started on
+        or between the first and last dates and match where.
 
-        # The class was specified, so handle it.
+        The blocks, the months of a year, are listed together, see
+        ActivityBlock.activities_of, and only the first and last of them can
+        hold activities outside the timeframe.
+        """
 
-        if not isinstance(exercise, str):
-            raise TypeError("class name must be a string")
+        if not blocks:
+            return
 
-        if exercise not in Activity.subclass_names():
-            raise ValueError("invalid class name")
+        blocks = blocks[::-1] if descending else blocks
+        activities = ActivityBlock.activities_of(blocks, self.__strings, where)
+        if blocks[0].first_day() < first or blocks[-1].last_day() > last:
+            activities = [
+                activity
+                for activity in activities
+                if first <= activity.start.date() <= last
+            ]
+        if descending:
+            activities.reverse()
+        yield from activities
+
+    def __add_batched_text(self) -> None:
+        """Index the descriptions of the activities added in the current
+        batch.  Called with the writer lock held."""
+
+        if self.__batched_text:
+            if self.__text_index is not None:
+                self.__text_index.extend(self.__batched_text)
+            self.__batched_text = []
+
+    def __get_text_index(self) -> TextIndex:
+        """Return the text index, loading every partition and building it
+        if necessary.  Called with the writer lock held."""
+
+        self.__add_batched_text()
+
+        if self.__text_index is None:
+            self.__load_all_partitions()
+            rows = [
+                (type(activity).__name__, activity.start, activity.description)
+                for activity in self.__all_activities()
+            ]
+            for (activity_subclass, _, _), block in self.__blocks.items():
+                starts = block.values("start", self.__strings)
+                descriptions = block.values("description", self.__strings)
+                if descriptions is None:
+                    continue
+                name = activity_subclass.__name__
+                rows.extend(zip([name] * len(block), starts, descriptions))
+            text_index = TextIndex()
+            text_index.extend(rows)
+            self.__text_index = text_index
+
+        return self.__text_index
+
+    def __get_training_load(self) -> TrainingLoad:
+        """Return the training load, loading every partition and building it
+        if necessary.  Called with the writer lock held."""
+
+        self.__add_batched_stress()
+
+        if self.__training_load is None:
+            self.__load_all_partitions()
+            training_load = TrainingLoad()
+            training_load.extend(
+                (activity.start.date(), activity.training_stress_score)
+                for activity in self.__all_activities()
+                if activity.training_stress_score
+            )
+            for block in self.__blocks.values():
+                scores = block.values("training_stress_score", self.__strings)
+                if scores is None:
+                    continue
+                starts = block.values("start", self.__strings)
+                training_load.extend(
+                    (start.date(), score)
+                    for start, score in zip(starts, scores)
+                    if score
+                )
+            self.__training_load = training_load
 
-        target_class = Activity.activity_dictionary()[exercise]
+        return self.__training_load
 
-        for goal in self.get_goals(target_class):
-            print(repr(goal))
+    def __add_batched_stress(self) -> None:
+        """Add the training stress of the activities added in the current
+        batch to the training load.  Called with the writer lock held."""
 
-        return
+        if self.__batched_stress:
+            if self.__training_load is not None:
+                self.__training_load.extend(self.__batched_stress)
+            self.__batched_stress = []
 
-    def summarize_goals(self, exercise=None) -> None:
-        """Display a summary of Goals.
+    def __count_streaks(self, activity_subclass, starts, sign: int = 1) -> None:
+        """Add activities with the specified starts to the streak counters
+        of their subclass, or with a sign of -1 remove them."""
 
-        If exercise is specified, the listing is limited to that exercise.
+        counters = self.__streak_counters.get(activity_subclass)
+        if counters is None:
+            counters = (StreakCounter(), StreakCounter())
+            self.__streak_counters[activity_subclass] = counters
 
-        Optional Parameters
-        -------------------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
-        """
+        # Days are numbered by their ordinals, and weeks, which start on
+        # Mondays, by the ordinals of their Mondays divided by seven.
 
-        # If exercise is not specified, make recursive calls
-        # over every Activity subclass.
+        days = [start.toordinal() for start in starts]
+        weeks = [(day - 1) // 7 for day in days]
 
-        if exercise is None:
-            for name in Activity.subclass_names():
-                self.summarize_goals(exercise=name)
+        if sign > 0:
+            counters[0].extend(days)
+            counters[1].extend(weeks)
             return
 
-        # The class was specified, so handle it.
-
-        if not isinstance(exercise, str):
-            raise TypeError("class name must be a string")
+        for day, week in zip(days, weeks):
+            counters[0].add(day, sign)
+            counters[1].add(week, sign)
+
+    def __add_batched_streaks(self, activity_subclasses=None) -> None:
+        """Count the streak days of the activities added in the current
+        batch for the specified Activity subclasses, or for all of them.
+        Called with the writer lock held."""
+
+        for activity_subclass in list(activity_subclasses or self.__batched_streaks):
+            starts = self.__batched_streaks.pop(activity_subclass, None)
+            if starts and self.__streak_counters is not None:
+                self.__count_streaks(activity_subclass, starts)
+
+    def __get_streak_counters(self) -> dict:
+        """Return the streak counters, loading every partition and building
+        them if necessary.  Called with the writer lock held."""
+
+        self.__add_batched_streaks()
+
+        if self.__streak_counters is None:
+            self.__load_all_partitions()
+            self.__streak_counters = {}
+            for activity_subclass, activities in self.__activity_lists.items():
+                starts = [activity.start for activity in activities]
+                self.__count_streaks(activity_subclass, starts)
+            for (activity_subclass, _, _), block in self.__blocks.items():
+                self.__count_streaks(
+                    activity_subclass, block.values("start", self.__strings)
+                )
 
-        if exercise not in Activity.subclass_names():
-            raise ValueError("invalid class name")
+        return self.__streak_counters
 
-        for goal in self.get_goals(Activity.activity_dictionary()[exercise]):
-            goal.report(athlete=self)
+    @staticmethod
+    def __new_record_table(activity_subclass) -> RecordTable:
+        """Return an empty RecordTable for an Activity subclass."""
+
+        name = activity_subclass.__name__
+        return RecordTable(
+            Athlete.RECORD_METRICS.get(name, ("duration", "calories")),
+            Athlete.RECORD_BANDS.get(name, ()),
+            Athlete.RECORD_COUNT,
+        )
+
+    def __add_batched_records(self, activity_subclasses=None) -> None:
+        """Add the records of the activities added in the current batch
+        to the record tables of the specified Activity subclasses, or of
+        all of them.  Called with the writer lock held."""
+
+        for activity_subclass in list(activity_subclasses or self.__batched_records):
+            rows = self.__batched_records.pop(activity_subclass, None)
+            record_table = self.__record_tables.get(activity_subclass)
+            if rows and record_table is not None:
+                record_table.extend(rows)
+
+    def __get_record_table(self, activity_subclass) -> RecordTable:
+        """Return the record table of an Activity subclass, loading the
+        subclass's partitions and building it if necessary.  Called with the
+        writer lock held."""
+
+        self.__add_batched_records((activity_subclass,))
+        record_table = self.__record_tables.get(activity_subclass)
+
+        if record_table is None:
+            self.__load_all_partitions((activity_subclass,))
+            record_table = Athlete.__new_record_table(activity_subclass)
+            rows = [
+                (activity.start, vars(activity))
+                for activity in self.__activity_lists[activity_subclass]
+            ]
+            names = ("start", "distance", *record_table.metrics)
+            for (block_subclass, _, _), block in self.__blocks.items():
+                if block_subclass is not activity_subclass:
+                    continue
+                columns = [
+                    block.values(name, self.__strings) or [None] * len(block)
+                    for name in names
+                ]
+                rows.extend(
+                    (values[0], dict(zip(names, values))) for values in zip(*columns)
+                )
+            record_table.extend(rows)
+            self.__record_tables[activity_subclass] = record_table
 
-        return
+        return record_table
 
-    def read_garmin_activity_file(self, filename="Activities.csv"):
-        """Read a Garmin activity file and create Activity objects.
+    def __all_activities(self) -> list:
+        """Return every activity in the activity lists, including any added
+        in a batch that has not been published yet."""
 
-        Garmin fitness data is stored at http://connect.garmin.com.
-        Subscribers can download comprehensive activity data into a CSV file.
-        This method reads a Garmin activity file, creates py_athletics
-        Activity objects and adds them to the Athlete's activity collection.
+        return [
+            activity
+            for activities in self.__activity_lists.values()
+            for activity in activities
+        ]
 
-        The  default filename is Activities.csv, a different name can be
-        specified with the filename keyword argument.
+    def __remove_activities(self, removed: list) -> None:
+        """Remove activities and publish a snapshot without them.  Called
+        with the writer lock held.
 
-        Optional Parameters
-        -------------------
-        filename: string
+        The activity lists are replaced rather than changed, so snapshots
+        published earlier are unaffected.
         """
 
-        # A Garmin activity file is a CSV file with activity information.
-        # The first row is a header row.
-        # We open the file and read it with csv.Dictreader
-        #
-        # We transform the start field into a datetime object
-        # We transform the duration field into a timedelta object, we look at
-        # the first 8 characters only because sometimes Garmin includes
-        # fractional seconds which we will ignore.
+        removed_ids = {id(activity) for activity in removed}
 
-        # Garmin includes the registered sign character in some fields.
-        CIRCLE_R = unicodedata.lookup("REGISTERED SIGN")
-        NORMALIZED_POWER_KEY = f"Normalized Power{CIRCLE_R} (NP{CIRCLE_R})"
+        for activity in removed:
+            self.__activities[type(activity)].pop(activity.start, None)
+            self.__account(activity, -1)
+            if self.__text_index is not None:
+                self.__add_batched_text()
+                self.__text_index.remove(activity)
 
-        with open(filename, "rt") as garmin_activities_csv_file:
-            activity_reader = DictReader(garmin_activities_csv_file)
-            for activity_row in activity_reader:
+        for activity_subclass in {type(activity) for activity in removed}:
+            self.__activity_lists[activity_subclass] = [
+                activity
+                for activity in self.__activity_lists[activity_subclass]
+                if id(activity) not in removed_ids
+            ]
+
+        self.__flagged_duplicates = [
+            pair
+            for pair in self.__flagged_duplicates
+            if id(pair[0]) not in removed_ids and id(pair[1]) not in removed_ids
+        ]
+        self.__duplicate_index = None
+        self.__attribute_indexes.clear()
+        self.__generation += len(removed)
+
+        if self.__batch_depth == 0:
+            self.__publish()
+
+    def __apply_duplicate_settings(self, settings: dict) -> list:
+        """Adopt the duplicate settings, find near-duplicates and, in merge
+        mode, merge them.  Return the (kept, duplicate) Activity tuples."""
+
+        with self.__writer:
+            if settings != self.__duplicate_settings:
+                self.__duplicate_settings = settings
+                self.__duplicate_index = None
+
+            self.__load_all_partitions()
+
+            # Merging changes activities, so every block is thawed first.
+            # Flagging only reads the activities of the blocks.
+
+            if settings["mode"] == "merge":
+                self.__thaw(list(self.__blocks))
+
+            # Activities added in a batch that has not been published yet,
+            # as when a journal is replayed, are included.
+
+            duplicate_index = DuplicateIndex(
+                settings["start"], settings["duration"], settings["distance"]
+            )
+            activities = self.__all_activities()
+            for block in self.__blocks.values():
+                activities.extend(block.activities(self.__strings))
+            pairs = duplicate_index.sweep(activities)
+
+            if settings["mode"] == "merge":
+                merged = [self.__merge(kept, duplicate) for kept, duplicate in pairs]
+                self.__replace_merged({type(kept) for kept in merged})
+                self.__remove_activities([duplicate for _, duplicate in pairs])
+                self.__freeze()
+
+        return pairs
+
+    def flagged_duplicates(self) -> list:
+        """Return a list of (existing, added) Activity tuples for the
+        near-duplicates flagged by add_activity since the Athlete was created
+        or loaded."""
+
+        return list(self.__flagged_duplicates)
+
+    def find_duplicates(self) -> list:
+        """Return a list of (kept, duplicate) Activity tuples for every
+        near-duplicate among the Athlete's activities.
+
+        The activities are sorted by start and swept once.  Each activity
+        in a group of near-duplicates is paired with the earliest one.
+        """
+
+        self.__load_all_partitions()
+
+        settings = self.__duplicate_settings
+        duplicate_index = DuplicateIndex(
+            settings["start"], settings["duration"], settings["distance"]
+        )
+        return duplicate_index.sweep(self.__snapshot)
+
+    def dedupe(
+        self, mode: str = None, start=None, duration=None, distance=None
+    ) -> None:
+        """Find near-duplicate Activities and flag or merge them.
+
+        Activities of any exercise are near-duplicates when their starts and
+        durations differ by no more than the start and duration tolerances,
+        in seconds, and, when both have a distance, their distances differ by
+        no more than the distance tolerance, in miles.  The defaults are 120
+        seconds, 120 seconds and 0.1 miles.
+
+        In flag mode, the default, near-duplicates are listed.  In merge mode
+        each near-duplicate is removed and any details missing from the
+        earliest Activity of its group are copied from it.  The mode and
+        tolerances are remembered and also apply to Activities added later.
+
+        Optional Parameters
+        -------------------
+        mode: string = {flag|merge}
+        start: a non-negative integer
+        duration: a non-negative integer
+        distance: a non-negative number
+        """
+
+        settings = dict(self.__duplicate_settings)
+
+        if mode is not None:
+            if not isinstance(mode, str):
+                raise TypeError("mode must be a string")
+            if mode not in ("flag", "merge"):
+                raise ValueError("invalid mode")
+            settings["mode"] = mode
+
+        for name, value in (("start", start), ("duration", duration)):
+            if value is not None:
+                if not isinstance(value, int):
+                    raise TypeError(f"{name} must be an integer")
+                if value < 0:
+                    raise ValueError(f"{name} must not be negative")
+                settings[name] = value
+
+        if distance is not None:
+            try:
+                distance = Decimal(str(distance))
+            except ArithmeticError:
+                raise ValueError("invalid distance")
+            if not distance.is_finite() or distance < 0:
+                raise ValueError("distance must not be negative")
+            settings["distance"] = distance
+
+        with self.__writer:
+            changed = settings != self.__duplicate_settings
+            pairs = self.__apply_duplicate_settings(settings)
+            if changed or (pairs and settings["mode"] == "merge"):
+                self.__log("dedupe", settings)
+                self.__commit()
+
+        if settings["mode"] == "merge":
+            for kept, duplicate in pairs:
+                print(f"Merged {duplicate} into {kept}")
+            print(f"{len(pairs)} duplicate activities merged")
+        else:
+            for kept, duplicate in pairs:
+                print(f"Possible duplicate {duplicate} of {kept}")
+            print(f"{len(pairs)} possible duplicate activities")
+
+    def query(
+        self,
+        exercise: str = None,
+        start=None,
+        end=None,
+        where: dict = None,
+        order: str = None,
+        limit: int = None,
+    ):
+        """Return an iterator over an Athlete's activities.
+
+        If exercise is specified the activities are limited to that
+        exercise.  The start and end parameters, dates or strings in the
+        form YYYY-MM-DD, limit them to activities that started on or between
+        those dates.  The where parameter, a dictionary of attribute names
+        and values, limits them to activities with those values.  With order
+        ascending or descending the activities come in start order or
+        reverse start order, otherwise exercise by exercise, each in start
+        order.  The limit parameter is the most activities to return.
+
+        The iterator is lazy.  Partitions are loaded, and frozen activities
+        created, only as the iteration reaches them, so a limited query
+        only reads what it returns.  Queries on filter attributes, see
+        Activity.filter_attributes, walk the attribute indexes, other
+        queries compare the categorical attributes of frozen activities
+        by their codes before creating them.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: date or string in the form YYYY-MM-DD
+        end: date or string in the form YYYY-MM-DD
+        where: dictionary
+        order: string = {ascending|descending}
+        limit: non-negative integer
+        """
+
+        if exercise is None:
+            activity_subclasses = Activity.subclasses()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            activity_subclasses = (Activity.activity_dictionary()[exercise],)
+
+        dates = {}
+        for name, value in (("start", start), ("end", end)):
+            if isinstance(value, str):
+                if not is_date(value):
+                    raise ValueError(f"invalid {name}")
+                value = parse_date(value)
+            elif isinstance(value, datetime):
+                value = value.date()
+            elif value is not None and not isinstance(value, date):
+                raise TypeError(f"{name} must be a date or a string")
+            dates[name] = value
+
+        if where is not None and not isinstance(where, dict):
+            raise TypeError("where must be a dictionary")
+
+        if order not in (None, "ascending", "descending"):
+            raise ValueError("invalid order")
+
+        if limit is not None:
+            if not isinstance(limit, int):
+                raise TypeError("limit must be an integer")
+            if limit < 0:
+                raise ValueError("invalid limit")
+
+        activities = self.__query(
+            activity_subclasses, dates["start"], dates["end"], where, order
+        )
+        if limit is not None:
+            activities = islice(activities, limit)
+        return activities
+
+    def __query(self, activity_subclasses, start, end, where, order):
+        """Return an iterator over the activities of the Activity subclasses
+        for query."""
+
+        descending = order == "descending"
+
+        # Queries on filter attributes are answered from the attribute
+        # indexes.
+
+        indexed = where and all(
+            name in Activity.filter_attributes and value is not None
+            for name, value in where.items()
+        )
+
+        streams = [
+            (self.__query_index if indexed else self.__query_partitions)(
+                activity_subclass, start, end, where, descending
+            )
+            for activity_subclass in activity_subclasses
+        ]
+
+        if order is None or len(streams) == 1:
+            return chain.from_iterable(streams)
+        return merge(*streams, key=lambda activity: activity.start, reverse=descending)
+
+    def get_activities(
+        self, activity_subclass=None, start=None, end=None, where=None
+    ) -> list:
+        """Return a list containing an Athlete's activities.  The activities_subclass
+        parameter is used to limit the results to the specified subclass.
+        The start and end parameters, date objects, limit the results to
+        activities that started on or between those dates, and only the
+        partitions for those years are loaded.  The where parameter, a
+        dictionary of attribute names and values, limits the results to
+        activities with those values.  See query for an iterator.
+        """
+
+        if activity_subclass and activity_subclass not in Activity.subclasses():
+            raise ValueError("invalid activity subclass")
+
+        if activity_subclass:
+            activity_subclasses = (activity_subclass,)
+        else:
+            activity_subclasses = Activity.subclasses()
+
+        return list(self.__query(activity_subclasses, start, end, where, None))
+
+    def partitioned_activities(self, activity_subclass, start: date, end: date):
+        """Return the aggregates of the activity_subclass partitions for the
+        years that lie entirely between the start and end dates, and a list
+        of the activities of the years that overlap them only partly.
+
+        Only the partitions of the partly overlapping years are loaded.  In
+        those years the aggregates of frozen blocks for months that lie
+        entirely between the dates are returned instead of their activities.
+        The other activities returned still have to be checked against the
+        dates.
+        """
+
+        aggregates = []
+        partial_years = set()
+
+        for (key_subclass, year), aggregate in self.__snapshot.aggregates.items():
+            if key_subclass is not activity_subclass:
+                continue
+            if year < start.year or year > end.year:
+                continue
+            if date(year, 1, 1) >= start and date(year, 12, 31) <= end:
+                aggregates.append(dict(aggregate))
+            else:
+                partial_years.add(year)
+
+        if not partial_years:
+            return aggregates, []
+
+        self.__load_partitions(
+            (activity_subclass,), min(partial_years), max(partial_years)
+        )
+
+        snapshot = self.__snapshot
+
+        activities = [
+            activity
+            for activity in snapshot.recent_activities(activity_subclass)
+            if activity.start.year in partial_years
+        ]
+
+        for block in snapshot.blocks(activity_subclass):
+            if block.year not in partial_years:
+                continue
+            if block.first_day() >= start and block.last_day() <= end:
+                aggregates.append(dict(block.aggregate))
+            elif block.first_day() <= end and block.last_day() >= start:
+                activities.extend(block.activities(self.__strings))
+
+        return aggregates, activities
+
+    def daily_totals(
+        self,
+        activity_subclasses: tuple,
+        metric: str,
+        start: date = None,
+        end: date = None,
+        garmin_activity_types: tuple = None,
+    ) -> dict:
+        """Return a dictionary mapping each day between the start and end
+        dates with activities of any of the activity_subclasses to the total
+        of the metric, one of count, distance or duration, for that day's
+        activities.  Either date may be None, for no limit.
+
+        If garmin_activity_types is specified, only activities with one of
+        those Garmin activity types are counted.
+
+        Only the partitions of the years between the dates are loaded, and
+        the values of frozen activities are read from the columns of their
+        blocks, so no Activity objects are created for them.
+        """
+
+        first = date.min if start is None else start
+        last = date.max if end is None else end
+
+        years = [
+            year
+            for key_subclass, year in self.__snapshot.aggregates
+            if key_subclass in activity_subclasses and first.year <= year <= last.year
+        ]
+        if not years:
+            return {}
+
+        self.__load_partitions(activity_subclasses, min(years), max(years))
+
+        snapshot = self.__snapshot
+        zero = empty_aggregate(activity_subclasses[0])[metric]
+        totals = {}
+
+        def add(activity_start, value, garmin_activity_type):
+            day = activity_start.date()
+            if not first <= day <= last:
+                return
+            if garmin_activity_types is not None:
+                if garmin_activity_type not in garmin_activity_types:
+                    return
+            totals[day] = totals.get(day, zero) + (value or zero)
+
+        # The activities of all the subclasses are added up in one pass.
+
+        for activity_subclass in activity_subclasses:
+            for activity in snapshot.recent_activities(activity_subclass):
+                if metric == "count":
+                    value = 1
+                else:
+                    value = getattr(activity, metric)
+                add(activity.start, value, activity.garmin_activity_type)
+
+            for block in snapshot.blocks(activity_subclass):
+                if block.first_day() > last or block.last_day() < first:
+                    continue
+                starts = block.values("start", self.__strings)
+                missing = [None] * len(starts)
+                if metric == "count":
+                    values = [1] * len(starts)
+                else:
+                    values = block.values(metric, self.__strings) or missing
+                garmin_types = missing
+                if garmin_activity_types is not None:
+                    garmin_types = (
+                        block.values("garmin_activity_type", self.__strings) or missing
+                    )
+                for activity_start, value, garmin_activity_type in zip(
+                    starts, values, garmin_types
+                ):
+                    add(activity_start, value, garmin_activity_type)
+
+        return totals
+
+    def activity_count(self, activity_subclass=None) -> int:
+        """Return the number of activities, loaded or not, optionally limited
+        to the specified Activity subclass."""
+
+        return sum(
+            aggregate["count"]
+            for (key_subclass, _), aggregate in self.__snapshot.aggregates.items()
+            if activity_subclass is None or key_subclass is activity_subclass
+        )
+
+    @staticmethod
+    def __goal_subclasses(exercise: str) -> tuple:
+        """Return the Activity subclasses named by a Goal's exercise, one
+        name or comma separated names, in subclass order."""
+
+        if not isinstance(exercise, str):
+            raise TypeError("exercise must be a string")
+
+        names = [name.strip() for name in exercise.split(",")]
+        for name in names:
+            if name not in Activity.subclass_names():
+                raise ValueError("invalid exercise")
+
+        return tuple(
+            activity_subclass
+            for activity_subclass in Activity.subclasses()
+            if activity_subclass.__name__ in names
+        )
+
+    @staticmethod
+    def __goal_garmin_types(garmin_activity_type) -> tuple:
+        """Return the sorted Garmin activity types named by a Goal's
+        garmin_activity_type, one type or comma separated types, or None if
+        it is None."""
+
+        if garmin_activity_type is None:
+            return None
+
+        if not isinstance(garmin_activity_type, str):
+            raise TypeError("garmin_activity_type must be a string")
+
+        garmin_types = {name.strip() for name in garmin_activity_type.split(",")}
+        garmin_types.discard("")
+        if not garmin_types:
+            raise ValueError("invalid garmin_activity_type")
+
+        return tuple(sorted(garmin_types))
+
+    def add_goal(
+        self,
+        exercise: str,
+        metric: str,
+        timeframe: str,
+        target: int,
+        days=None,
+        garmin_activity_type: str = None,
+    ) -> None:
+        """Add a Goal.
+
+        A Goal replaces existing Goals for the same activity class and metric.
+        The distance metric is only valid for Cycle, Run and Walk activities.
+        A rolling Goal applies its target to the trailing days ending on each
+        day, and days is required for rolling Goals only.
+
+        A composite Goal counts the activities of several exercises, named
+        with commas between them, or only the activities with one of the
+        Garmin activity types in garmin_activity_type, also separated by
+        commas, or both.  It replaces existing Goals for the same exercises,
+        Garmin activity types, metric and timeframe.
+
+        Parameters
+        ----------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}, or several
+            separated by commas
+        metric: string = {count|distance|duration}
+        timeframe: string = {month|year|cumulative|rolling}
+        target: a positive integer
+
+        Optional Parameters
+        -------------------
+        days: a positive integer
+        garmin_activity_type: string, or several separated by commas
+        """
+
+        from goal.goal import Goal, YearGoal, CumulativeGoal, MonthGoal
+        from goal.goal import RollingGoal
+
+        activity_subclasses = Athlete.__goal_subclasses(exercise)
+        garmin_types = Athlete.__goal_garmin_types(garmin_activity_type)
+
+        if not isinstance(timeframe, str):
+            raise TypeError("timeframe must be a string")
+
+        if timeframe not in Goal.GOAL_TIMEFRAMES:
+            raise ValueError("invalid timeframe")
+
+        if not isinstance(metric, str):
+            raise TypeError("metric must be a string")
+
+        if metric not in Goal.GOAL_METRICS:
+            raise ValueError("invalid metric")
+
+        if timeframe == "rolling" and days is None:
+            raise ValueError("days must be specified for rolling goals")
+
+        if timeframe != "rolling" and days is not None:
+            raise ValueError("days only apply to rolling goals")
+
+        if len(activity_subclasses) == 1:
+            target_class = activity_subclasses[0]
+        else:
+            target_class = activity_subclasses
+
+        if timeframe == "month":
+            goal = MonthGoal(target_class, metric, int(target), garmin_types)
+        elif timeframe == "year":
+            goal = YearGoal(target_class, metric, int(target), garmin_types)
+        elif timeframe == "rolling":
+            goal = RollingGoal(
+                target_class, metric, int(target), int(days), garmin_types
+            )
+        else:
+            goal = CumulativeGoal(target_class, metric, int(target), garmin_types)
+
+        # Composite goals are kept apart from the class specific goal
+        # dictionaries, keyed by (subclasses, Garmin activity types, metric,
+        # timeframe) tuples.  The class specific goal dictionary uses
+        # (metric, timeframe) tuples as keys.  New goals supersede prior
+        # goals.
+
+        if goal.composite:
+            key = (activity_subclasses, garmin_types, metric, timeframe)
+            self.__composite_goals[key] = goal
+        else:
+            self.__goals[target_class][(metric, timeframe)] = goal
+
+        # The journal records the optional arguments only when they are set.
+
+        record = ["add_goal", goal.exercise, metric, timeframe, int(target)]
+        record += [None if days is None else int(days), garmin_activity_type]
+        while record[-1] is None:
+            record.pop()
+
+        self.__generation += 1
+        self.__log(*record)
+        self.__commit()
+
+    def get_goals(self, activity_subclass=None) -> list:
+        """Return a list containing an Athlete's goals.  If the optional
+        activity_subclass parameter is specified, the result is limited to
+        goals for that subclass, including composite goals that count it.
+        Composite goals follow the others.
+        """
+
+        if activity_subclass and activity_subclass not in Activity.subclasses():
+            raise ValueError("invalid activity subclass")
+
+        # If the activity_subclass parameter is specified, return a list
+        # of goals for that activity subclass, otherwise return a list
+        # of all goals.
+
+        if activity_subclass:
+            goals = self.__goals[activity_subclass].values()
+            result = [goal for goal in goals]
+            result.extend(
+                goal
+                for goal in self.__composite_goals.values()
+                if activity_subclass in goal.activity_types
+            )
+
+        else:
+            result = [
+                goal for sub_dict in self.__goals.values() for goal in sub_dict.values()
+            ]
+            result.extend(self.__composite_goals.values())
+
+        return result
+
+    def delete_goal(
+        self,
+        exercise: str,
+        metric: str,
+        timeframe: str,
+        garmin_activity_type: str = None,
+    ) -> None:
+        """Delete a Goal.
+
+        Composite goals are deleted with the same exercises and Garmin
+        activity types they were added with.
+
+        Parameters
+        ----------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}, or several
+            separated by commas
+        metric: string = {count|distance|duration}
+        timeframe: string = {month|year|cumulative|rolling}
+
+        Optional Parameters
+        -------------------
+        garmin_activity_type: string, or several separated by commas
+        """
+
+        activity_subclasses = Athlete.__goal_subclasses(exercise)
+        garmin_types = Athlete.__goal_garmin_types(garmin_activity_type)
+
+        # Composite goals are keyed by (subclasses, Garmin activity types,
+        # metric, timeframe) tuples.  The class specific goal dictionary
+        # uses (metric, timeframe) tuples as keys.  Delete the key if it
+        # exists, otherwise return None.
+
+        if len(activity_subclasses) > 1 or garmin_types is not None:
+            key = (activity_subclasses, garmin_types, metric, timeframe)
+            goal = self.__composite_goals.pop(key, None)
+        else:
+            subclass_goals = self.__goals[activity_subclasses[0]]
+            goal = subclass_goals.pop((metric, timeframe), None)
+
+        if goal is not None:
+            record = ["delete_goal", goal.exercise, metric, timeframe]
+            if garmin_activity_type is not None:
+                record.append(garmin_activity_type)
+
+            self.__generation += 1
+            self.__log(*record)
+            self.__commit()
+
+        return None
+
+    def show_goals(self, exercise: str = None) -> None:
+        """Display a list of Goals.
+
+        If exercise is specified, the listing is limited to that exercise and
+        the composite Goals that count it.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
+
+        # If exercise is not specified, list every goal once, including
+        # composite goals, which are also listed for each exercise they
+        # count.
+
+        for goal in self.__select_goals(exercise):
+            print(repr(goal))
+
+        return
+
+    def summarize_goals(self, exercise=None) -> None:
+        """Display a summary of Goals.
+
+        If exercise is specified, the listing is limited to that exercise and
+        the composite Goals that count it.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
+
+        # If exercise is not specified, summarize every goal once,
+        # including composite goals, which are also summarized for each
+        # exercise they count.
+
+        for goal in self.__select_goals(exercise):
+            with span("goal.report"):
+                goal.report(athlete=self)
+
+        return
+
+    def read_garmin_activity_file(self, filename="Activities.csv"):
+        """Read a Garmin activity file and create Activity objects.
+
+        Garmin fitness data is stored at http://connect.garmin.com.
+        Subscribers can download comprehensive activity data into a CSV file.
+        This method reads a Garmin activity file, creates py_athletics
+        Activity objects and adds them to the Athlete's activity collection.
+
+        The  default filename is Activities.csv, a different name can be
+        specified with the filename keyword argument.
+
+        Optional Parameters
+        -------------------
+        filename: string
+        """
+
+        # Rows are parsed and added a chunk at a time, see READ_CHUNK_SIZE, so
+        # the file is never held in memory.  The time spent parsing is the
+        # read span less the read.add span.
+
+        activities = Athlete.parse_garmin_activity_file(filename)
+        chunks = iter(lambda: list(islice(activities, Athlete.READ_CHUNK_SIZE)), [])
+
+        with span("read"), self.batch():
+            for chunk in chunks:
+                with span("read.add"):
+                    for activity in chunk:
+                        self.add_activity(activity)
+
+    @staticmethod
+    def parse_garmin_activity_file(filename="Activities.csv"):
+        """Read a Garmin activity file and return an iterator over Activity
+        objects, created as the file is read, one row at a time.
+
+        The activities are not added to any Athlete, see
+        read_garmin_activity_file.
+
+        Optional Parameters
+        -------------------
+        filename: string
+        """
+
+        # A Garmin activity file is a CSV file with activity information.
+        # The first row is a header row.
+        # We open the file and read it with csv.reader, see below
+        #
+        # We transform the start field into a datetime object
+        # We transform the duration field into a timedelta object, we look at
+        # the first 8 characters only because sometimes Garmin includes
+        # fractional seconds which we will ignore.
+
+        from csv import reader
+        from helpers.garmin_helpers import garmin_to_decimal, garmin_to_int
+        from helpers.garmin_helpers import garmin_to_time, garmin_to_timedelta
+        import unicodedata
+
+        # Garmin includes the registered sign character in some fields.
+        CIRCLE_R = unicodedata.lookup("REGISTERED SIGN")
+        NORMALIZED_POWER_KEY = f"Normalized Power{CIRCLE_R} (NP{CIRCLE_R})"
+        TRAINING_STRESS_KEY = f"Training Stress Score{CIRCLE_R}"
+
+        # Garmin files have over forty columns and only these are used.  Each
+        # row is read as a dictionary of the ones the file has, with None for
+        # missing trailing fields as csv.DictReader would, which is much
+        # faster than a dictionary of every column.
+
+        COLUMNS = (
+            "Activity Type",
+            "Date",
+            "Time",
+            "Title",
+            "Calories",
+            "Max HR",
+            "Avg HR",
+            TRAINING_STRESS_KEY,
+            "Aerobic TE",
+            "Distance",
+            "Max Speed",
+            "Avg Speed",
+            NORMALIZED_POWER_KEY,
+            "Avg Power",
+            "Max Power",
+            "Max Avg Power (20 min)",
+        )
+
+        with open(filename, "rt") as garmin_activities_csv_file:
+            activity_reader = reader(garmin_activities_csv_file)
+            header = next(activity_reader, [])
+            positions = {name: position for position, name in enumerate(header)}
+            names = [name for name in COLUMNS if name in positions]
+            name_positions = [positions[name] for name in names]
+
+            for row in activity_reader:
+                if not row:
+                    continue
+                if len(row) < len(header):
+                    row += [None] * (len(header) - len(row))
+                activity_row = dict(zip(names, map(row.__getitem__, name_positions)))
 
                 # We examine the Activity Type column in the CSV file to
                 # determine the Activity subclass we will use.  We bind
@@ -363,12 +2462,7 @@ class Athlete:
                 start = datetime.fromisoformat(start_string)
 
                 duration_string = activity_row["Time"][0:8]
-                duration_dt = datetime.strptime(duration_string, "%H:%M:%S")
-                duration = timedelta(
-                    hours=duration_dt.hour,
-                    minutes=duration_dt.minute,
-                    seconds=duration_dt.second,
-                )
+                duration = garmin_to_timedelta(duration_string)
 
                 description = activity_row["Title"]
 
@@ -381,6 +2475,16 @@ class Athlete:
                 avg_HR_string = activity_row["Avg HR"]
                 average_heart_rate = garmin_to_int(avg_HR_string)
 
+                # Garmin reports a training stress score of 0.0 and an
+                # aerobic training effect of 0.0 when they were not measured.
+                # Older files may not have the columns at all.
+
+                tss_string = activity_row.get(TRAINING_STRESS_KEY)
+                training_stress_score = garmin_to_decimal(tss_string) or None
+
+                aerobic_te_string = activity_row.get("Aerobic TE")
+                aerobic_training_effect = garmin_to_decimal(aerobic_te_string) or None
+
                 # Distance is only meaningful for Cycling, Running and
                 # Walking, so we will ignore distance data from Garmin
                 # for other Activity subclasses.
@@ -415,15 +2519,21 @@ class Athlete:
                     maximum_speed = garmin_to_time(max_speed_string)
                     average_speed = garmin_to_time(avg_speed_string)
 
-                # Normalized power is only meaningful for Cycling, so we will
-                # ignore normalized power data from Garmin for other Activity
-                # subclasses.
+                # Power is only meaningful for Cycling, so we will ignore
+                # power data from Garmin for other Activity subclasses.
 
                 normalized_power = None
+                average_power = None
+                maximum_power = None
+                maximum_average_power = None
 
                 if "Cycling" in garmin_activity_type:
                     np_string = activity_row[NORMALIZED_POWER_KEY]
                     normalized_power = garmin_to_int(np_string)
+                    average_power = garmin_to_int(activity_row.get("Avg Power"))
+                    maximum_power = garmin_to_int(activity_row.get("Max Power"))
+                    max_avg_string = activity_row.get("Max Avg Power (20 min)")
+                    maximum_average_power = garmin_to_int(max_avg_string)
 
                 activity = instantiator(
                     start=start,
@@ -437,33 +2547,76 @@ class Athlete:
                     maximum_speed=maximum_speed,
                     average_speed=average_speed,
                     normalized_power=normalized_power,
+                    average_power=average_power,
+                    maximum_power=maximum_power,
+                    maximum_average_power=maximum_average_power,
+                    training_stress_score=training_stress_score,
+                    aerobic_training_effect=aerobic_training_effect,
                 )
 
-                self.add_activity(activity)
+                yield activity
 
-    def show_activities(
-        self, exercise: str = None, start: str = None, end: str = None
-    ) -> None:
-        """Display a list of Activities.
+    def list_activities(
+        self, exercise: str = None, start: str = None, end: str = None, **filters
+    ) -> list:
+        """Return a list of Activities.
 
-        If exercise is specified the listing is limited to that exercise.
-        A timeframe for the listing can be established with one or both of the
-        start and end keywords.
+        If exercise is specified the list is limited to that exercise.
+        A timeframe for the list can be established with one or both of the
+        start and end keywords.  The venue, venue_type, type, partner and
+        trainer keywords limit the list to Activities with those values.
+        The list is ordered as by iter_activities.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        """
+
+        return list(self.iter_activities(exercise, start=start, end=end, **filters))
+
+    def iter_activities(
+        self, exercise: str = None, start: str = None, end: str = None, **filters
+    ):
+        """Return an iterator over Activities, exercise by exercise and most
+        recent first, see query.
+
+        If exercise is specified the activities are limited to that
+        exercise.  A timeframe can be established with one or both of the
+        start and end keywords, it ends today by default.  The venue,
+        venue_type, type, partner and trainer keywords limit the activities
+        to those with those values.
 
         Optional Parameters
         -------------------
         exercise: string = {Cycle|Run|Tennis|Walk|Workout}
         start: string in the form YYYY-MM-DD
         end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
         """
 
+        filters = Activity.check_filters(filters)
+
         # If exercise is not specified, make recursive calls
         # over every Activity subclass.
 
         if exercise is None:
-            for name in Activity.subclass_names():
-                self.show_activities(exercise=name, start=start, end=end)
-            return
+            return chain.from_iterable(
+                [
+                    self.iter_activities(name, start=start, end=end, **filters)
+                    for name in Activity.subclass_names()
+                ]
+            )
 
         # The class was specified, so handle it.
 
@@ -495,34 +2648,718 @@ class Athlete:
             else:
                 raise ValueError("invalid end")
 
-        target_class = Activity.activity_dictionary()[exercise]
+        # Activities are listed most recent first.  Only the partitions for
+        # the years listed are loaded, as they are reached.
 
-        for activity in self.get_activities(target_class):
-            if start_date <= activity.start.date() <= end_date:
-                print(repr(activity))
+        return self.query(
+            exercise, start=start_date, end=end_date, where=filters, order="descending"
+        )
 
-    def summarize_activities(self, exercise=None, start=None, end=None) -> None:
-        """Display a summary of Activities.
+    def show_activities(
+        self, exercise: str = None, start: str = None, end: str = None, **filters
+    ) -> None:
+        """Display a list of Activities.
 
         If exercise is specified the listing is limited to that exercise.
         A timeframe for the listing can be established with one or both of the
-        start and end keywords.
+        start and end keywords.  The venue, venue_type, type, partner and
+        trainer keywords limit the listing to Activities with those values.
 
         Optional Parameters
         -------------------
         exercise: string = {Cycle|Run|Tennis|Walk|Workout}
         start: string in the form YYYY-MM-DD
         end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
         """
 
-        # If exercise is not specified, make recursive calls
-        # over every Activity subclass.
+        activities = self.iter_activities(
+            exercise=exercise, start=start, end=end, **filters
+        )
+        for activity in activities:
+            print(repr(activity))
+
+    def search_activities(
+        self, query: str, exercise: str = None, start: str = None, end: str = None
+    ) -> list:
+        """Return a list of the Activities whose descriptions match a query,
+        in time order.
+
+        The query is a string of words, all of which must appear in a
+        matching description.  Case is ignored and a word ending with * is a
+        prefix, matching any word that begins with it.  If exercise is
+        specified the list is limited to that exercise.  A timeframe for the
+        list can be established with one or both of the start and end
+        keywords.
+
+        Parameters
+        ----------
+        query: string
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        """
+
+        if not isinstance(query, str):
+            raise TypeError("query must be a string")
+
+        words = set()
+        prefixes = set()
+        for term in query.split():
+            if term.endswith("*"):
+                prefixes.update(TextIndex.words(term[:-1]))
+            else:
+                words.update(TextIndex.words(term))
+
+        if not words and not prefixes:
+            raise ValueError("query must include a word")
+
+        if exercise is None:
+            names = Activity.subclass_names()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            names = (exercise,)
+
+        start_date = None
+        end_date = None
+
+        for name, value in (("start", start), ("end", end)):
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                raise TypeError(f"{name} must be a string")
+            if not is_date(value):
+                raise ValueError(f"invalid {name}")
+            if name == "start":
+                start_date = parse_date(value)
+            else:
+                end_date = parse_date(value)
+
+        # The index finds the matching starts, then only the partitions and
+        # blocks holding those activities are read.
+
+        activities = []
+        activity_dictionary = Activity.activity_dictionary()
+
+        with self.__writer:
+            matches = self.__get_text_index().search(
+                sorted(words), sorted(prefixes), names, start_date, end_date
+            )
+
+            for activity_start, name in matches:
+                activity_subclass = activity_dictionary[name]
+                if len(self.__loaded) < len(self.__partition_files):
+                    self.__load_partitions(
+                        (activity_subclass,), activity_start.year, activity_start.year
+                    )
+
+                # A start the index holds but no activity or block has, as
+                # in an index saved before a partition was replaced, is
+                # skipped.
+
+                activity = self.__activities[activity_subclass].get(activity_start)
+                if activity is None:
+                    month = (activity_start.year, activity_start.month)
+                    block = self.__blocks.get((activity_subclass, *month))
+                    if block is not None:
+                        activity = block.activity(activity_start, self.__strings)
+                if activity is not None:
+                    activities.append(activity)
+
+        return activities
+
+    def search(
+        self, query: str, exercise: str = None, start: str = None, end: str = None
+    ) -> None:
+        """Display the Activities whose descriptions match a query, in time
+        order, see search_activities.
+
+        Parameters
+        ----------
+        query: string
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        """
+
+        activities = self.search_activities(
+            query, exercise=exercise, start=start, end=end
+        )
+        for activity in activities:
+            print(repr(activity))
+
+    def training_load(self, start: str = None, end: str = None) -> list:
+        """Return the Athlete's daily training load as a list of dictionaries,
+        one for each day from start to end, with the date, the day's
+        training stress, the acute and chronic training loads, ATL and CTL,
+        at the end of the day and the training stress balance, TSB, for the
+        day.  The training stress is the sum of the training stress scores
+        of the day's activities, see TrainingLoad.
+
+        The timeframe defaults to the week ending today.
+
+        Optional Parameters
+        -------------------
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        """
+
+        if end and not isinstance(end, str):
+            raise TypeError("end must be a string")
+
+        if end is None:
+            end_date = date.today()
+        else:
+            if is_date(end):
+                end_date = parse_date(end)
+            else:
+                raise ValueError("invalid end")
+
+        if start and not isinstance(start, str):
+            raise TypeError("start must be a string")
+
+        if start is None:
+            start_date = end_date - timedelta(days=6)
+        else:
+            if is_date(start):
+                start_date = parse_date(start)
+            else:
+                raise ValueError("invalid start")
+
+        if start_date > end_date:
+            raise ValueError("invalid timeframe")
+
+        with self.__writer:
+            series = self.__get_training_load().series(start_date, end_date)
+
+        return [
+            {"date": day, "stress": stress, "atl": atl, "ctl": ctl, "tsb": tsb}
+            for day, stress, atl, ctl, tsb in series
+        ]
+
+    def show_training_load(self, start: str = None, end: str = None) -> None:
+        """Display the Athlete's training load at the end of the timeframe,
+        its change over the timeframe and the daily values, see
+        training_load.
+
+        Optional Parameters
+        -------------------
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        """
+
+        series = self.training_load(start=start, end=end)
+        first = series[0]
+        last = series[-1]
+
+        print(
+            f"Training load on {last['date']}: ATL {last['atl']:.1f} "
+            f"CTL {last['ctl']:.1f} TSB {last['tsb']:.1f}"
+        )
+        print(
+            f"Change since {first['date']}: "
+            f"ATL {last['atl'] - first['atl']:+.1f} "
+            f"CTL {last['ctl'] - first['ctl']:+.1f} "
+            f"TSB {last['tsb'] - first['tsb']:+.1f}"
+        )
+        for day in series:
+            print(
+                f"{day['date']}: TSS {day['stress']:6.1f} ATL {day['atl']:6.1f} "
+                f"CTL {day['ctl']:6.1f} TSB {day['tsb']:6.1f}"
+            )
+
+    def streaks(self, exercise: str = None) -> dict:
+        """Return a dictionary of streaks and gaps keyed by exercise name.
+
+        For each exercise the value is a dictionary with daily and weekly
+        entries, each a dictionary of the last day or week with activities,
+        the current streak and gap, the longest streak with the day or week
+        it ended and the longest gap with the day or week it started, see
+        StreakCounter.  Streaks count consecutive days or ISO weeks with
+        activities, gaps count days or weeks without.  A streak is current
+        if it includes today or yesterday, this week or last week.  Weeks
+        are given by their Mondays.  If exercise is specified the result is
+        limited to that exercise.  Exercises without activities are omitted.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
+
+        if exercise is None:
+            exercises = Activity.subclass_names()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            exercises = (exercise,)
+
+        today = date.today().toordinal()
+        activity_dictionary = Activity.activity_dictionary()
+
+        result = {}
+        with self.__writer:
+            streak_counters = self.__get_streak_counters()
+            for name in exercises:
+                counters = streak_counters.get(activity_dictionary[name])
+                if counters is None or not len(counters[0]):
+                    continue
+
+                daily = counters[0].summary(today)
+                weekly = counters[1].summary((today - 1) // 7)
+                for key in ("last", "longest_streak_end", "longest_gap_start"):
+                    if daily[key] is not None:
+                        daily[key] = date.fromordinal(daily[key])
+                    if weekly[key] is not None:
+                        weekly[key] = date.fromordinal(weekly[key] * 7 + 1)
+
+                result[name] = {"daily": daily, "weekly": weekly}
+
+        return result
+
+    def show_streaks(self, exercise: str = None) -> None:
+        """Display the current and longest daily and weekly streaks and gaps
+        for each exercise, see streaks.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
+
+        for name, periods in self.streaks(exercise=exercise).items():
+            for period, unit in (("daily", "days"), ("weekly", "weeks")):
+                streaks = periods[period]
+                longest_gap = f"{streaks['longest_gap']:3} {unit}"
+                if streaks["longest_gap"]:
+                    longest_gap += f" from {streaks['longest_gap_start']}"
+                print(
+                    f"{name:<7} {period:<6}: "
+                    f"Current Streak: {streaks['current_streak']:3} {unit} "
+                    f"Longest Streak: {streaks['longest_streak']:3} {unit} "
+                    f"to {streaks['longest_streak_end']} "
+                    f"Longest Gap: {longest_gap} "
+                    f"Last: {streaks['last']}"
+                )
+
+    def personal_records(
+        self,
+        exercise: str = None,
+        start: str = None,
+        end: str = None,
+        distance=None,
+    ) -> dict:
+        """Return a dictionary of personal records keyed by exercise name.
+
+        For each exercise the value is a list of dictionaries with the
+        metric, the activity start and the value, for each metric in
+        RECORD_METRICS.  Without a timeframe the list holds the best
+        RECORD_COUNT activities for each metric, best first.  With one or
+        both of the start and end keywords it holds the activities in the
+        timeframe that set a record, beating every earlier activity, in time
+        order.  With the distance keyword, in miles, the records are those
+        of the activities in the same distance band, see RECORD_BANDS.  If
+        exercise is specified the result is limited to that exercise.
+        Exercises without records, or with distance but without distance
+        bands, are omitted.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        distance: a non-negative number, or a string holding one
+        """
+
+        if exercise is None:
+            exercises = Activity.subclass_names()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            exercises = (exercise,)
+
+        start_date = None
+        end_date = None
+
+        for name, value in (("start", start), ("end", end)):
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                raise TypeError(f"{name} must be a string")
+            if not is_date(value):
+                raise ValueError(f"invalid {name}")
+            if name == "start":
+                start_date = parse_date(value)
+            else:
+                end_date = parse_date(value)
+
+        if distance is not None:
+            if isinstance(distance, bool) or not isinstance(
+                distance, (str, int, float, Decimal)
+            ):
+                raise TypeError("distance must be a number or a string")
+            try:
+                distance = Decimal(str(distance))
+            except ArithmeticError:
+                raise ValueError("invalid distance")
+            if not distance.is_finite() or distance < 0:
+                raise ValueError("invalid distance")
+
+        timeframe = start is not None or end is not None
+        activity_dictionary = Activity.activity_dictionary()
+
+        result = {}
+        with self.__writer:
+            for name in exercises:
+                record_table = self.__get_record_table(activity_dictionary[name])
+
+                band = None
+                if distance is not None:
+                    if not record_table.bands:
+                        if exercise is None:
+                            continue
+                        raise ValueError(f"{name} has no distance bands")
+                    band = record_table.band(distance)
+
+                records = []
+                for metric in record_table.metrics:
+                    if timeframe:
+                        entries = record_table.progression(
+                            metric, band, start_date, end_date
+                        )
+                    else:
+                        entries = record_table.top(metric, band)
+                    records.extend(
+                        {"metric": metric, "start": activity_start, "value": value}
+                        for activity_start, value in entries
+                    )
+
+                if records:
+                    result[name] = records
+
+        return result
+
+    def show_records(
+        self,
+        exercise: str = None,
+        start: str = None,
+        end: str = None,
+        distance=None,
+    ) -> None:
+        """Display personal records, see personal_records.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        distance: a non-negative number, or a string holding one
+        """
+
+        records = self.personal_records(
+            exercise=exercise, start=start, end=end, distance=distance
+        )
+        for name, entries in records.items():
+            for entry in entries:
+                metric = entry["metric"].replace("_", " ").title()
+                value = entry["value"]
+                if isinstance(value, time):
+                    value = value.strftime("%M:%S")
+                start_str = entry["start"].strftime("%Y-%m-%d at %H:%M")
+                print(f"{name:<7} {metric:<21}: {value!s:>8} on {start_str}")
+
+    def activity_summary(self, exercise=None, start=None, end=None, **filters) -> dict:
+        """Return a dictionary of Activity tallies keyed by exercise name.
+
+        If exercise is specified the result is limited to that exercise.
+        Exercises without activities in the timeframe are omitted.  The
+        venue, venue_type, type, partner and trainer keywords limit the
+        tallies to Activities with those values.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        """
 
         if exercise is None:
-            for name in Activity.subclass_names():
-                self.summarize_activities(exercise=name, start=start, end=end)
+            exercises = Activity.subclass_names()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            exercises = (exercise,)
+
+        summary = {}
+        for name in exercises:
+            tally = Activity.tally(self, name, start=start, end=end, **filters)
+            if tally["count"]:
+                summary[name] = tally
+
+        return summary
+
+    def activity_table(
+        self, group_by: str, exercise=None, start=None, end=None, **filters
+    ) -> list:
+        """Return a table of Activity tallies grouped by exercise and by
+        group_by, as a list of dictionaries, one for each exercise and group
+        with Activities in the timeframe.  Each row has the exercise name,
+        the group under the group_by key and the tally of the group.
+
+        Every Activity is looked at once.  When grouping by year or month,
+        years and months that lie entirely in the timeframe are tallied from
+        partition and block aggregates instead.  The venue, venue_type, type,
+        partner and trainer keywords limit the tallies to Activities with
+        those values.
+
+        Parameters
+        ----------
+        group_by: string = {year|month|iso_week|weekday|hour|type|garmin_activity_type}
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        """
+
+        import calendar
+
+        if not isinstance(group_by, str):
+            raise TypeError("group_by must be a string")
+
+        if group_by not in Athlete.GROUP_BY:
+            raise ValueError("invalid group_by")
+
+        filters = Activity.check_filters(filters)
+
+        if exercise is None:
+            exercises = Activity.subclass_names()
+        else:
+            if not isinstance(exercise, str):
+                raise TypeError("class name must be a string")
+
+            if exercise not in Activity.subclass_names():
+                raise ValueError("invalid class name")
+
+            exercises = (exercise,)
+
+        start_date = parse_date("1970-01-01" if start is None else start)
+        end_date = date.today() if end is None else parse_date(end)
+
+        table = []
+        for name in exercises:
+            activity_subclass = Activity.activity_dictionary()[name]
+            groups = defaultdict(lambda: empty_aggregate(activity_subclass))
+
+            with span("tally"):
+                self.__tally_groups(
+                    groups, activity_subclass, group_by, start_date, end_date, filters
+                )
+
+            # Groups are listed in order, weekdays from Monday and groups
+            # without a value last.
+
+            def order(group):
+                return (group is None, "" if group is None else group)
+
+            for group in sorted(groups, key=order):
+                label = group
+                if group_by == "weekday":
+                    label = calendar.day_name[group]
+                table.append({"exercise": name, group_by: label, **groups[group]})
+
+        return table
+
+    def __tally_groups(
+        self,
+        groups: dict,
+        activity_subclass,
+        group_by: str,
+        start: date,
+        end: date,
+        filters: dict,
+    ) -> None:
+        """Add the activity_subclass Activities in the timeframe to the
+        aggregates in groups, a defaultdict keyed by group."""
+
+        def add(group, aggregate):
+            for key, value in aggregate.items():
+                groups[group][key] += value
+
+        if filters:
+            activities = self.__query((activity_subclass,), start, end, filters, None)
+            for activity in activities:
+                group = Athlete.__group(activity.start, group_by, activity)
+                accumulate(groups[group], activity)
             return
-        # The class was specified, so handle it.
+
+        # Whole years are tallied from the partition aggregates when grouping
+        # by year, whole months from the block aggregates when grouping by
+        # year or month.  Only the partitions of other years are loaded.
+
+        covered = set()
+        aggregates = self.__snapshot.aggregates
+        if group_by == "year":
+            for (key_subclass, year), aggregate in aggregates.items():
+                if key_subclass is not activity_subclass:
+                    continue
+                if date(year, 1, 1) >= start and date(year, 12, 31) <= end:
+                    covered.add(year)
+                    add(f"{year}", aggregate)
+
+        years = [
+            year
+            for (key_subclass, year) in aggregates
+            if key_subclass is activity_subclass
+            and start.year <= year <= end.year
+            and year not in covered
+        ]
+        if years:
+            self.__load_partitions((activity_subclass,), min(years), max(years))
+
+        snapshot = self.__snapshot
+        blocks = []
+
+        for block in snapshot.blocks(activity_subclass):
+            if block.year in covered:
+                continue
+            if block.first_day() > end or block.last_day() < start:
+                continue
+            if group_by in ("year", "month") and (
+                block.first_day() >= start and block.last_day() <= end
+            ):
+                if group_by == "year":
+                    add(f"{block.year}", block.aggregate)
+                else:
+                    add(f"{block.year}-{block.month:02}", block.aggregate)
+                continue
+            blocks.append(block)
+
+        # A single pass over the other activities.  Only the columns needed
+        # are read from blocks, no activities are created.
+
+        for activity in snapshot.recent_activities(activity_subclass):
+            if activity.start.year in covered:
+                continue
+            if start <= activity.start.date() <= end:
+                group = Athlete.__group(activity.start, group_by, activity)
+                accumulate(groups[group], activity)
+
+        for block in blocks:
+            columns = [
+                block.values(name, self.__strings) or [None] * len(block)
+                for name in ("start", "duration", "calories", "distance", group_by)
+            ]
+            for activity_start, duration, calories, distance, value in zip(*columns):
+                if start <= activity_start.date() <= end:
+                    group = Athlete.__group(activity_start, group_by, value=value)
+                    accumulate_values(groups[group], duration, calories, distance)
+
+    @staticmethod
+    def __group(start: datetime, group_by: str, activity=None, value=None):
+        """Return the group of an Activity with the specified start when
+        grouping by group_by.  Groups by attribute take the value from the
+        Activity, if given, or the value argument."""
+
+        if group_by == "year":
+            return f"{start.year}"
+        if group_by == "month":
+            return f"{start.year}-{start.month:02}"
+        if group_by == "iso_week":
+            year, week, _ = start.isocalendar()
+            return f"{year}-W{week:02}"
+        if group_by == "weekday":
+            return start.weekday()
+        if group_by == "hour":
+            return f"{start.hour:02}"
+        if activity is not None:
+            return getattr(activity, group_by, None)
+        return value
+
+    def summarize_activities(
+        self, exercise=None, start=None, end=None, group_by=None, **filters
+    ) -> None:
+        """Display a summary of Activities.
+
+        If exercise is specified the listing is limited to that exercise.
+        A timeframe for the listing can be established with one or both of the
+        start and end keywords.  The venue, venue_type, type, partner and
+        trainer keywords limit the summary to Activities with those values.
+        With group_by, each exercise is summarized for each year, month, ISO
+        week, weekday, hour, type or Garmin activity type, see activity_table.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        group_by: string = {year|month|iso_week|weekday|hour|type|garmin_activity_type}
+        """
+
+        if group_by is not None:
+            table = self.activity_table(
+                group_by, exercise=exercise, start=start, end=end, **filters
+            )
+            for line in format_activity_table(table, group_by):
+                print(line)
+            return
+
+        summary = self.activity_summary(
+            exercise=exercise, start=start, end=end, **filters
+        )
+
+        for name, tally in summary.items():
+            print(format_activity_summary(name, tally))
+
+        return
+
+    def __select_goals(self, exercise) -> list:
+        """Return the Goals for an exercise, or every Goal if exercise is
+        None."""
+
+        if exercise is None:
+            return self.get_goals()
 
         if not isinstance(exercise, str):
             raise TypeError("class name must be a string")
@@ -530,33 +3367,170 @@ class Athlete:
         if exercise not in Activity.subclass_names():
             raise ValueError("invalid class name")
 
-        tally = Activity.tally(self, exercise, start=start, end=end)
+        return self.get_goals(Activity.activity_dictionary()[exercise])
 
-        # If there were no activities, return.
-        if tally["count"] == 0:
-            return
+    def goal_summary(self, exercise=None) -> list:
+        """Return a list of Goal progress dictionaries.
 
-        hr, min, sec = td_cvt(tally["duration"])
-        f_1 = f"{exercise:7} Summary: "
-        f_2 = f"Activity Count: {tally['count']:2,} "
-        f_3 = f"Exercise Time (h:m:s): {hr:3}:{min:02}:{sec:02} "
-        f_4 = f"Calories Burned: {tally['calories']:6,}"
+        If exercise is specified, the result is limited to that exercise.
 
-        if exercise in ("Cycle", "Run", "Walk"):
-            f_5 = f" Distance (miles): {tally['distance']:>8,}"
-        else:
-            f_5 = ""
-        print(f_1 + f_2 + f_3 + f_4 + f_5)
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
 
-        return
+        goals = self.__select_goals(exercise)
+        return [goal.progress(athlete=self) for goal in goals]
 
-    def earliest_activity(self, exercise: str) -> Union[datetime, None]:
-        """Return a datetime object for the earliest exercise instance."""
+    def goal_status(self, exercise=None, recompute: bool = False) -> list:
+        """Return a list of Goal status dictionaries with the current value
+        of each Goal for its current period.
 
-        target_class = Activity.activity_dictionary()[exercise]
-        activity_list = self.get_activities(target_class)
-        date_list = [activity.start for activity in activity_list]
-        if date_list:
-            return min(date_list)
-        else:
-            return None
+        Every Goal keeps a live counter for its current period that is
+        updated as activities are added and removed, so a status check
+        does not revisit the activities unless a period has rolled over.
+        If recompute is True, every counter is tallied afresh from the
+        activities instead.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        recompute: bool = False
+        """
+
+        goals = self.__select_goals(exercise)
+        return [goal.status(self, recompute) for goal in goals]
+
+    def verify_goals(self, exercise=None) -> list:
+        """Check the live counter of each Goal against a full tally of the
+        activities for its current period and return the status
+        dictionaries of the Goals whose counter disagreed, with their
+        counters corrected.  The list is empty when every counter is
+        correct.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        """
+
+        mismatched = []
+        for goal in self.__select_goals(exercise):
+            live = goal.current(self)
+            status = goal.status(self, recompute=True)
+            if status["current"] != live:
+                status["live"] = live
+                mismatched.append(status)
+
+        return mismatched
+
+    def memory_structures(self) -> dict:
+        """Return a dictionary of the Athlete's index and cache structures
+        keyed by a descriptive name, for memory accounting."""
+
+        return {
+            "activity index": self.__activities,
+            "activity lists": self.__activity_lists,
+            "duplicate index": self.__duplicate_index,
+            "string table": self.__strings,
+            "text index": self.__text_index,
+            "training load": self.__training_load,
+            "streak counters": self.__streak_counters,
+            "record tables": self.__record_tables,
+            "goals": self.__goals,
+            "composite goals": self.__composite_goals,
+            "partition aggregates": self.__aggregates,
+        }
+
+    def memory_report(self, sample_size: int = 1000) -> dict:
+        """Return a dictionary describing the Athlete's memory use.
+
+        For every Activity subclass the report includes the number of loaded
+        activities, the estimated bytes of its activity objects, measured over
+        a sample of at most sample_size objects and extrapolated, plus the
+        bytes of its frozen blocks, and the average bytes per activity.
+        Every structure from memory_structures is measured without the
+        activities it refers to.
+        Goal counts are reported per subclass.
+        Sizes are estimates from sys.getsizeof and objects shared between
+        activities are counted once.
+        """
+
+        report = {"activities": {}, "structures": {}, "goals": {}}
+        total = 0
+        snapshot = self.__snapshot
+
+        for activity_subclass in Activity.subclasses():
+            activities = list(snapshot.recent_activities(activity_subclass))
+            sample = activities[:sample_size]
+            seen = set()
+            sample_bytes = sum(deep_getsizeof(activity, seen) for activity in sample)
+            per_object = sample_bytes / len(sample) if sample else 0
+            class_bytes = int(per_object * len(activities))
+
+            # Frozen activities are charged the bytes of their blocks.
+
+            seen = set()
+            for block in snapshot.blocks(activity_subclass):
+                class_bytes += deep_getsizeof(block, seen)
+
+            count = snapshot.count(activity_subclass)
+            report["activities"][activity_subclass.__name__] = {
+                "count": count,
+                "bytes_per_activity": class_bytes // count if count else 0,
+                "bytes": class_bytes,
+            }
+            total += class_bytes
+
+        for name, structure in self.memory_structures().items():
+            structure_bytes = deep_getsizeof(structure, set(), skip=(Activity,))
+            report["structures"][name] = structure_bytes
+            total += structure_bytes
+
+        for activity_subclass in Activity.subclasses():
+            goal_count = len(self.get_goals(activity_subclass))
+            report["goals"][activity_subclass.__name__] = goal_count
+
+        report["total_bytes"] = total
+        return report
+
+    def earliest_activity(self, exercise: str) -> datetime:
+        """Return a datetime object for the earliest exercise instance or None
+        if there are no instances."""
+
+        # Only the partition for the earliest year is loaded, and only the
+        # earliest activity is created.
+
+        for activity in self.query(exercise, order="ascending", limit=1):
+            return activity.start
+        return None
+
+
+def format_activity_summary(exercise: str, tally: dict, caption="Summary") -> str:
+    """Return the summary line for an exercise tally as displayed by
+    Athlete.summarize_activities."""
+
+    hr, min, sec = td_cvt(tally["duration"])
+    f_1 = f"{exercise:7} {caption}: "
+    f_2 = f"Activity Count: {tally['count']:2,} "
+    f_3 = f"Exercise Time (h:m:s): {hr:3}:{min:02}:{sec:02} "
+    f_4 = f"Calories Burned: {tally['calories']:6,}"
+
+    if exercise in ("Cycle", "Run", "Walk"):
+        f_5 = f" Distance (miles): {tally['distance']:>8,}"
+    else:
+        f_5 = ""
+
+    return f_1 + f_2 + f_3 + f_4 + f_5
+
+
+def format_activity_table(table: list, group_by: str) -> list:
+    """Return the summary lines for the rows of a table returned by
+    Athlete.activity_table, as displayed by Athlete.summarize_activities."""
+
+    labels = ["--" if row[group_by] is None else str(row[group_by]) for row in table]
+    width = max((len(label) for label in labels), default=0)
+
+    return [
+        format_activity_summary(row["exercise"], row, f"{label:<{width}}")
+        for row, label in zip(table, labels)
+    ]
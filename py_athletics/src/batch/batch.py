@@ -0,0 +1,245 @@
+"""This is the py_athletics batch module.
+
+The batch module runs py_athletics commands from command line options without
+starting the interactive shell.  Results can be printed in the same text form
+the shell uses or emitted as JSON lines, one JSON object per line, for
+consumption by other programs.  In JSON output durations are expressed in
+seconds, distances as numbers and dates and times in ISO 8601 form.
+
+Example
+-------
+python py_athletics.py --load ../test/py_athletics.pickle --summarize-goals
+    --format json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser for py_athletics batch mode."""
+
+    parser = argparse.ArgumentParser(
+        prog="py_athletics.py",
+        description="Run py_athletics commands without the interactive shell.",
+        epilog="Without options, py_athletics starts the interactive shell.",
+    )
+    parser.add_argument("--load", metavar="FILE", help="restore a saved session")
+    parser.add_argument(
+        "--read",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help="read a Garmin activity file, may be repeated",
+    )
+    parser.add_argument(
+        "--add-goal",
+        metavar="ARGS",
+        action="append",
+        default=[],
+        help='add a goal, e.g. "exercise=Run metric=distance timeframe=year '
+        'target=150", may be repeated',
+    )
+    parser.add_argument(
+        "--exercise", help="limit results to one of Cycle|Run|Tennis|Walk|Workout"
+    )
+    parser.add_argument("--start", metavar="YYYY-MM-DD", help="timeframe start")
+    parser.add_argument("--end", metavar="YYYY-MM-DD", help="timeframe end")
+    parser.add_argument("--show-activities", action="store_true")
+    parser.add_argument("--summarize-activities", action="store_true")
+    parser.add_argument("--show-goals", action="store_true")
+    parser.add_argument("--summarize-goals", action="store_true")
+    parser.add_argument(
+        "--save",
+        metavar="FILE",
+        nargs="?",
+        const="py_athletics.pickle",
+        help="save the session, default py_athletics.pickle",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve queries over HTTP/JSON until interrupted, see server module",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=8080, help="server port")
+    parser.add_argument(
+        "--athlete",
+        metavar="NAME=FILE",
+        action="append",
+        default=[],
+        help="serve a saved session under NAME, may be repeated",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("text", "json"),
+        default="text",
+        help="output format, json emits one JSON object per line",
+    )
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """Run py_athletics in batch mode and return a process exit status.
+
+    Steps are performed in a fixed order: load, read, add goals, report,
+    save and serve.  The first failing step is reported and ends the run with
+    a non-zero exit status.
+    """
+
+    # The athlete module is imported here rather than at module level so that
+    # argument errors and --help do not pay for loading the data model.
+
+    from athlete.athlete import Athlete
+
+    args = build_parser().parse_args(argv)
+    emitter = JsonEmitter() if args.format == "json" else TextEmitter()
+
+    step = "load"
+    try:
+        if args.load:
+            athlete = Athlete.load(args.load)
+        else:
+            athlete = Athlete()
+
+        step = "read"
+        for filename in args.read:
+            athlete.read_garmin_activity_file(filename)
+
+        step = "add_goal"
+        if args.add_goal:
+            from helpers.helpers import parse
+
+            for goal_arguments in args.add_goal:
+                athlete.add_goal(**parse(goal_arguments))
+
+        step = "show_activities"
+        if args.show_activities:
+            emitter.show_activities(athlete, args.exercise, args.start, args.end)
+
+        step = "summarize_activities"
+        if args.summarize_activities:
+            emitter.summarize_activities(athlete, args.exercise, args.start, args.end)
+
+        step = "show_goals"
+        if args.show_goals:
+            emitter.show_goals(athlete, args.exercise)
+
+        step = "summarize_goals"
+        if args.summarize_goals:
+            emitter.summarize_goals(athlete, args.exercise)
+
+        step = "save"
+        if args.save:
+            athlete.save(args.save)
+
+        step = "serve"
+        if args.serve:
+            serve(args, athlete)
+
+    except BrokenPipeError:
+        # The consumer of our output went away, for example a pipe into head.
+        # Point stdout at devnull so the interpreter can exit quietly.
+
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+    except (ValueError, TypeError, OSError) as message:
+        emitter.error(step, message)
+        return 1
+
+    return 0
+
+
+def serve(args, athlete) -> None:
+    """Serve the athletes named with --athlete, and the athlete built from
+    --load and --read under the name default, until interrupted."""
+
+    import asyncio
+    from roster.roster import Roster
+    from server.server import AthleteServer
+
+    roster = Roster()
+    if args.load or args.read:
+        roster.add_athlete("default", athlete=athlete)
+    for entry in args.athlete:
+        name, separator, filename = entry.partition("=")
+        if not separator:
+            raise ValueError(f"--athlete must be NAME=FILE: {entry}")
+        roster.add_athlete(name, filename=filename)
+
+    server = AthleteServer(roster, host=args.host, port=args.port)
+    address = f"http://{args.host}:{args.port}"
+    print(f"serving {len(roster)} athletes on {address}", flush=True)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+class TextEmitter:
+    """Produce the same human readable output as the interactive shell."""
+
+    def show_activities(self, athlete, exercise, start, end) -> None:
+        athlete.show_activities(exercise=exercise, start=start, end=end)
+
+    def summarize_activities(self, athlete, exercise, start, end) -> None:
+        athlete.summarize_activities(exercise=exercise, start=start, end=end)
+
+    def show_goals(self, athlete, exercise) -> None:
+        athlete.show_goals(exercise)
+
+    def summarize_goals(self, athlete, exercise) -> None:
+        athlete.summarize_goals(exercise)
+
+    def error(self, step: str, message) -> None:
+        print(f"{step} command failed: {message}", file=sys.stderr)
+
+
+class JsonEmitter:
+    """Produce JSON lines.  Every object carries a record key naming the kind
+    of record, the remaining keys hold the data."""
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def emit(self, record: str, data: dict) -> None:
+        from helpers.helpers import jsonable
+
+        line = {"record": record}
+        line.update(jsonable(data))
+        self.stream.write(json.dumps(line) + "\n")
+
+    def show_activities(self, athlete, exercise, start, end) -> None:
+        for activity in athlete.iter_activities(exercise, start=start, end=end):
+            self.emit("activity", activity.as_dict())
+
+    def summarize_activities(self, athlete, exercise, start, end) -> None:
+        summary = athlete.activity_summary(exercise=exercise, start=start, end=end)
+        for name, tally in summary.items():
+            data = {"exercise": name, "start": start, "end": end}
+            data.update(tally)
+            self.emit("activity_summary", data)
+
+    def show_goals(self, athlete, exercise) -> None:
+        from activity.activity import Activity
+
+        if exercise is None:
+            goals = athlete.get_goals()
+        elif exercise in Activity.subclass_names():
+            goals = athlete.get_goals(Activity.activity_dictionary()[exercise])
+        else:
+            raise ValueError("invalid class name")
+
+        for goal in goals:
+            self.emit("goal", goal.as_dict())
+
+    def summarize_goals(self, athlete, exercise) -> None:
+        for progress in athlete.goal_summary(exercise):
+            self.emit("goal_summary", progress)
+
+    def error(self, step: str, message) -> None:
+        self.emit("error", {"command": step, "message": str(message)})
@@ -1,17 +1,46 @@
 """This is the py_athletics goal module."""
 
 from activity.activity import Activity
+from helpers.helpers import td_cvt
+from profiling.profiling import span
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from itertools import accumulate
 import datetime
-import calendar
+
+# calendar is only needed for monthly goals and is imported on first use.
 
 
 class Goal:
     """py_athletics Goal base class."""
 
     GOAL_METRICS = ("count", "distance", "duration")
-    GOAL_TIMEFRAMES = ("month", "year", "cumulative")
+    GOAL_TIMEFRAMES = ("month", "year", "cumulative", "rolling")
+
+    # The value of each metric before any activities are counted.
+
+    METRIC_ZERO = {"count": 0, "distance": Decimal(0), "duration": datetime.timedelta()}
+
+    # Goal subclasses name their timeframe, one of GOAL_TIMEFRAMES.
+
+    timeframe = None
+
+    # The live counter is a (start, end, value) tuple with the Goal metric's
+    # total for the activities between the start and end dates of the
+    # Goal's current period, or None until it is first needed.  Goals saved
+    # before live counters existed get None from the class attribute.
+
+    __live = None
 
-    def __init__(self, activity_type, metric, target):
+    # Composite Goals count the activities of several activity classes, or
+    # only those with certain Garmin activity types, or both.  Their
+    # activity_type is None.  Goals saved before composite Goals existed
+    # get their activity classes from activity_type.
+
+    __activity_types = None
+    garmin_activity_types = None
+
+    def __init__(self, activity_type, metric, target, garmin_activity_types=None):
         """Create a Goal.
 
         A Goal consists of an activity class, a metric, and a target.
@@ -21,22 +50,46 @@ class Goal:
         The metric attribute must be one of "count", "distance" or "duration".
         The target attribute must be positive.
 
-        There are three Goal subclasses that have different timeframes.
-        They are CumulativeGoal, AnnualGoal and MonthGoal.
+        A composite Goal is created with a tuple of activity classes or with
+        garmin_activity_types, a tuple of Garmin activity type strings, or
+        both, and counts the activities of any of the classes with any of
+        the Garmin activity types.
+
+        There are four Goal subclasses that have different timeframes.
+        They are CumulativeGoal, YearGoal, MonthGoal and RollingGoal.
         """
 
-        if not issubclass(activity_type, Activity):
+        if isinstance(activity_type, tuple):
+            activity_types = activity_type
+        else:
+            activity_types = (activity_type,)
+
+        if not activity_types:
             raise ValueError("invalid activity_Class")
 
+        for activity_class in activity_types:
+            if not issubclass(activity_class, Activity):
+                raise ValueError("invalid activity_Class")
+
         if not isinstance(metric, str):
             raise TypeError("metric must be a string")
 
         if metric not in Goal.GOAL_METRICS:
             raise ValueError("invalid metric")
 
-        if metric == "distance" and activity_type.__name__ in ["Tennis", "Workout"]:
+        names = [activity_class.__name__ for activity_class in activity_types]
+        if metric == "distance" and ("Tennis" in names or "Workout" in names):
             raise ValueError("invalid metric for activity_class")
 
+        if garmin_activity_types is not None:
+            if not isinstance(garmin_activity_types, tuple) or not all(
+                isinstance(garmin_type, str) for garmin_type in garmin_activity_types
+            ):
+                raise TypeError("garmin_activity_types must be a tuple of strings")
+
+            if not garmin_activity_types:
+                raise ValueError("invalid garmin_activity_types")
+
         target = target
         if not isinstance(target, int):
             raise TypeError("target must be an integer")
@@ -44,15 +97,46 @@ class Goal:
         if target <= 0:
             raise ValueError("target must be greater than zero")
 
-        self.activity_type = activity_type
+        self.activity_type = activity_types[0] if len(activity_types) == 1 else None
+        self.__activity_types = activity_types
+        self.garmin_activity_types = garmin_activity_types
         self.metric = metric
         self.target = target
 
+    @property
+    def activity_types(self) -> tuple:
+        """The activity classes the Goal counts."""
+
+        return self.__activity_types or (self.activity_type,)
+
+    @property
+    def exercise(self) -> str:
+        """The name of the Goal's activity class, or for a Goal over several
+        classes their comma separated names."""
+
+        names = (activity_class.__name__ for activity_class in self.activity_types)
+        return ",".join(names)
+
+    @property
+    def composite(self) -> bool:
+        """True for Goals over several activity classes or limited to
+        Garmin activity types."""
+
+        return len(self.activity_types) > 1 or self.garmin_activity_types is not None
+
+    def __label(self) -> str:
+        """Return the Goal's exercise with its Garmin activity types, if
+        any, for display."""
+
+        if self.garmin_activity_types is None:
+            return self.exercise
+        return f"{self.exercise} ({', '.join(self.garmin_activity_types)})"
+
     def __repr__(self):
 
         # Goal subclasses replace TIMEFRAME with relevant text.
 
-        f_1 = f"[Goal: {self.activity_type.__name__} metric: {self.metric} "
+        f_1 = f"[Goal: {self.__label()} metric: {self.metric} "
         f_2 = f"timeframe: TIMEFRAME target: {self.target:,}]"
 
         return f_1 + f_2
@@ -68,12 +152,174 @@ class Goal:
         else:
             stub = "hours"
 
-        string = f"[Goal: {self.activity_type.__name__} {self.target:,} {stub} "
+        string = f"[Goal: {self.__label()} {self.target:,} {stub} "
 
         return string + "TIMEFRAME]"
 
-    def report(self, tally: dict) -> None:
-        print("Not implemented for this goal subclass yet")
+    def as_dict(self) -> dict:
+        """Return a dictionary describing the Goal."""
+
+        result = {
+            "exercise": self.exercise,
+            "metric": self.metric,
+            "timeframe": self.timeframe,
+            "target": self.target,
+        }
+        if self.garmin_activity_types is not None:
+            result["garmin_activity_type"] = ",".join(self.garmin_activity_types)
+        return result
+
+    def target_value(self):
+        """Return the Goal's target in the units of its metric's values,
+        a timedelta for duration targets, which are given in hours."""
+
+        if self.metric == "duration":
+            return datetime.timedelta(hours=self.target)
+        return self.target
+
+    def copy(self):
+        """Return a copy of the Goal with its own live counter."""
+
+        goal = object.__new__(type(self))
+        goal.__dict__.update(self.__dict__)
+        return goal
+
+    def period(self, today: datetime.date) -> tuple:
+        """Return the (start, end) dates of the Goal's period that includes
+        today.  Goals without a calendar period count every activity from
+        1970 through today."""
+
+        return (datetime.date(1970, 1, 1), today)
+
+    def count(self, activity, sign: int = 1) -> None:
+        """Add an activity of one of the Goal's activity classes to the live
+        counter, or with a sign of -1 remove it.  Activities outside the
+        counter's period or without one of a composite Goal's Garmin
+        activity types are ignored."""
+
+        live = self.__live
+        if live is None:
+            return
+
+        garmin_activity_types = self.garmin_activity_types
+        if garmin_activity_types is not None:
+            if activity.garmin_activity_type not in garmin_activity_types:
+                return
+
+        start, end, current = live
+        if not start <= activity.start.date() <= end:
+            return
+
+        value = self.value(activity)
+        if value:
+            self.__live = (start, end, current + sign * value)
+
+    def value(self, activity):
+        """Return what an activity adds to the Goal metric."""
+
+        if self.metric == "count":
+            return 1
+        if self.metric == "distance":
+            return activity.distance or Decimal(0)
+        return activity.duration
+
+    def running_totals(self, athlete) -> tuple:
+        """Return the days with activities the Goal counts through today,
+        oldest first, and the running totals of the Goal metric through each
+        of those days.
+
+        The totals come from a single pass over the athlete's daily totals
+        in date order.  The total for any period is then the difference of
+        two running totals found by binary search, see period_total.
+        """
+
+        daily = athlete.daily_totals(
+            self.activity_types,
+            self.metric,
+            end=datetime.date.today(),
+            garmin_activity_types=self.garmin_activity_types,
+        )
+        days = sorted(daily)
+        totals = list(accumulate(daily[day] for day in days))
+        return days, totals
+
+    def period_total(self, days: list, totals: list, start, end):
+        """Return the Goal metric's total from the start date through the
+        end date, given the running totals from running_totals."""
+
+        zero = Goal.METRIC_ZERO[self.metric]
+        first = bisect_left(days, start)
+        last = bisect_right(days, end)
+        if last <= first:
+            return zero
+        return totals[last - 1] - (totals[first - 1] if first else zero)
+
+    def current(self, athlete, recompute: bool = False):
+        """Return the Goal metric's total for the current period.
+
+        The total is the live counter, kept current by the athlete as
+        activities are added and removed.  It is tallied from the athlete's
+        activities when it is first needed, when the period has rolled over
+        to a new one since it was last read and when recompute is True.
+        Composite Goals add up the athlete's daily totals for the period,
+        found in one pass over the activities of all their classes.
+        """
+
+        start, end = self.period(datetime.date.today())
+
+        live = self.__live
+        if recompute or live is None or live[:2] != (start, end):
+            if self.composite:
+                daily = athlete.daily_totals(
+                    self.activity_types,
+                    self.metric,
+                    start,
+                    end,
+                    self.garmin_activity_types,
+                )
+                value = sum(daily.values(), Goal.METRIC_ZERO[self.metric])
+            else:
+                tally = Activity.tally(
+                    athlete, self.activity_type.__name__, str(start), str(end)
+                )
+                value = tally[self.metric]
+            live = (start, end, value)
+            self.__live = live
+
+        return live[2]
+
+    def status(self, athlete, recompute: bool = False) -> dict:
+        """Return a dictionary describing the Goal with the start and end
+        dates of its current period and the current value, from the live
+        counter, see current."""
+
+        result = self.as_dict()
+        result["current"] = self.current(athlete, recompute)
+        result["start"], result["end"] = self.__live[:2]
+        return result
+
+    def progress(self, athlete) -> dict:
+        """Return a dictionary describing how the athlete is tracking
+        relative to the Goal.  Goal subclasses add the current value and
+        any timeframe specific detail."""
+
+        return self.as_dict()
+
+    def report_lines(self, progress: dict) -> list:
+        """Return the lines of a progress report for a progress dictionary
+        produced by the progress method."""
+
+        return ["Not implemented for this goal subclass yet"]
+
+    def report(self, athlete) -> None:
+        """Display how the athlete is tracking relative to the Goal."""
+
+        with span("goal.progress"):
+            progress = self.progress(athlete)
+
+        for line in self.report_lines(progress):
+            print(line)
+
         return
 
 
@@ -81,6 +327,8 @@ class CumulativeGoal(Goal):
     """CumulativeGoal is a goal measured with respect to all relevant
     Activities without reference to any timeframe."""
 
+    timeframe = "cumulative"
+
     def __repr__(self):
         string = super().__repr__()
         return string.replace("TIMEFRAME", "cumulative")
@@ -89,28 +337,79 @@ class CumulativeGoal(Goal):
         string = super().__str__()
         return string.replace("TIMEFRAME", "on a cumulative basis")
 
-    def report(self, athlete) -> None:
-        tally = Activity.tally(athlete, self.activity_type.__name__)
+    # Milestones are reported at these percentages of the target.
+
+    MILESTONES = (25, 50, 75, 100)
+
+    def progress(self, athlete) -> dict:
+        result = super().progress(athlete)
+        result["current"] = self.current(athlete)
+        result["milestones"] = None
+
+        # For cumulative goals we include the date each milestone was
+        # reached, or None if it has not been reached yet.  Running totals
+        # never decrease, so a binary search finds the first day on which
+        # the total reached a milestone.
+
+        days, totals = self.running_totals(athlete)
+        if not days:
+            return result
+
+        result["milestones"] = []
+
+        for percent in CumulativeGoal.MILESTONES:
+
+            # Duration targets are in hours, 36 seconds per percent.
+
+            value = Decimal(self.target) * percent / 100
+            if self.metric == "duration":
+                threshold = datetime.timedelta(seconds=self.target * percent * 36)
+            else:
+                threshold = value
+
+            index = bisect_left(totals, threshold)
+            reached = days[index] if index < len(days) else None
+            result["milestones"].append({"value": value, "reached": reached})
+
+        return result
 
-        target = self.target
-        current = tally[self.metric]
+    def report_lines(self, progress: dict) -> list:
+        target = self.target_value()
+        current = progress["current"]
 
         preamble = str(self)
-        current_str = f" Current: {current:,} "
+        current_str = f" Current: {format_value(current)} "
         if current >= target:
-            delta = f"Achieved with surplus: {current - target:,}"
+            delta = f"Achieved with surplus: {format_value(current - target)}"
         else:
-            delta = f"Deficit: {target - current:,}"
+            delta = f"Deficit: {format_value(target - current)}"
 
         summary = preamble[1:-1] + current_str + delta
-        print(summary)
+        lines = [summary]
 
-        return
+        # Milestones are shown in the order they are reached.  Milestones
+        # of None mean there are no activities for this exercise at all.
+
+        if progress["milestones"] is None:
+            return lines
+
+        for milestone in progress["milestones"]:
+            if milestone["reached"] is None:
+                reached = "not reached yet"
+            else:
+                reached = f"reached {milestone['reached']}"
+
+            lines.append(f"      {milestone['value']:,}: {reached}")
+
+        lines.append("")
+        return lines
 
 
 class YearGoal(Goal):
     """YearGoal is a goal measured with respect to a calendar year."""
 
+    timeframe = "year"
+
     def __repr__(self):
         string = super().__repr__()
         return string.replace("TIMEFRAME", "year")
@@ -119,33 +418,79 @@ class YearGoal(Goal):
         string = super().__str__()
         return string.replace("TIMEFRAME", "each year")
 
-    def report(self, athlete) -> None:
+    def period(self, today: datetime.date) -> tuple:
+        return (datetime.date(today.year, 1, 1), datetime.date(today.year, 12, 31))
+
+    def progress(self, athlete) -> dict:
         now = datetime.datetime.now()
         date = now.date()
         year = date.strftime("%Y")
-        start = f"{year}-01-01"
-        end = f"{year}-12-31"
 
-        tally = Activity.tally(athlete, self.activity_type.__name__, start, end)
-        target = self.target
-        current = tally[self.metric]
+        result = super().progress(athlete)
+        result["period"] = year
+        result["current"] = self.current(athlete)
+        result["history"] = None
+
+        # For annual goals we include historical information, oldest year
+        # first, from one pass over the activities.
+
+        days, totals = self.running_totals(athlete)
+        if not days:
+            return result
+
+        result["history"] = [
+            {
+                "period": str(year_index),
+                "value": self.period_total(
+                    days,
+                    totals,
+                    datetime.date(year_index, 1, 1),
+                    datetime.date(year_index, 12, 31),
+                ),
+            }
+            for year_index in range(days[0].year, date.year)
+        ]
+
+        return result
+
+    def report_lines(self, progress: dict) -> list:
+        target = self.target_value()
+        current = progress["current"]
 
         preamble = str(self)
-        current_str = f", year to date: {current:,} "
+        current_str = f", year to date: {format_value(current)} "
         if current >= target:
-            delta = f"goal achieved with surplus: {current - target:,}"
+            delta = f"goal achieved with surplus: {format_value(current - target)}"
         else:
-            delta = f"deficit: {target - current:,}"
+            delta = f"deficit: {format_value(target - current)}"
 
-        result = preamble[1:-1] + current_str + delta
-        print(result)
+        lines = [preamble[1:-1] + current_str + delta]
 
-        return
+        # Prior years are shown most recent first.  A history of None
+        # means there are no activities for this exercise at all.
+
+        if progress["history"] is None:
+            return lines
+
+        for prior_year in reversed(progress["history"]):
+            prior = prior_year["value"]
+            prior_str = f"{prior_year['period']}: {format_value(prior)} "
+            if prior >= target:
+                delta = f"goal achieved with surplus: {format_value(prior - target)}"
+            else:
+                delta = f"deficit: {format_value(target - prior)}"
+
+            lines.append("      " + prior_str + delta)
+
+        lines.append("")
+        return lines
 
 
 class MonthGoal(Goal):
     """MonthGoal is a goal measured with respect to a calendar month."""
 
+    timeframe = "month"
+
     def __repr__(self):
         string = super().__repr__()
         return string.replace("TIMEFRAME", "month")
@@ -154,76 +499,236 @@ class MonthGoal(Goal):
         string = super().__str__()
         return string.replace("TIMEFRAME", "each month")
 
-    def report(self, athlete) -> None:
+    def period(self, today: datetime.date) -> tuple:
+        import calendar
+
+        last_day = calendar.monthrange(today.year, today.month)[1]
+        return (
+            datetime.date(today.year, today.month, 1),
+            datetime.date(today.year, today.month, last_day),
+        )
+
+    def progress(self, athlete) -> dict:
+        import calendar
+
         now = datetime.datetime.now()
         date = now.date()
         year = date.strftime("%Y")
         month = date.strftime("%m")
-        start = f"{year}-{month}-01"
-        last_day = calendar.monthrange(date.year, date.month)[1]
-        end = f"{year}-{month}-{last_day}"
 
-        tally = Activity.tally(athlete, self.activity_type.__name__, start, end)
-        target = self.target
-        current = tally[self.metric]
+        result = super().progress(athlete)
+        result["period"] = f"{year}-{month}"
+        result["current"] = self.current(athlete)
+        result["history"] = None
+
+        # For monthly goals we include historical information, oldest month
+        # first, from one pass over the activities.  The earliest activity
+        # shows how far back to go.
+
+        days, totals = self.running_totals(athlete)
+
+        # If there is no earlier period to summarize, we are done.
+        if not days:
+            return result
+
+        result["history"] = []
+
+        month_index = days[0].month
+        year_index = days[0].year
+
+        while year_index < now.year or month_index < now.month:
+            start = datetime.date(year_index, month_index, 1)
+            last_day = calendar.monthrange(year_index, month_index)[1]
+            end = datetime.date(year_index, month_index, last_day)
+
+            value = self.period_total(days, totals, start, end)
+            period = f"{year_index}-{month_index:02}"
+            result["history"].append({"period": period, "value": value})
+
+            month_index += 1
+            if month_index == 13:
+                year_index += 1
+                month_index = 1
+
+        return result
+
+    def report_lines(self, progress: dict) -> list:
+        target = self.target_value()
+        current = progress["current"]
 
         preamble = str(self)
-        current_str = f", month to date: {current:,} "
+        current_str = f", month to date: {format_value(current)} "
         if current >= target:
-            delta = f"goal achieved with surplus: {current - target:,}"
+            delta = f"goal achieved with surplus: {format_value(current - target)}"
         else:
-            delta = f"deficit: {target - current:,}"
+            delta = f"deficit: {format_value(target - current)}"
 
-        result = preamble[1:-1] + current_str + delta
-        print(result)
+        lines = [preamble[1:-1] + current_str + delta]
 
-        # For monthly goal reports we show historical information
-        # The Athlete.earlist_activity method shows how far back to go.
+        # Prior months are shown most recent first.  A history of None
+        # means there are no activities for this exercise at all.
 
-        earliest = athlete.earliest_activity(self.activity_type.__name__)
+        if progress["history"] is None:
+            return lines
 
-        # If there is no earlier period to summarize, we are done.
-        if earliest is None:
-            return
+        for prior_month in reversed(progress["history"]):
+            prior = prior_month["value"]
+            prior_str = f"{prior_month['period']}: {format_value(prior)} "
+            if prior >= target:
+                delta = f"goal achieved with surplus: {format_value(prior - target)}"
+            else:
+                delta = f"deficit: {format_value(target - prior)}"
 
-        earliest_month = earliest.month
-        earliest_year = earliest.year
+            lines.append("      " + prior_str + delta)
 
-        # We start at the earliest month we have and push strings on
-        # a result string stack.
+        lines.append("")
+        return lines
 
-        result_string_stack = []
 
-        if earliest_year < now.year or earliest_month < now.month:
+class RollingGoal(Goal):
+    """RollingGoal is a goal measured with respect to the trailing days
+    ending on each day."""
 
-            month_index = earliest_month
-            year_index = earliest_year
+    timeframe = "rolling"
 
-            while year_index < now.year or month_index < now.month:
-                start = f"{year_index}-{month_index}-01"
-                last_day = calendar.monthrange(year_index, month_index)[1]
-                end = f"{year_index}-{month_index}-{last_day}"
+    def __init__(self, activity_type, metric, target, days, garmin_activity_types=None):
+        """Create a RollingGoal.
 
-                tally = Activity.tally(athlete, self.activity_type.__name__, start, end)
-                target = self.target
-                prior = tally[self.metric]
+        In addition to the activity class, metric and target of every Goal,
+        a RollingGoal has the number of trailing days, a positive integer,
+        its target applies to.
+        """
 
-                prior_str = f"{year_index}-{month_index:02}: {prior:,} "
-                if prior >= target:
-                    delta = f"goal achieved with surplus: {prior - target:,}"
-                else:
-                    delta = f"deficit: {target - prior:,}"
+        super().__init__(activity_type, metric, target, garmin_activity_types)
 
-                result = "      " + prior_str + delta
+        if not isinstance(days, int):
+            raise TypeError("days must be an integer")
 
-                result_string_stack.append(result)
+        if days <= 0:
+            raise ValueError("days must be greater than zero")
 
-                month_index += 1
-                if month_index == 13:
-                    year_index += 1
-                    month_index = 1
+        self.days = days
 
-        while result_string_stack:
-            print(result_string_stack.pop())
-        print()
-        return
+    def __repr__(self):
+        string = super().__repr__()
+        return string.replace("TIMEFRAME", f"trailing {self.days} days")
+
+    def __str__(self):
+        string = super().__str__()
+        return string.replace("TIMEFRAME", f"in any trailing {self.days} days")
+
+    def as_dict(self) -> dict:
+        result = super().as_dict()
+        result["days"] = self.days
+        return result
+
+    def period(self, today: datetime.date) -> tuple:
+        return (today - datetime.timedelta(days=self.days - 1), today)
+
+    def progress(self, athlete) -> dict:
+        today = datetime.date.today()
+
+        result = super().progress(athlete)
+        result["start"], result["end"] = self.period(today)
+        result["current"] = self.current(athlete)
+        result["best"] = None
+        result["worst"] = None
+        result["days_on_target"] = None
+        result["days_tracked"] = None
+
+        # For rolling goals we include the best and worst windows and how
+        # many of the windows met the target.  There is a window ending on
+        # each day from the first full window after the earliest activity
+        # through today.  Two pointers into the days with activities mark
+        # the days that enter and leave the window as it slides forward,
+        # so each day's total is found once.
+
+        daily = athlete.daily_totals(
+            self.activity_types,
+            self.metric,
+            end=today,
+            garmin_activity_types=self.garmin_activity_types,
+        )
+        if not daily:
+            return result
+
+        days = sorted(daily)
+        one_day = datetime.timedelta(days=1)
+        window = datetime.timedelta(days=self.days)
+
+        target = self.target_value()
+        total = Goal.METRIC_ZERO[self.metric]
+        first = last = 0
+        best = worst = None
+        on_target = tracked = 0
+
+        end = min(days[0] + window - one_day, today)
+        while end <= today:
+            while last < len(days) and days[last] <= end:
+                total += daily[days[last]]
+                last += 1
+            while first < last and days[first] <= end - window:
+                total -= daily[days[first]]
+                first += 1
+
+            if best is None or total > best["value"]:
+                best = {"end": end, "value": total}
+            if worst is None or total < worst["value"]:
+                worst = {"end": end, "value": total}
+            if total >= target:
+                on_target += 1
+            tracked += 1
+
+            end += one_day
+
+        result["best"] = best
+        result["worst"] = worst
+        result["days_on_target"] = on_target
+        result["days_tracked"] = tracked
+        return result
+
+    def report_lines(self, progress: dict) -> list:
+        target = self.target_value()
+        current = progress["current"]
+
+        preamble = str(self)
+        current_str = f", trailing {self.days} days: {format_value(current)} "
+        if current >= target:
+            delta = f"goal achieved with surplus: {format_value(current - target)}"
+        else:
+            delta = f"deficit: {format_value(target - current)}"
+
+        lines = [preamble[1:-1] + current_str + delta]
+
+        # A best window of None means there are no activities for this
+        # exercise at all.
+
+        if progress["best"] is None:
+            return lines
+
+        for name in ("best", "worst"):
+            window = progress[name]
+            lines.append(
+                f"      {name}: {format_value(window['value'])} "
+                f"in the {self.days} days to {window['end']}"
+            )
+
+        on_target = progress["days_on_target"]
+        tracked = progress["days_tracked"]
+        lines.append(
+            f"      on target {on_target:,} of {tracked:,} days "
+            f"({on_target / tracked:.1%})"
+        )
+
+        lines.append("")
+        return lines
+
+
+def format_value(value) -> str:
+    """Return a Goal metric value for display, durations in hours, minutes
+    and seconds."""
+
+    if isinstance(value, datetime.timedelta):
+        hours, minutes, seconds = td_cvt(value)
+        return f"{hours:,}:{minutes:02}:{seconds:02}"
+    return f"{value:,}"
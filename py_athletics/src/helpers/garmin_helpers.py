@@ -2,7 +2,7 @@
 handling of the garmin activity file by the Activity class methods."""
 
 from decimal import Decimal
-from datetime import datetime, time
+from datetime import time, timedelta
 from typing import Union
 
 
@@ -42,7 +42,21 @@ def garmin_to_time(string: str) -> Union[None, time]:
     converted."""
 
     # Garmin uses "--" or "0" to indicate None.
+    # The field is split rather than parsed with strptime, which is slow
+    # enough to matter when reading large files.
 
     if not string or string == "--" or string == "0":
         return None
-    return datetime.time(datetime.strptime(string, "%M:%S"))
+    minutes, seconds = string.split(":")
+    return time(minute=int(minutes), second=int(seconds))
+
+
+def garmin_to_timedelta(string: str) -> timedelta:
+    """Convert a Garmin activity field in the form hours:minutes:seconds
+    to a datetime.timedelta object."""
+
+    # The timedelta is created from positional days and seconds, which is
+    # faster than keywords.
+
+    hours, minutes, seconds = string.split(":")
+    return timedelta(0, (int(hours) * 60 + int(minutes)) * 60 + int(seconds))
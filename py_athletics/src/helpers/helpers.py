@@ -2,7 +2,8 @@
 Functions specific to parsing Garmin activity files reside in garmin_helpers.
 """
 
-from datetime import datetime, timedelta, date
+from collections import defaultdict
+from datetime import datetime, timedelta, date, time
 
 
 def td_cvt(duration: timedelta) -> tuple:
@@ -61,3 +62,93 @@ def none_factory() -> None:
     # default dicts as the default factory.
 
     return None
+
+
+def jsonable(value):
+    """Return a copy of value that the json module can serialize.
+
+    Decimals become floats, timedeltas become seconds and dates, datetimes
+    and times become ISO 8601 strings.  Dictionaries, lists and tuples are
+    converted recursively.
+    """
+
+    from decimal import Decimal
+
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    return value
+
+
+def deep_getsizeof(obj, seen: set, skip: tuple = ()) -> int:
+    """Return an estimate in bytes of the memory used by obj and the objects
+    it refers to.
+
+    Objects whose ids are already in seen are not counted again, so sharing a
+    seen set across calls counts shared objects once.  Instances of the types
+    in skip are neither counted nor followed, and neither are classes, which
+    belong to the program rather than to its data.
+    """
+
+    import sys
+
+    # The walk uses an explicit stack rather than recursion because activity
+    # collections are deep enough to exceed the recursion limit.
+
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        if skip and isinstance(current, skip):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for name in getattr(type(current), "__slots__", ()):
+            if hasattr(current, name):
+                stack.append(getattr(current, name))
+
+    return total
+
+
+def parse(arg: str) -> dict:
+    "py_athletics shell command parser."
+
+    # Valid arguments are of the form keyword=value.
+    # The parser splits arg into tokens and then parses
+    # each resulting token into a keyword value pair to
+    # appear in an argument dictionary that is returned.
+    # The parser also casts integer strings to integers.
+
+    import shlex
+
+    try:
+        token_list = shlex.split(arg)
+        arg_dict = defaultdict(lambda: None)
+        if token_list:
+            arg_dict = dict(token.split("=") for token in token_list)
+    except ValueError:
+        print("could not parse command arguments")
+
+    for key, value in arg_dict.items():
+        try:
+            arg_dict[key] = int(value)
+        except ValueError:
+            pass
+    return arg_dict
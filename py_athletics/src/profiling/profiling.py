@@ -0,0 +1,218 @@
+"""This is the py_athletics profiling module.
+
+The module provides opt-in instrumentation for py_athletics.  Shell commands
+are timed by PythonAthleticsShell.precmd and postcmd, and named timing spans
+mark the phases of the heavier operations, for example
+
+    with span("read"):
+        ...
+
+Profiling is off by default.  While it is off span returns a shared context
+manager that does nothing, so instrumented code pays only for a function call
+and an attribute test.  cProfile is imported only when profiling is switched
+on.
+
+Allocation tracing is a separate opt-in.  While it is on, blocks wrapped in
+profiler.allocations(name) are run under tracemalloc and the allocations they
+leave behind are reported by source line.
+"""
+
+from time import perf_counter
+
+
+class _NullSpan:
+    """A do-nothing context manager returned by span when profiling is
+    disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """A context manager that adds its elapsed time to a Profiler."""
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record_span(self.name, perf_counter() - self.started)
+        return False
+
+
+class _AllocationTrace:
+    """A context manager that reports the memory allocated by the enclosed
+    block, grouped by source line."""
+
+    def __init__(self, name: str, top: int):
+        self.name = name
+        self.top = top
+        self.started_tracing = False
+        self.before = None
+
+    def __enter__(self):
+        import tracemalloc
+
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc_info):
+        import tracemalloc
+
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+        # Leave out allocations made by tracemalloc and the import machinery.
+
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        before = self.before.filter_traces(filters)
+        differences = after.filter_traces(filters).compare_to(before, "lineno")
+
+        print(f"{self.name} allocations, peak traced {peak / 2**20:,.1f} MiB:")
+        for difference in differences[: self.top]:
+            frame = difference.traceback[0]
+            print(
+                f"{difference.size_diff / 2**10:12,.1f} KiB "
+                f"{difference.count_diff:10,} blocks  {frame.filename}:{frame.lineno}"
+            )
+        return False
+
+
+class Profiler:
+    """py_athletics Profiler class.
+
+    A Profiler accumulates call counts and wall time for shell commands and
+    for named spans, and optionally collects cProfile data.  Times are in
+    seconds.
+    """
+
+    def __init__(self):
+        """Create a disabled Profiler."""
+
+        self.enabled = False
+        self.trace_allocations = False
+        self.commands = {}
+        self.spans = {}
+        self.cprofile = None
+
+    def enable(self) -> None:
+        """Start recording commands and spans and collecting cProfile data."""
+
+        import cProfile
+
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+        if not self.enabled:
+            self.cprofile.enable()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording.  Data collected so far is kept for reporting."""
+
+        if self.enabled:
+            self.cprofile.disable()
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Discard all collected data."""
+
+        enabled = self.enabled
+        self.disable()
+        self.commands = {}
+        self.spans = {}
+        self.cprofile = None
+        if enabled:
+            self.enable()
+
+    def allocations(self, name: str, top: int = 10):
+        """Return a context manager that, while allocation tracing is on,
+        reports the top source lines by memory allocated in the enclosed
+        block."""
+
+        if not self.trace_allocations:
+            return _NULL_SPAN
+        return _AllocationTrace(name, top)
+
+    def record_command(self, name: str, elapsed: float) -> None:
+        """Record one execution of a shell command."""
+
+        calls, total = self.commands.get(name, (0, 0.0))
+        self.commands[name] = (calls + 1, total + elapsed)
+
+    def record_span(self, name: str, elapsed: float) -> None:
+        """Record one execution of a named span."""
+
+        calls, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (calls + 1, total + elapsed)
+
+    def report(self, top: int = 15) -> None:
+        """Display command and span timings and the top cProfile entries
+        sorted by cumulative time."""
+
+        for title, table in (("Command", self.commands), ("Span", self.spans)):
+            print(f"{title:32} {'Calls':>8} {'Total (s)':>10} {'Mean (ms)':>10}")
+            ranked = sorted(table.items(), key=lambda item: item[1][1], reverse=True)
+            for name, (calls, total) in ranked:
+                mean = total / calls * 1000
+                print(f"{name:32} {calls:8,} {total:10.3f} {mean:10.3f}")
+            print()
+
+        if self.cprofile is None:
+            return
+
+        import io
+        import pstats
+
+        # pstats cannot summarize a profile that is still collecting.
+
+        enabled = self.enabled
+        if enabled:
+            self.cprofile.disable()
+
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(self.cprofile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(top)
+        except TypeError:
+            # pstats raises TypeError when nothing has been collected.
+            stream.write("No cProfile data collected.\n")
+        print(stream.getvalue().strip("\n"))
+
+        if enabled:
+            self.cprofile.enable()
+
+
+# py_athletics uses a single Profiler shared by the shell and the instrumented
+# modules.
+
+profiler = Profiler()
+
+
+def span(name: str):
+    """Return a context manager that times the enclosed block as the named
+    span of the shared profiler."""
+
+    if not profiler.enabled:
+        return _NULL_SPAN
+    return _Span(profiler, name)
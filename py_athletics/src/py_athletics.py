@@ -1,9 +1,19 @@
 """py_athletics
 
 Invoke with python py_athletics.py from a command line.
+
+Without arguments the interactive shell is started.  With arguments,
+py_athletics runs in batch mode, see python py_athletics.py --help.
 """
 
-from shell.shell import PythonAthleticsShell
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from batch.batch import main
+
+        sys.exit(main(sys.argv[1:]))
+
+    from shell.shell import PythonAthleticsShell
+
     PythonAthleticsShell().cmdloop()
@@ -0,0 +1,232 @@
+"""This is the py_athletics roster module."""
+
+from athlete.athlete import Athlete
+from activity.activity import Activity
+
+
+class Roster:
+    """py_athletics Roster class.
+
+    A Roster holds a team of athletes by name.  An athlete can be registered
+    with a saved session file, in which case it is only loaded the first time
+    it is needed, or with an Athlete object.
+
+    Team-wide summaries are computed in a pool of worker processes, one
+    athlete per task, so they scale with the number of cores.  Athletes that
+    have not been loaded are loaded by the workers themselves and never
+    materialize in the calling process.
+    """
+
+    def __init__(self):
+        """Create an empty Roster."""
+
+        # The filenames attribute maps athlete names to session files and
+        # the athletes attribute maps names to Athlete objects that have been
+        # loaded or were registered directly.  Every name appears in at
+        # least one of them.
+
+        self.__filenames = {}
+        self.__athletes = {}
+
+    def __repr__(self) -> str:
+        loaded = len(self.__athletes)
+        return f"(Roster with {len(self)} athletes, {loaded} loaded)"
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__filenames or name in self.__athletes
+
+    def names(self) -> list:
+        """Return a sorted list of athlete names."""
+
+        return sorted(set(self.__filenames) | set(self.__athletes))
+
+    def add_athlete(self, name: str, filename: str = None, athlete=None) -> None:
+        """Add an athlete to the Roster, replacing any athlete of the same
+        name.
+
+        Exactly one of filename, a saved session file loaded on first use,
+        and athlete, an Athlete object, must be specified.
+        """
+
+        if not isinstance(name, str) or not name:
+            raise TypeError("name must be a non-empty string")
+
+        if name == "all":
+            raise ValueError("all is reserved for addressing every athlete")
+
+        if (filename is None) == (athlete is None):
+            raise ValueError("specify either filename or athlete")
+
+        if filename is not None and not isinstance(filename, str):
+            raise TypeError("filename must be a string")
+
+        if athlete is not None and not isinstance(athlete, Athlete):
+            raise TypeError("athlete must be an Athlete")
+
+        self.remove_athlete(name)
+
+        if filename is not None:
+            self.__filenames[name] = filename
+        else:
+            self.__athletes[name] = athlete
+
+    def remove_athlete(self, name: str) -> None:
+        """Remove an athlete from the Roster if present."""
+
+        self.__filenames.pop(name, None)
+        self.__athletes.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        """Return True if the named athlete is held in memory."""
+
+        return name in self.__athletes
+
+    def filename(self, name: str) -> str:
+        """Return the session file of the named athlete, or None."""
+
+        return self.__filenames.get(name)
+
+    def get_athlete(self, name: str) -> Athlete:
+        """Return the named Athlete, loading it on first use."""
+
+        if name not in self:
+            raise ValueError(f"unknown athlete: {name}")
+
+        if name not in self.__athletes:
+            self.__athletes[name] = Athlete.load(self.__filenames[name])
+
+        return self.__athletes[name]
+
+    def summarize_activities(
+        self,
+        names=None,
+        exercise=None,
+        start=None,
+        end=None,
+        workers=None,
+        group_by=None,
+        **filters,
+    ) -> dict:
+        """Return a dictionary of athlete name to activity summary, as
+        returned by Athlete.activity_summary, for the named athletes or for
+        every athlete.  With group_by, the summaries are tables as returned
+        by Athlete.activity_table instead.  The venue, venue_type, type,
+        partner and trainer keywords limit the summaries to activities with
+        those values.
+
+        Optional Parameters
+        -------------------
+        names: list of athlete names, default every athlete
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        workers: maximum number of worker processes, default one per core
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        group_by: string = {year|month|iso_week|weekday|hour|type|garmin_activity_type}
+        """
+
+        if exercise is not None and exercise not in Activity.subclass_names():
+            raise ValueError("invalid class name")
+
+        if group_by is not None and group_by not in Athlete.GROUP_BY:
+            raise ValueError("invalid group_by")
+
+        filters = Activity.check_filters(filters)
+
+        return self.__map(
+            _activity_summary_job,
+            names,
+            workers,
+            exercise,
+            start,
+            end,
+            group_by,
+            filters,
+        )
+
+    def summarize_goals(self, names=None, exercise=None, workers=None) -> dict:
+        """Return a dictionary of athlete name to a list of (Goal, progress)
+        pairs for the named athletes or for every athlete.
+
+        Optional Parameters
+        -------------------
+        names: list of athlete names, default every athlete
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        workers: maximum number of worker processes, default one per core
+        """
+
+        if exercise is not None and exercise not in Activity.subclass_names():
+            raise ValueError("invalid class name")
+
+        return self.__map(_goal_summary_job, names, workers, exercise)
+
+    def __map(self, job, names, workers, *arguments) -> dict:
+        """Run job for each named athlete and return a dictionary of athlete
+        name to result.  A job receives a filename or an Athlete followed by
+        the remaining arguments."""
+
+        if names is None:
+            names = self.names()
+
+        for name in names:
+            if name not in self:
+                raise ValueError(f"unknown athlete: {name}")
+
+        # Loaded athletes are sent to the workers as they are, since they
+        # may have changed since they were read.  The others are loaded by
+        # the workers from their session files.
+
+        sources = {}
+        for name in names:
+            if name in self.__athletes:
+                sources[name] = self.__athletes[name]
+            else:
+                sources[name] = self.__filenames[name]
+
+        # A single athlete is not worth the cost of starting a process pool.
+
+        if len(sources) <= 1 or workers == 1:
+            return {name: job(source, *arguments) for name, source in sources.items()}
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                name: executor.submit(job, source, *arguments)
+                for name, source in sources.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+
+def _resolve(source) -> Athlete:
+    """Return the Athlete for a worker job source, either an Athlete or the
+    name of a session file."""
+
+    if isinstance(source, Athlete):
+        return source
+    return Athlete.load(source)
+
+
+def _activity_summary_job(source, exercise, start, end, group_by, filters):
+    athlete = _resolve(source)
+    if group_by is not None:
+        return athlete.activity_table(
+            group_by, exercise=exercise, start=start, end=end, **filters
+        )
+    return athlete.activity_summary(exercise=exercise, start=start, end=end, **filters)
+
+
+def _goal_summary_job(source, exercise) -> list:
+    athlete = _resolve(source)
+    if exercise is None:
+        goals = athlete.get_goals()
+    else:
+        goals = athlete.get_goals(Activity.activity_dictionary()[exercise])
+    return [(goal, goal.progress(athlete)) for goal in goals]
@@ -0,0 +1,281 @@
+"""This is the py_athletics server module.
+
+The server module provides AthleteServer, a small HTTP/JSON query service
+built on asyncio from the standard library.  It keeps the athletes of a
+Roster loaded in memory and answers queries without paying Athlete.load on
+every call.  It is meant to run on localhost for dashboards and scripts; it
+does no authentication.
+
+Endpoints
+---------
+GET  /athletes
+GET  /athletes/NAME/tally?exercise=Cycle&start=YYYY-MM-DD&end=YYYY-MM-DD
+GET  /athletes/NAME/activities?exercise=Run&start=...&end=...&limit=100
+GET  /athletes/NAME/goals?exercise=Tennis
+POST /athletes/NAME/imports?file=PATH
+GET  /athletes/NAME/imports
+
+All query parameters are optional.  Responses are JSON, with durations in
+seconds and dates in ISO 8601 form.  Query responses are cached by athlete,
+request and the athlete's generation, so a response is reused until the
+athlete changes.
+
+Queries run on worker threads against the athletes' activity snapshots, and
+an import runs in the background on its own worker thread, adding activities
+in batches that are published atomically.  Queries therefore continue to be
+answered while an import runs and never observe a half-applied batch.
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import date
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from athlete.athlete import Athlete
+from helpers.helpers import jsonable
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """An error to be reported to the client with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AthleteServer:
+    """py_athletics AthleteServer class."""
+
+    # Activities from a background import are published this many at a time.
+
+    IMPORT_BATCH = 1000
+
+    def __init__(self, roster, host="127.0.0.1", port=8080, cache_size=1024):
+        """Create a server for the athletes of a Roster.  Every athlete is
+        loaded when the server starts."""
+
+        self.roster = roster
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.imports = {}
+
+    async def serve_forever(self) -> None:
+        """Load the roster's athletes and serve requests until cancelled."""
+
+        for name in self.roster.names():
+            self.roster.get_athlete(name)
+
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer) -> None:
+        """Serve HTTP/1.1 requests on one connection until the client closes
+        it or asks for it to be closed."""
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                    status, body = await self.respond(method, target)
+                except HTTPError as error:
+                    status, body = error.status, self.encode({"error": str(error)})
+                except ValueError as error:
+                    status, body = 400, self.encode({"error": str(error)})
+                except Exception as error:
+                    status, body = 500, self.encode({"error": str(error)})
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(self.response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def response(status: int, body: bytes, keep_alive: bool) -> bytes:
+        """Return a complete HTTP response."""
+
+        connection = "keep-alive" if keep_alive else "close"
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {connection}\r\n\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    @staticmethod
+    def encode(data) -> bytes:
+        return json.dumps(jsonable(data)).encode("utf-8")
+
+    async def respond(self, method: str, target: str) -> tuple:
+        """Route a request and return an HTTP status and a response body."""
+
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if parts == ["athletes"]:
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return 200, self.encode(self.athletes())
+
+        if len(parts) != 3 or parts[0] != "athletes":
+            raise HTTPError(404, "no such resource")
+
+        name, resource = parts[1], parts[2]
+        if name not in self.roster:
+            raise HTTPError(404, f"unknown athlete: {name}")
+
+        if resource == "imports":
+            if method == "POST":
+                return 202, self.encode(self.start_import(name, query))
+            if method == "GET":
+                return 200, self.encode(self.imports.get(name, []))
+            raise HTTPError(405, "use GET or POST")
+
+        if method != "GET":
+            raise HTTPError(405, "use GET")
+
+        queries = {
+            "tally": self.tally,
+            "activities": self.activities,
+            "goals": self.goals,
+        }
+        if resource not in queries:
+            raise HTTPError(404, "no such resource")
+
+        athlete = self.roster.get_athlete(name)
+        generation = athlete.generation
+        key = (name, generation, resource, tuple(sorted(query.items())))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return 200, self.cache[key]
+
+        def run_query():
+            return self.encode(queries[resource](athlete, **query))
+
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(None, run_query)
+        except TypeError as error:
+            raise HTTPError(400, str(error))
+
+        # A result computed while an import published new activities may
+        # mix versions, so it is returned but not cached.
+
+        if athlete.generation == generation:
+            self.cache[key] = body
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return 200, body
+
+    def athletes(self) -> list:
+        result = []
+        for name in self.roster.names():
+            athlete = self.roster.get_athlete(name)
+            result.append(
+                {
+                    "name": name,
+                    "activities": athlete.activity_count(),
+                    "goals": len(athlete.get_goals()),
+                    "generation": athlete.generation,
+                }
+            )
+        return result
+
+    @staticmethod
+    def tally(athlete, exercise=None, start=None, end=None) -> list:
+        summary = athlete.activity_summary(exercise=exercise, start=start, end=end)
+        result = []
+        for name, tally in summary.items():
+            data = {"exercise": name}
+            data.update(tally)
+            result.append(data)
+        return result
+
+    @staticmethod
+    def activities(athlete, exercise=None, start=None, end=None, limit=None) -> list:
+        if limit is not None:
+            limit = int(limit)
+        if end is None:
+            end = date.today()
+        activities = athlete.query(
+            exercise, start=start, end=end, order="descending", limit=limit
+        )
+        return [activity.as_dict() for activity in activities]
+
+    @staticmethod
+    def goals(athlete, exercise=None) -> list:
+        return athlete.goal_summary(exercise)
+
+    def start_import(self, name: str, query: dict) -> dict:
+        """Start a background import of a Garmin activity file and return
+        its status record."""
+
+        if "file" not in query:
+            raise HTTPError(400, "file is required")
+
+        status = {"file": query["file"], "state": "running", "added": 0}
+        self.imports.setdefault(name, []).append(status)
+        asyncio.get_running_loop().create_task(self.run_import(name, status))
+        return status
+
+    async def run_import(self, name: str, status: dict) -> None:
+        athlete = self.roster.get_athlete(name)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.import_file, athlete, status)
+            status["state"] = "done"
+        except (OSError, ValueError, TypeError, KeyError) as error:
+            status["state"] = "failed"
+            status["error"] = str(error)
+
+    def import_file(self, athlete, status: dict) -> None:
+        """Parse a Garmin file and add its activities in batches.  Runs on a
+        worker thread."""
+
+        activities = Athlete.parse_garmin_activity_file(status["file"])
+        while True:
+            chunk = list(islice(activities, self.IMPORT_BATCH))
+            if not chunk:
+                break
+            with athlete.batch():
+                before = len(athlete.snapshot())
+                for activity in chunk:
+                    athlete.add_activity(activity)
+            status["added"] += len(athlete.snapshot()) - before
@@ -1,9 +1,13 @@
 import cmd
-import readline
-import os
-import shlex
-from collections import defaultdict
-from athlete.athlete import Athlete
+from athlete.athlete import Athlete, format_activity_summary, format_activity_table
+from helpers.helpers import parse
+from roster.roster import Roster
+from profiling.profiling import profiler
+from time import perf_counter
+
+# readline is imported by cmd.Cmd.cmdloop when the interactive loop starts,
+# and shlex and os are imported by the commands that use them, so scripted
+# and batch invocations do not pay for them at startup.
 
 
 class PythonAthleticsShell(cmd.Cmd):
@@ -20,6 +24,73 @@ class PythonAthleticsShell(cmd.Cmd):
     file = None
 
     athlete = Athlete()
+    roster = Roster()
+
+    # When profiling is enabled, precmd records the start time of each
+    # command and postcmd charges the elapsed time to the command name.
+
+    command_started = None
+
+    # The session file is the file the current athlete was most recently
+    # loaded from or saved to, or None for a roster athlete without one.
+    # With autosave on, postcmd saves the athlete to it in the background
+    # every autosave_every commands, unless the athlete is unchanged since
+    # the last save, which saved records as an (athlete, generation) tuple.
+
+    session_filename = "py_athletics.pickle"
+    autosave_every = 0
+    commands_since_save = 0
+    saved = None
+
+    def precmd(self, line: str) -> str:
+        if profiler.enabled:
+            self.command_started = perf_counter()
+        return line
+
+    def postcmd(self, stop, line: str):
+        if self.command_started is not None:
+            elapsed = perf_counter() - self.command_started
+            self.command_started = None
+            if profiler.enabled:
+                name = line.split(maxsplit=1)[0] if line.strip() else "<empty>"
+                profiler.record_command(name, elapsed)
+
+        if PythonAthleticsShell.autosave_every and not stop:
+            self.commands_since_save += 1
+            if self.commands_since_save >= PythonAthleticsShell.autosave_every:
+                self.commands_since_save = 0
+                athlete = PythonAthleticsShell.athlete
+                if self.saved != (athlete, athlete.generation):
+                    self.start_save(PythonAthleticsShell.session_filename)
+        return stop
+
+    def use_athlete(self, athlete: Athlete, filename: str) -> None:
+        """Make athlete the current athlete, with filename as its session
+        file.  Without a session file autosave is turned off, so one
+        athlete is never saved over another's session."""
+
+        PythonAthleticsShell.athlete = athlete
+        PythonAthleticsShell.session_filename = filename
+        self.saved = (athlete, athlete.generation)
+        self.commands_since_save = 0
+
+        if filename is None and PythonAthleticsShell.autosave_every:
+            PythonAthleticsShell.autosave_every = 0
+            print("autosave off: the athlete has no session file, save it first")
+
+    def start_save(self, filename: str) -> None:
+        """Save the current athlete in the background and report when the
+        save is complete."""
+
+        athlete = PythonAthleticsShell.athlete
+        self.saved = (athlete, athlete.generation)
+        athlete.save_in_background(filename, callback=self.report_save)
+
+    def report_save(self, filename: str, error) -> None:
+        if error is None:
+            print(f"save completed: {filename}")
+        else:
+            print(f"save command failed: {error}")
 
     def do_load(self, arg):
         """Restore py_athletics session from a file.
@@ -27,6 +98,17 @@ class PythonAthleticsShell(cmd.Cmd):
         The default filename is py_athletics.pickle, a different name can be
         specified with the filename argument.
 
+        Changes recorded in the session's journal since it was last saved
+        are replayed, and further changes are recorded in the journal.
+
+        Only the session file itself is read.  The activities of each
+        exercise and year are read from the session's partition files the
+        first time a command needs them.
+
+        Activities that started more than three months before the current
+        month are kept in compact monthly blocks that summaries add up
+        without looking at each activity.
+
         Optional Parameters
         -------------------
         filename: string
@@ -39,7 +121,9 @@ class PythonAthleticsShell(cmd.Cmd):
         try:
             if not arg:
                 arg = "py_athletics.pickle"
-            PythonAthleticsShell.athlete = Athlete.load(arg)
+            with profiler.allocations("load"):
+                athlete = Athlete.load(arg)
+            self.use_athlete(athlete, arg)
         except (ValueError, TypeError, FileNotFoundError) as message:
             print(f"load command failed: {message}")
 
@@ -49,6 +133,19 @@ class PythonAthleticsShell(cmd.Cmd):
         The default filename is py_athletics.pickle, a different name can be
         specified with the filename argument.
 
+        Once a session has been loaded or saved, changes are recorded as
+        they are made in a journal next to the session file, named after it
+        with a .journal suffix.  Saving to the same file only rewrites the
+        whole session, and empties the journal, once the journal is large.
+
+        Activities are saved in partition files, one for each exercise and
+        year, in a directory named after the session file with a .partitions
+        suffix.  Only partitions changed since the last save are written.
+
+        The session is written in the background, so commands can be
+        entered while it is saved.  A message reports when the save is
+        complete.  See also autosave.
+
         Optional Parameters
         -------------------
         filename: string
@@ -61,10 +158,54 @@ class PythonAthleticsShell(cmd.Cmd):
         try:
             if not arg:
                 arg = "py_athletics.pickle"
-            PythonAthleticsShell.athlete.save(arg)
+            self.start_save(arg)
+            PythonAthleticsShell.session_filename = arg
         except Exception as message:
             print(f"save command failed: {message}")
 
+    def do_autosave(self, arg):
+        """Save the session in the background every few commands.
+
+        With every=N, the session is saved to the file most recently loaded
+        or saved, py_athletics.pickle by default, after every N commands if
+        the athlete has changed.  Use every=0 or off to turn autosave off.
+        Without arguments the current setting is displayed.  Switching to a
+        roster athlete without a session file turns autosave off.
+
+        Optional Parameters
+        -------------------
+        every: a non-negative integer
+
+        Examples
+        --------
+        autosave
+        autosave every=10
+        autosave off
+        """
+        try:
+            if not arg:
+                every = PythonAthleticsShell.autosave_every
+                if every:
+                    filename = PythonAthleticsShell.session_filename
+                    print(f"autosave every {every} commands to {filename}")
+                else:
+                    print("autosave off")
+                return
+
+            if arg.strip() == "off":
+                every = 0
+            else:
+                every = parse(arg).pop("every", None)
+                if not isinstance(every, int) or every < 0:
+                    raise ValueError("every must be a non-negative integer")
+                if every and PythonAthleticsShell.session_filename is None:
+                    raise ValueError("the athlete has no session file, save it first")
+
+            PythonAthleticsShell.autosave_every = every
+            self.commands_since_save = 0
+        except (ValueError, TypeError) as message:
+            print(f"autosave command failed: {message}")
+
     def do_read(self, arg):
         """Read a Garmin activity file and create Activity objects.
 
@@ -89,28 +230,82 @@ class PythonAthleticsShell(cmd.Cmd):
         try:
             if not arg:
                 arg = "Activities.csv"
-            PythonAthleticsShell.athlete.read_garmin_activity_file(arg)
+            athlete = PythonAthleticsShell.athlete
+            flagged = len(athlete.flagged_duplicates())
+            with profiler.allocations("read"):
+                athlete.read_garmin_activity_file(arg)
+            flagged = len(athlete.flagged_duplicates()) - flagged
+            if flagged:
+                print(f"{flagged} possible duplicate activities, see dedupe")
         except Exception as message:
             print(f"read command failed: {message}")
 
+    def do_dedupe(self, arg):
+        """Find near-duplicate Activities and flag or merge them.
+
+        Activities of any exercise are near-duplicates when their starts and
+        durations differ by no more than the start and duration tolerances,
+        in seconds, and, when both have a distance, their distances differ by
+        no more than the distance tolerance, in miles.  The defaults are 120
+        seconds, 120 seconds and 0.1 miles.
+
+        In flag mode, the default, near-duplicates are listed.  In merge mode
+        each near-duplicate is removed and any details missing from the
+        earliest Activity of its group are copied from it.  The mode and
+        tolerances are remembered and also apply to Activities read later.
+
+        Optional Parameters
+        -------------------
+        mode: string = {flag|merge}
+        start: a non-negative integer
+        duration: a non-negative integer
+        distance: a non-negative number
+
+        Examples
+        --------
+        dedupe
+        dedupe start=300 duration=300
+        dedupe mode=merge
+        """
+        try:
+            Athlete.dedupe(PythonAthleticsShell.athlete, **parse(arg))
+        except (ValueError, TypeError) as message:
+            print(f"py_athletics command failed: {message}")
+
     def do_add_goal(self, arg):
         """Add a Goal.
 
         Adds a goal and replaces existing Goals for the same exercise,
         timeframe and metric.  The distance metric is only valid for Cycle,
-        Run and Walk activities.
+        Run and Walk activities.  A rolling goal applies its target to the
+        trailing days ending on each day, and days is required for rolling
+        goals only.
+
+        A composite goal counts several exercises, separated by commas, or
+        only activities with one of the Garmin activity types, also
+        separated by commas, or both.
 
         Keyword Parameters
         ------------------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}, or several
+            separated by commas
         metric: string = {count|distance|duration}
-        timeframe: string = {month|year|cumulative}
+        timeframe: string = {month|year|cumulative|rolling}
         target: a positive integer
 
+        Optional Parameters
+        -------------------
+        days: a positive integer
+        garmin_activity_type: string, or several separated by commas
+
         Examples
         --------
         add_goal exercise=Cycle metric=distance timeframe=year target=1500
         add_goal exercise=Tennis metric=count timeframe=month target=8
+        add_goal exercise=Cycle metric=distance timeframe=rolling target=150 days=28
+        add_goal exercise=Cycle,Run,Walk metric=duration timeframe=year target=300
+        add_goal exercise=Run metric=count timeframe=month target=12
+            garmin_activity_type="Running,Treadmill Running"
         """
         try:
             Athlete.add_goal(PythonAthleticsShell.athlete, **parse(arg))
@@ -120,16 +315,25 @@ class PythonAthleticsShell(cmd.Cmd):
     def do_delete_goal(self, arg):
         """Delete a Goal.
 
+        Composite goals are deleted with the same exercises and Garmin
+        activity types they were added with.
+
         Keyword Parameters
         ------------------
-        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}, or several
+            separated by commas
         metric: string = {count|distance|duration}
-        timeframe: string = {month|year|cumulative}
+        timeframe: string = {month|year|cumulative|rolling}
+
+        Optional Parameters
+        -------------------
+        garmin_activity_type: string, or several separated by commas
 
         Examples
         --------
         delete_goal exercise=Cycle metric=distance timeframe=year
         delete_goal exercise=Tennis metric=count timeframe=month
+        delete_goal exercise=Cycle,Run,Walk metric=duration timeframe=year
         """
         try:
             Athlete.delete_goal(PythonAthleticsShell.athlete, **parse(arg))
@@ -164,21 +368,42 @@ class PythonAthleticsShell(cmd.Cmd):
 
         A goal summary shows the goal and how the athlete is tracking relative
         to the goal for the appropriate timeframe.  In addition, for monthly
-        goals, summary information for prior months is also shown.
+        and annual goals, summary information for prior months and years is
+        also shown, and for cumulative goals, the dates on which a quarter,
+        half, three quarters and all of the target were reached.
+
+        The athlete keyword summarizes a roster athlete, or with athlete=all
+        every roster athlete in parallel, instead of the current athlete.
+        Keyword form is required when it is used.
 
         Optional Parameters
         -------------------
         exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        athlete: string = {roster athlete name|all}
 
         Examples
         --------
         summarize_goals
         summarize_goals Cycle
+        summarize_goals exercise=Cycle athlete=all
         """
         try:
-            if not arg:
-                arg = None
-            Athlete.summarize_goals(PythonAthleticsShell.athlete, arg)
+            if "=" in arg:
+                arguments = parse(arg)
+            else:
+                arguments = {"exercise": arg or None}
+            target = arguments.pop("athlete", None)
+
+            if target is None:
+                Athlete.summarize_goals(PythonAthleticsShell.athlete, **arguments)
+            else:
+                names = self.roster_names(target)
+                roster = PythonAthleticsShell.roster
+                for name, results in roster.summarize_goals(names, **arguments).items():
+                    print(f"Athlete: {name}")
+                    for goal, progress in results:
+                        for line in goal.report_lines(progress):
+                            print(line)
         except (ValueError, TypeError) as message:
             print(f"py_athletics command failed: {message}")
 
@@ -187,19 +412,26 @@ class PythonAthleticsShell(cmd.Cmd):
 
         If exercise is specified the listing is limited to that exercise.
         A timeframe for the listing can be established with one or both of the
-        start and end keywords.
+        start and end keywords.  The venue, venue_type, type, partner and
+        trainer keywords limit the listing to Activities with those values.
 
         Optional Parameters
         -------------------
         exercise: string = {Cycle|Run|Tennis|Walk|Workout}
         start: string in the form YYYY-MM-DD
         end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
 
         Examples
         --------
         show_activities
         show_activities exercise=Tennis
         show_activities exercise=Tennis start=2021-05-01 end=2021-06-30
+        show_activities exercise=Tennis partner=Mary
         """
         try:
             Athlete.show_activities(PythonAthleticsShell.athlete, **parse(arg))
@@ -211,26 +443,336 @@ class PythonAthleticsShell(cmd.Cmd):
 
         If exercise is specified the listing is limited to that exercise.
         A timeframe for the listing can be established with one or both of the
-        start and end keywords.
+        start and end keywords.  The venue, venue_type, type, partner and
+        trainer keywords limit the summary to Activities with those values.
+
+        With group_by, each exercise is summarized separately for each year,
+        month, ISO week, weekday, hour of the day, type or Garmin activity
+        type.
+
+        The athlete keyword summarizes a roster athlete, or with athlete=all
+        every roster athlete in parallel, instead of the current athlete.
 
         Optional Parameters
         -------------------
         exercise: string = {Cycle|Run|Tennis|Walk|Workout}
         start: string in the form YYYY-MM-DD
         end: string in the form YYYY-MM-DD
+        venue: string
+        venue_type: string
+        type: string
+        partner: string
+        trainer: string
+        group_by: string = {year|month|iso_week|weekday|hour|type|garmin_activity_type}
+        athlete: string = {roster athlete name|all}
 
         Examples
         --------
         summarize_activities
         summarize_activities exercise=Tennis
         summarize_activities exercise=Tennis start=2021-05-01 end=2021-06-30
+        summarize_activities athlete=all start=2021-01-01
+        summarize_activities exercise=Workout trainer=Sam
+        summarize_activities exercise=Run start=2021-01-01 group_by=month
         """
 
         try:
-            Athlete.summarize_activities(PythonAthleticsShell.athlete, **parse(arg))
+            arguments = parse(arg)
+            target = arguments.pop("athlete", None)
+
+            if target is None:
+                Athlete.summarize_activities(PythonAthleticsShell.athlete, **arguments)
+            else:
+                names = self.roster_names(target)
+                roster = PythonAthleticsShell.roster
+                summaries = roster.summarize_activities(names, **arguments)
+                group_by = arguments.get("group_by")
+                for name, summary in summaries.items():
+                    print(f"Athlete: {name}")
+                    if group_by is not None:
+                        for line in format_activity_table(summary, group_by):
+                            print(line)
+                        continue
+                    for exercise, tally in summary.items():
+                        print(format_activity_summary(exercise, tally))
         except (ValueError, TypeError) as message:
             print(f"py_athletics command failed: {message}")
 
+    def do_search(self, arg):
+        """Display the Activities whose descriptions match a query.
+
+        All of the words in the query must appear in a matching description.
+        Case is ignored and a word ending with * matches any word that
+        begins with it.  Matching Activities are listed in time order.  If
+        exercise is specified the listing is limited to that exercise.  A
+        timeframe for the listing can be established with one or both of the
+        start and end keywords.
+
+        Parameters
+        ----------
+        query: string
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+
+        Examples
+        --------
+        search query=chicago
+        search query="lake shore" exercise=Run
+        search query=chi* start=2021-05-01 end=2021-06-30
+        """
+        try:
+            arguments = parse(arg)
+
+            # parse turns a query of digits into an integer.
+
+            if isinstance(arguments.get("query"), int):
+                arguments["query"] = str(arguments["query"])
+            Athlete.search(PythonAthleticsShell.athlete, **arguments)
+        except (ValueError, TypeError) as message:
+            print(f"py_athletics command failed: {message}")
+
+    def do_training_load(self, arg):
+        """Display training load.
+
+        The training stress of a day is the sum of the Training Stress
+        Scores of the day's Activities, as read from a Garmin activity file.
+        The acute training load (ATL) and chronic training load (CTL) are
+        exponentially weighted averages of the daily training stress over 7
+        and 42 days, and the training stress balance (TSB) for a day is the
+        previous day's CTL less its ATL.  The command shows the values at
+        the end of the timeframe, their change over the timeframe and the
+        values for every day in it.  The timeframe defaults to the week
+        ending today.
+
+        Optional Parameters
+        -------------------
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+
+        Examples
+        --------
+        training_load
+        training_load end=2021-09-30
+        training_load start=2021-09-01 end=2021-09-30
+        """
+        try:
+            Athlete.show_training_load(PythonAthleticsShell.athlete, **parse(arg))
+        except (ValueError, TypeError) as message:
+            print(f"py_athletics command failed: {message}")
+
+    def do_streaks(self, arg):
+        """Display activity streaks and gaps.
+
+        A streak is a run of consecutive days, or ISO weeks, with at least
+        one Activity of an exercise and a gap is a run of days or weeks
+        without.  For each exercise the command shows the current streak,
+        which still counts if it ended yesterday or last week, the longest
+        streak with the day or week it ended, the longest gap with the day
+        or week it started and the last day or week with an Activity.
+        Weeks are shown by their Mondays.  If exercise is specified the
+        display is limited to that exercise.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+
+        Examples
+        --------
+        streaks
+        streaks exercise=Run
+        """
+        try:
+            Athlete.show_streaks(PythonAthleticsShell.athlete, **parse(arg))
+        except (ValueError, TypeError) as message:
+            print(f"py_athletics command failed: {message}")
+
+    def do_records(self, arg):
+        """Display personal records.
+
+        Records are kept for the duration, calories and, where they apply,
+        distance, average speed or pace and power of each exercise's
+        Activities.  Without a timeframe the five best Activities for each
+        record are shown, best first.  A timeframe established with one or
+        both of the start and end keywords shows the Activities in it that
+        set a record, beating every earlier Activity, in time order.  The
+        distance keyword, in miles, limits the records to Activities in the
+        same distance band as that distance.  If exercise is specified the
+        display is limited to that exercise.
+
+        Optional Parameters
+        -------------------
+        exercise: string = {Cycle|Run|Tennis|Walk|Workout}
+        start: string in the form YYYY-MM-DD
+        end: string in the form YYYY-MM-DD
+        distance: a non-negative number
+
+        Examples
+        --------
+        records
+        records exercise=Run distance=3.1
+        records exercise=Cycle start=2021-01-01 end=2021-12-31
+        """
+        try:
+            Athlete.show_records(PythonAthleticsShell.athlete, **parse(arg))
+        except (ValueError, TypeError) as message:
+            print(f"py_athletics command failed: {message}")
+
+    def do_profile(self, arg):
+        """Control command profiling.
+
+        With profiling on, py_athletics records the wall time and call count
+        of every command, the time spent in named phases such as parsing
+        Garmin files, tallying activities and reporting goals, and cProfile
+        data.  The report shows commands and phases by total time followed
+        by the top cProfile entries by cumulative time.  Profiling is off by
+        default and adds no measurable cost while off.
+
+        Parameters
+        ----------
+        action: string = {on|off|report|reset}
+
+        Examples
+        --------
+        profile on
+        profile report
+        profile off
+        """
+
+        action = arg.strip()
+        if action == "on":
+            profiler.enable()
+        elif action == "off":
+            profiler.disable()
+        elif action == "report":
+            profiler.report()
+        elif action == "reset":
+            profiler.reset()
+        else:
+            print("profile command failed: action must be on, off, report or reset")
+
+    def do_stats(self, arg):
+        """Display memory statistics.
+
+        The report shows the number of activities of each exercise with the
+        estimated bytes per activity, the estimated size of each index or
+        cache structure and the number of goals for each exercise.
+
+        With "stats tracemalloc on", the load and read commands report the
+        source lines that allocated the most memory while they ran.
+        "stats tracemalloc off" turns this off again.
+
+        Optional Parameters
+        -------------------
+        tracemalloc: string = {on|off}
+
+        Examples
+        --------
+        stats
+        stats tracemalloc on
+        """
+
+        tokens = arg.split()
+        if tokens in (["tracemalloc", "on"], ["tracemalloc", "off"]):
+            profiler.trace_allocations = tokens[1] == "on"
+            return
+
+        if tokens:
+            print("stats command failed: use stats or stats tracemalloc on|off")
+            return
+
+        report = PythonAthleticsShell.athlete.memory_report()
+
+        print(f"{'Exercise':10} {'Activities':>12} {'Bytes each':>12} {'Bytes':>14}")
+        for name, usage in report["activities"].items():
+            count = usage["count"]
+            each = usage["bytes_per_activity"]
+            print(f"{name:10} {count:12,} {each:12,} {usage['bytes']:14,}")
+        print()
+
+        print(f"{'Structure':37} {'Bytes':>14}")
+        for name, structure_bytes in report["structures"].items():
+            print(f"{name:37} {structure_bytes:14,}")
+        print()
+
+        goals = ", ".join(f"{name} {count}" for name, count in report["goals"].items())
+        print(f"Goals: {goals}")
+        print(f"Estimated total: {report['total_bytes']:,} bytes")
+
+    def do_roster(self, arg):
+        """Manage the roster of athletes.
+
+        A roster holds a team of athletes by name.  An athlete added with a
+        filename is loaded from that saved session the first time it is
+        needed.  An athlete added without a filename is the current session's
+        athlete.  The use action makes a roster athlete the current athlete
+        for all other commands, with the file it was added with, or else the
+        file it was last loaded from or saved to, as the session file for
+        save and autosave.  summarize_activities and summarize_goals
+        accept athlete=name or athlete=all to report on roster athletes.
+
+        Parameters
+        ----------
+        action: string = {add|remove|list|use}
+        name: string, required for add, remove and use
+        filename: string, optional for add
+
+        Examples
+        --------
+        roster add name=alex filename=../test/py_athletics.pickle
+        roster add name=me
+        roster use name=alex
+        roster remove name=alex
+        roster list
+        """
+
+        try:
+            action, _, rest = arg.strip().partition(" ")
+            arguments = parse(rest)
+            roster = PythonAthleticsShell.roster
+            name = arguments.get("name")
+
+            if action == "add":
+                filename = arguments.get("filename")
+                if filename is None:
+                    athlete = PythonAthleticsShell.athlete
+                    roster.add_athlete(name, athlete=athlete)
+                else:
+                    roster.add_athlete(name, filename=filename)
+            elif action == "remove":
+                roster.remove_athlete(name)
+            elif action == "use":
+                athlete = roster.get_athlete(name)
+                filename = roster.filename(name) or athlete.session_file
+                if filename is None and athlete is PythonAthleticsShell.athlete:
+                    filename = PythonAthleticsShell.session_filename
+                self.use_athlete(athlete, filename)
+            elif action == "list":
+                for name in roster.names():
+                    filename = roster.filename(name) or "(session)"
+                    if roster.is_loaded(name):
+                        status = repr(roster.get_athlete(name))
+                    else:
+                        status = "(not loaded)"
+                    print(f"{name:16} {filename:40} {status}")
+            else:
+                raise ValueError("action must be add, remove, list or use")
+        except (ValueError, TypeError, FileNotFoundError) as message:
+            print(f"roster command failed: {message}")
+
+    def roster_names(self, target: str) -> list:
+        """Return the roster athlete names addressed by an athlete keyword
+        value, a single name or all."""
+
+        if target == "all":
+            return PythonAthleticsShell.roster.names()
+        if target not in PythonAthleticsShell.roster:
+            raise ValueError(f"unknown athlete: {target}")
+        return [target]
+
     def do_exit(self, arg):
         """Exit py_athletics."""
         print("Thank you for using py_athletics.")
@@ -272,33 +814,10 @@ class PythonAthleticsShell(cmd.Cmd):
         ! ls ../test/
         """
 
+        import os
+
         try:
             print(arg)
             os.system(arg)
         except Exception as message:
             print(f"OS shell command failed: {message}")
-
-
-def parse(arg: str) -> dict:
-    "py_athletics shell command parser."
-
-    # Valid arguments are of the form keyword=value.
-    # The parser splits arg into tokens and then parses
-    # each resulting token into a keyword value pair to
-    # appear in an argument dictionary that is returned.
-    # The parser also casts integer strings to integers.
-
-    try:
-        token_list = shlex.split(arg)
-        arg_dict = defaultdict(lambda: None)
-        if token_list:
-            arg_dict = dict(token.split("=") for token in token_list)
-    except ValueError:
-        print("could not parse command arguments")
-
-    for key, value in arg_dict.items():
-        try:
-            arg_dict[key] = int(value)
-        except ValueError:
-            pass
-    return arg_dict
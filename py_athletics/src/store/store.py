@@ -0,0 +1,1964 @@
+"""This is the py_athletics store module."""
+
+import itertools
+import os
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from copy import copy
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from heapq import heapify, heappush, heapreplace, merge, nlargest
+from operator import eq, gt, itemgetter
+
+from activity.activity import Activity
+
+# pickle and shutil are imported by the functions that need them, so that
+# importing this module stays cheap.
+
+
+class StringTable:
+    """py_athletics StringTable class.
+
+    A StringTable gives each distinct string an integer code, the position
+    of the string in the table.  Strings are only ever appended, so a code
+    stays valid for the life of the table and readers can decode while the
+    writer encodes new strings.
+    """
+
+    __slots__ = ("_strings", "_codes")
+
+    def __init__(self, strings: list = ()):
+        """Create a StringTable with the specified strings, if any."""
+
+        self._strings = list(strings)
+        self._codes = {string: code for code, string in enumerate(self._strings)}
+
+    def __repr__(self) -> str:
+        return f"(StringTable of {len(self)} strings)"
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getstate__(self) -> list:
+        return self._strings
+
+    def __setstate__(self, state: list) -> None:
+        self.__init__(state)
+
+    def copy(self):
+        """Return a copy of the StringTable."""
+
+        return StringTable(self._strings)
+
+    def encode(self, string: str) -> int:
+        """Return the code of a string, adding the string if it is new."""
+
+        code = self._codes.get(string)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(string)
+            self._codes[string] = code
+        return code
+
+    def encode_all(self, strings: list) -> list:
+        """Return the codes of a list of strings and Nones, with -1 for
+        None, adding the strings that are new."""
+
+        codes = self._codes
+        encode = self.encode
+        return [
+            -1 if string is None else codes.get(string) or encode(string)
+            for string in strings
+        ]
+
+    def code(self, string: str) -> int:
+        """Return the code of a string, or None if the string is not in the
+        table."""
+
+        return self._codes.get(string)
+
+    def decode(self, code: int) -> str:
+        """Return the string with the specified code."""
+
+        return self._strings[code]
+
+
+class ActivitySnapshot:
+    """py_athletics ActivitySnapshot class.
+
+    An ActivitySnapshot is an immutable, versioned view of an Athlete's
+    activities, returned by Athlete.snapshot.
+
+    The Athlete keeps the recent activities of each Activity subclass in an
+    append-only list, and older activities frozen in ActivityBlocks.  A
+    snapshot records each list together with its length when the snapshot
+    was published, and the blocks at that time, so activities appended
+    later are not visible through it and nothing has to be copied to create
+    it.  Readers can iterate a snapshot from any thread, without locks,
+    while the Athlete continues to add activities.  The partition aggregates
+    published with the snapshot add up exactly the activities it holds.
+    """
+
+    __slots__ = ("version", "_lists", "_blocks", "_strings", "aggregates")
+
+    def __init__(
+        self,
+        version: int,
+        lists: dict,
+        blocks: dict = None,
+        strings: StringTable = None,
+        aggregates: dict = None,
+    ):
+        """Create an ActivitySnapshot.
+
+        The lists argument maps Activity subclasses to (list, length) tuples,
+        the blocks argument Activity subclasses to tuples of ActivityBlocks
+        whose categorical attributes are encoded with strings, and the
+        aggregates argument (Activity subclass, year) keys to the aggregates
+        of those partitions.
+        """
+
+        self.version = version
+        self._lists = lists
+        self._blocks = blocks or {}
+        self._strings = strings
+        self.aggregates = aggregates or {}
+
+    def __repr__(self) -> str:
+        return f"(ActivitySnapshot version {self.version} of {len(self)} activities)"
+
+    def __len__(self) -> int:
+        return sum(self.count(activity_subclass) for activity_subclass in self._lists)
+
+    def __iter__(self):
+        return self.activities()
+
+    def count(self, activity_subclass=None) -> int:
+        """Return the number of activities, optionally limited to the
+        specified Activity subclass."""
+
+        if activity_subclass is None:
+            return len(self)
+        return self._lists[activity_subclass][1] + sum(
+            len(block) for block in self._blocks.get(activity_subclass, ())
+        )
+
+    def recent_activities(self, activity_subclass):
+        """Return an iterator over the activities of the specified Activity
+        subclass that are not frozen in blocks, in the order they were
+        added."""
+
+        activities, length = self._lists[activity_subclass]
+        return iter(activities[:length])
+
+    def blocks(self, activity_subclass) -> tuple:
+        """Return the ActivityBlocks of the specified Activity subclass."""
+
+        return self._blocks.get(activity_subclass, ())
+
+    def activities(
+        self,
+        activity_subclass=None,
+        start: date = None,
+        end: date = None,
+        where: dict = None,
+    ):
+        """Return an iterator over the activities, optionally limited to the
+        specified Activity subclass, to activities that started on or
+        between the start and end dates and to activities whose attributes
+        have the values in the where dictionary.  Recent activities come
+        first, in the order they were added, then those of the blocks.  Only
+        blocks for months in the timeframe are turned into activities, and
+        only their activities that match."""
+
+        if activity_subclass is None:
+            return (
+                activity
+                for activity_subclass in self._lists
+                for activity in self.activities(activity_subclass, start, end, where)
+            )
+
+        return self.__activities(activity_subclass, start, end, where)
+
+    def __activities(self, activity_subclass, start: date, end: date, where: dict):
+        """Generate the activities of one Activity subclass for activities."""
+
+        if start is None and end is None and not where:
+            yield from self.recent_activities(activity_subclass)
+            for block in self.blocks(activity_subclass):
+                yield from block.activities(self._strings)
+            return
+
+        start = start or date.min
+        end = end or date.max
+        where = where or {}
+
+        for activity in self.recent_activities(activity_subclass):
+            if start <= activity.start.date() <= end and all(
+                getattr(activity, name, None) == value for name, value in where.items()
+            ):
+                yield activity
+
+        for block in self.blocks(activity_subclass):
+            if block.first_day() > end or block.last_day() < start:
+                continue
+            for activity in block.activities(self._strings, where):
+                if start <= activity.start.date() <= end:
+                    yield activity
+
+
+def empty_aggregate(activity_subclass) -> dict:
+    """Return an aggregate with no activities for an Activity subclass.
+
+    An aggregate has the count, calories, duration and, for Cycle, Run and
+    Walk, distance that Activity.tally adds up.
+    """
+
+    aggregate = {"count": 0, "calories": 0, "duration": timedelta()}
+    if activity_subclass.__name__ in ("Cycle", "Run", "Walk"):
+        aggregate["distance"] = Decimal(0)
+    return aggregate
+
+
+def accumulate(aggregate: dict, activity: Activity, sign: int = 1) -> None:
+    """Add an activity to an aggregate, or with a sign of -1 remove it."""
+
+    accumulate_values(
+        aggregate,
+        activity.duration,
+        activity.calories,
+        activity.distance if "distance" in aggregate else None,
+        sign,
+    )
+
+
+def accumulate_values(
+    aggregate: dict, duration, calories, distance, sign: int = 1
+) -> None:
+    """Add the duration, calories and distance of an activity to an
+    aggregate, or with a sign of -1 remove them."""
+
+    aggregate["count"] += sign
+    aggregate["duration"] += sign * duration
+    if calories:
+        aggregate["calories"] += sign * calories
+    if "distance" in aggregate and distance:
+        aggregate["distance"] += sign * distance
+
+
+class ActivityBlock:
+    """py_athletics ActivityBlock class.
+
+    An ActivityBlock holds the activities of one Activity subclass that
+    started in one month, frozen into columns.  Integer, datetime, timedelta,
+    time and Decimal attributes are stored in arrays of 64-bit integers,
+    Decimals as a coefficient and an exponent.  The categorical string
+    attributes are stored as arrays of codes in the Athlete's StringTable,
+    so comparing them is comparing integers.  Other attributes are stored
+    in tuples.  A block also holds the aggregate of its activities, so
+    tallying a whole month does not look at the activities at all.
+
+    Blocks never change.  Activity objects are created from a block when
+    they are listed, and a block is replaced by its activities again when
+    one of them has to change.
+    """
+
+    __slots__ = (
+        "activity_subclass",
+        "year",
+        "month",
+        "aggregate",
+        "_names",
+        "_columns",
+        "_length",
+    )
+
+    EPOCH = datetime(1970, 1, 1)
+    MICROSECOND = timedelta(microseconds=1)
+
+    # The attributes, by their names in the activities' dictionaries, that
+    # are encoded with the StringTable, and the names of those that differ
+    # from the attributes' public names.
+
+    CATEGORICAL = (
+        "_Activity__garmin_activity_type",
+        "description",
+        "venue",
+        "venue_type",
+        "type",
+        "partner",
+        "trainer",
+    )
+    ATTRIBUTE_NAMES = {"garmin_activity_type": "_Activity__garmin_activity_type"}
+
+    # Missing values are stored as the smallest 64-bit integer.
+
+    NONE = -(1 << 63)
+    LARGEST = (1 << 63) - 1
+    MISSING = {"code": -1, "object": None}
+
+    def __init__(self, activity_subclass, activities: list, strings: StringTable):
+        """Create an ActivityBlock from a non-empty list of activities of
+        activity_subclass that started in the same month, encoding their
+        categorical attributes with strings.
+
+        Raise ValueError if the activities do not have the same attributes.
+        """
+
+        activities = sorted(activities, key=lambda activity: activity.start)
+        first = activities[0].start
+        for activity in activities:
+            if activity.start.month != first.month or activity.start.year != first.year:
+                raise ValueError("activities must start in the same month")
+
+        dictionaries = ActivityBlock.__dictionaries(activity_subclass, activities)
+        columns = ActivityBlock.__encode_all(dictionaries, strings)
+        self.__set(activity_subclass, first, columns, dictionaries)
+
+    @staticmethod
+    def freeze(activity_subclass, activities: list, strings: StringTable) -> list:
+        """Return a list of ActivityBlocks, one for each month, for a
+        non-empty list of activities of activity_subclass, encoding their
+        categorical attributes with strings.
+
+        The attributes of all the months are encoded at once and the columns
+        then split by month, which is faster than creating the blocks one
+        month at a time when the months hold few activities.
+
+        Raise ValueError if the activities do not have the same attributes.
+        """
+
+        activities = sorted(activities, key=lambda activity: activity.start)
+        dictionaries = ActivityBlock.__dictionaries(activity_subclass, activities)
+        columns = ActivityBlock.__encode_all(dictionaries, strings)
+
+        # The activities are sorted, so the rows of each month follow one
+        # another, in the order the months are counted.
+
+        months = Counter(
+            (activity.start.year, activity.start.month) for activity in activities
+        )
+
+        blocks = []
+        last = 0
+        for count in months.values():
+            first = last
+            last += count
+            block = ActivityBlock.__new__(ActivityBlock)
+            block.__set(
+                activity_subclass,
+                activities[first].start,
+                {
+                    name: ActivityBlock.__slice(column, first, last)
+                    for name, column in columns.items()
+                },
+                dictionaries[first:last],
+            )
+            blocks.append(block)
+        return blocks
+
+    @staticmethod
+    def __dictionaries(activity_subclass, activities: list) -> list:
+        """Return the attribute dictionaries of a list of activities of
+        activity_subclass, raising ValueError if they do not have the same
+        attributes."""
+
+        dictionaries = [vars(activity) for activity in activities]
+        keys = dictionaries[0].keys()
+        for activity, dictionary in zip(activities, dictionaries):
+            if type(activity) is not activity_subclass:
+                raise ValueError("activities must be of the same type")
+            if dictionary.keys() != keys:
+                raise ValueError("activities must have the same attributes")
+        return dictionaries
+
+    @staticmethod
+    def __encode_all(dictionaries: list, strings: StringTable) -> dict:
+        """Return a dictionary of the columns of the attributes in a list of
+        attribute dictionaries, keyed by attribute name."""
+
+        return {
+            name: ActivityBlock.__encode(
+                [dictionary[name] for dictionary in dictionaries],
+                strings if name in ActivityBlock.CATEGORICAL else None,
+            )
+            for name in dictionaries[0]
+        }
+
+    def __set(self, activity_subclass, first, columns: dict, dictionaries) -> None:
+        """Set the attributes of a block of activities of activity_subclass
+        that started in the month of the first datetime, from their columns
+        and attribute dictionaries."""
+
+        self.activity_subclass = activity_subclass
+        self.year = first.year
+        self.month = first.month
+        self._names = tuple(columns)
+        self._columns = tuple(columns.values())
+        self._length = len(dictionaries)
+
+        # The aggregate adds up the attribute values as accumulate would add
+        # up the activities.
+
+        self.aggregate = empty_aggregate(activity_subclass)
+        self.aggregate["count"] = self._length
+        self.aggregate["duration"] = sum(
+            (dictionary["duration"] for dictionary in dictionaries), timedelta()
+        )
+        self.aggregate["calories"] = sum(
+            dictionary.get("calories") or 0 for dictionary in dictionaries
+        )
+        if "distance" in self.aggregate:
+            self.aggregate["distance"] = sum(
+                (dictionary.get("distance") or 0 for dictionary in dictionaries),
+                Decimal(0),
+            )
+
+    def __repr__(self) -> str:
+        return (
+            f"(ActivityBlock of {self._length} {self.activity_subclass.__name__} "
+            f"activities for {self.year}-{self.month:02})"
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def key(self) -> tuple:
+        """Get the (subclass, year, month) key of the block."""
+
+        return (self.activity_subclass, self.year, self.month)
+
+    def first_day(self) -> date:
+        """Return the first day of the block's month."""
+
+        return date(self.year, self.month, 1)
+
+    def last_day(self) -> date:
+        """Return the last day of the block's month."""
+
+        if self.month == 12:
+            return date(self.year, 12, 31)
+        return date(self.year, self.month + 1, 1) - timedelta(days=1)
+
+    def contains(self, start: datetime) -> bool:
+        """Return True if the block has an activity with the specified start
+        datetime."""
+
+        column = self._columns[self._names.index("start")]
+        if column[0] != "datetime":
+            return start in column[1]
+
+        starts = column[1]
+        target = (start - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND
+        index = bisect_left(starts, target)
+        return index < len(starts) and starts[index] == target
+
+    def values(self, name: str, strings: StringTable) -> list:
+        """Return the values of the named attribute for the activities in
+        the block, in start order, or None if they do not have it."""
+
+        name = ActivityBlock.ATTRIBUTE_NAMES.get(name, name)
+        if name not in self._names:
+            return None
+        return ActivityBlock.__decode(self._columns[self._names.index(name)], strings)
+
+    def activity(self, start: datetime, strings: StringTable) -> Activity:
+        """Return a new Activity object for the activity in the block with
+        the specified start datetime, or None if there is none.  Only that
+        activity's values are decoded."""
+
+        column = self._columns[self._names.index("start")]
+        if column[0] == "datetime":
+            target = (start - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND
+            row = bisect_left(column[1], target)
+            if row == self._length or column[1][row] != target:
+                return None
+        elif start in column[1]:
+            row = column[1].index(start)
+        else:
+            return None
+
+        activity = self.activity_subclass.__new__(self.activity_subclass)
+        for name, column in zip(self._names, self._columns):
+            if column[0] != "none":
+                parts = (part[row : row + 1] for part in column[1:])
+                column = (column[0], *parts)
+            vars(activity)[name] = ActivityBlock.__decode(column, strings)[0]
+        return activity
+
+    def activities(self, strings: StringTable, where: dict = None) -> list:
+        """Return new Activity objects for the activities in the block, in
+        start order, decoding categorical attributes with strings.
+
+        The where argument, if given, maps attribute names to values, and
+        only activities with those values are returned.  Categorical
+        attributes are compared by their codes, and no activity is created
+        until it is known to match.
+        """
+
+        rows = None
+        if where:
+            rows = self.__select(where, strings)
+            if not rows:
+                return []
+
+        activity_subclass = self.activity_subclass
+        names = self._names
+        columns = [ActivityBlock.__decode(column, strings) for column in self._columns]
+        rows_of_values = zip(*columns)
+        if rows is not None:
+            rows_of_values = list(rows_of_values)
+            rows_of_values = [rows_of_values[row] for row in rows]
+
+        activities = []
+        for values in rows_of_values:
+            activity = activity_subclass.__new__(activity_subclass)
+            activity.__dict__.update(zip(names, values))
+            activities.append(activity)
+        return activities
+
+    @staticmethod
+    def activities_of(blocks: list, strings: StringTable, where: dict = None) -> list:
+        """Return new Activity objects for the activities in a list of blocks
+        of one Activity subclass, block after block, as activities returns
+        them for each block.
+
+        The columns of the blocks are joined and decoded once, which is faster
+        than decoding the blocks one at a time when the months hold few
+        activities, unless the blocks do not have the same attributes.
+        """
+
+        if len(blocks) > 1:
+            joined = ActivityBlock.__join(blocks)
+            if joined is not None:
+                return joined.activities(strings, where)
+
+        activities = []
+        for block in blocks:
+            activities.extend(block.activities(strings, where))
+        return activities
+
+    @staticmethod
+    def __join(blocks: list):
+        """Return a block with the columns of a list of blocks joined, for
+        listing their activities, or None if the blocks do not have the same
+        attributes or their columns are of different kinds.  The joined block
+        has the month of the first block and no aggregate."""
+
+        names = blocks[0]._names
+        if any(block._names != names for block in blocks):
+            return None
+
+        lengths = [block._length for block in blocks]
+        columns = []
+        for parts in zip(*[block._columns for block in blocks]):
+            column = ActivityBlock.__concatenate(parts, lengths)
+            if column is None:
+                return None
+            columns.append(column)
+
+        joined = ActivityBlock.__new__(ActivityBlock)
+        joined.activity_subclass = blocks[0].activity_subclass
+        joined.year = blocks[0].year
+        joined.month = blocks[0].month
+        joined.aggregate = None
+        joined._names = names
+        joined._columns = tuple(columns)
+        joined._length = sum(lengths)
+        return joined
+
+    @staticmethod
+    def __concatenate(columns: list, lengths: list) -> tuple:
+        """Return the column for the values of several columns, with the
+        specified lengths, one after another, or None if they are of different
+        kinds.  Columns without values are filled with missing values, see
+        __missing."""
+
+        kinds = set(map(itemgetter(0), columns))
+        if kinds == {"none"}:
+            return ("none", sum(lengths))
+        filled = "none" in kinds
+        kinds.discard("none")
+        if len(kinds) > 1:
+            return None
+
+        kind = kinds.pop()
+        template = next(column for column in columns if column[0] != "none")
+        if filled:
+            columns = [
+                (
+                    ActivityBlock.__missing(template, length)
+                    if column[0] == "none"
+                    else column
+                )
+                for column, length in zip(columns, lengths)
+            ]
+
+        if kind == "object":
+            values = itertools.chain.from_iterable(map(itemgetter(1), columns))
+            return ("object", tuple(values))
+
+        parts = []
+        for position, part in enumerate(template[1:], 1):
+            part = array(part.typecode)
+            part.frombytes(b"".join(map(itemgetter(position), columns)))
+            parts.append(part)
+        return (kind, *parts)
+
+    @staticmethod
+    def __missing(template: tuple, length: int) -> tuple:
+        """Return a column of the kind of the template column for length
+        missing values, with 0 for the exponents of a Decimal column."""
+
+        kind = template[0]
+        if kind == "object":
+            return ("object", (None,) * length)
+        missing = (ActivityBlock.MISSING.get(kind, ActivityBlock.NONE), 0)
+        return (
+            kind,
+            *(
+                array(part.typecode, [value]) * length
+                for part, value in zip(template[1:], missing)
+            ),
+        )
+
+    def __select(self, where: dict, strings: StringTable) -> list:
+        """Return the positions of the activities whose attributes have the
+        values in where."""
+
+        rows = range(self._length)
+
+        for name, value in where.items():
+            name = ActivityBlock.ATTRIBUTE_NAMES.get(name, name)
+            if name not in self._names:
+                return []
+
+            column = self._columns[self._names.index(name)]
+
+            if column[0] == "code":
+                code = -1 if value is None else strings.code(value)
+                if code is None:
+                    return []
+                codes = column[1]
+                rows = [row for row in rows if codes[row] == code]
+            else:
+                values = ActivityBlock.__decode(column, strings)
+                rows = [row for row in rows if values[row] == value]
+
+            if not rows:
+                return []
+
+        return list(rows)
+
+    @staticmethod
+    def __slice(column: tuple, first: int, last: int) -> tuple:
+        """Return the column for the values of a column from position first
+        up to position last."""
+
+        kind = column[0]
+        length = last - first
+        if kind == "none":
+            return ("none", length)
+
+        # Only Decimal columns have a second part, their exponents.
+
+        values = column[1][first:last]
+        if values.count(ActivityBlock.MISSING.get(kind, ActivityBlock.NONE)) == length:
+            return ("none", length)
+        if kind == "decimal":
+            return (kind, values, column[2][first:last])
+        return (kind, values)
+
+    @staticmethod
+    def __encode(values: list, strings: StringTable = None) -> tuple:
+        """Return a column for a list of attribute values, encoding strings
+        with the StringTable if one is given."""
+
+        present = [value for value in values if value is not None]
+        kinds = {type(value) for value in present}
+
+        if not present:
+            return ("none", len(values))
+
+        # Codes are stored in 32-bit arrays, with -1 for missing values.
+
+        if strings is not None and kinds == {str} and len(strings) < (1 << 31):
+            return ("code", array("i", strings.encode_all(values)))
+
+        if kinds == {int}:
+            integers = present
+            kind = "int"
+        elif kinds == {datetime} and all(value.tzinfo is None for value in present):
+            integers = [
+                (value - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND
+                for value in present
+            ]
+            kind = "datetime"
+        elif kinds == {timedelta}:
+            integers = [value // ActivityBlock.MICROSECOND for value in present]
+            kind = "timedelta"
+        elif kinds == {time} and all(value.tzinfo is None for value in present):
+            integers = [
+                ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000
+                + value.microsecond
+                for value in present
+            ]
+            kind = "time"
+        elif kinds == {Decimal} and all(value.is_finite() for value in present):
+            return ActivityBlock.__encode_decimals(values)
+        else:
+            return ("object", tuple(values))
+
+        # Integers that do not fit, or that are the missing value, are not
+        # encoded.
+
+        try:
+            column = array("q", integers)
+        except OverflowError:
+            return ("object", tuple(values))
+        if ActivityBlock.NONE in column:
+            return ("object", tuple(values))
+
+        if len(present) < len(values):
+            encoded = iter(column)
+            column = array(
+                "q",
+                [
+                    ActivityBlock.NONE if value is None else next(encoded)
+                    for value in values
+                ],
+            )
+        return (kind, column)
+
+    @staticmethod
+    def __encode_decimals(values: list) -> tuple:
+        """Return a column for a list of finite Decimals and Nones."""
+
+        coefficients = []
+        exponents = []
+        encoded = {}
+
+        for value in values:
+            if value is None:
+                coefficients.append(ActivityBlock.NONE)
+                exponents.append(0)
+                continue
+
+            # The digits are taken from the string of the Decimal, which is
+            # faster than as_tuple, unless it is written with an exponent.
+            # Equal Decimals may differ in exponent, so each distinct string,
+            # not value, is only taken apart once.
+
+            string = str(value)
+            if string in encoded:
+                coefficient, exponent = encoded[string]
+                coefficients.append(coefficient)
+                exponents.append(exponent)
+                continue
+
+            if "E" in string:
+                sign, _, exponent = value.as_tuple()
+                coefficient = int(value.scaleb(-exponent))
+            else:
+                sign = string[0] == "-"
+                whole, _, fraction = string.partition(".")
+                exponent = -len(fraction)
+                coefficient = int(whole + fraction)
+
+            if sign or not coefficient <= ActivityBlock.LARGEST:
+                return ("object", tuple(values))
+            if not -(1 << 15) <= exponent < (1 << 15):
+                return ("object", tuple(values))
+            encoded[string] = (coefficient, exponent)
+            coefficients.append(coefficient)
+            exponents.append(exponent)
+
+        return ("decimal", array("q", coefficients), array("h", exponents))
+
+    @staticmethod
+    def __decode(column: tuple, strings: StringTable) -> list:
+        """Return the list of attribute values in a column."""
+
+        kind = column[0]
+        none = ActivityBlock.NONE
+
+        if kind == "none":
+            return [None] * column[1]
+
+        # Columns without missing values, the usual case, are decoded without
+        # testing every value.  Timedeltas are created from positional days,
+        # seconds and microseconds, which is faster than keywords.
+
+        if kind == "code":
+            decode = strings.decode
+            if -1 not in column[1]:
+                return list(map(decode, column[1]))
+            return [None if code == -1 else decode(code) for code in column[1]]
+
+        if kind == "object":
+            return list(column[1])
+
+        integers = column[1]
+        complete = none not in integers
+
+        if kind == "decimal" and complete:
+            return list(map(Decimal.scaleb, map(Decimal, integers), column[2]))
+
+        if kind == "decimal":
+            return [
+                None if coefficient == none else Decimal(coefficient).scaleb(exponent)
+                for coefficient, exponent in zip(integers, column[2])
+            ]
+
+        if kind == "int":
+            if complete:
+                return list(integers)
+            return [None if integer == none else integer for integer in integers]
+
+        if kind == "datetime":
+            epoch = ActivityBlock.EPOCH
+            if complete:
+                return [epoch + timedelta(0, 0, integer) for integer in integers]
+            return [
+                None if integer == none else epoch + timedelta(0, 0, integer)
+                for integer in integers
+            ]
+
+        if kind == "timedelta":
+            if complete:
+                return [timedelta(0, 0, integer) for integer in integers]
+            return [
+                None if integer == none else timedelta(0, 0, integer)
+                for integer in integers
+            ]
+
+        values = []
+        for integer in integers:
+            if integer == none:
+                values.append(None)
+                continue
+            seconds, microsecond = divmod(integer, 1000000)
+            minutes, second = divmod(seconds, 60)
+            hour, minute = divmod(minutes, 60)
+            values.append(time(hour, minute, second, microsecond))
+        return values
+
+
+class DuplicateIndex:
+    """py_athletics DuplicateIndex class.
+
+    A DuplicateIndex keeps activities of every Activity subclass sorted by
+    start and finds near-duplicates: activities whose starts and durations
+    differ by no more than the start and duration tolerances, in seconds,
+    and, when both have a distance, whose distances differ by no more than
+    the distance tolerance, in miles.  The subclass is ignored, so an
+    activity exported twice under different Garmin activity types is found.
+
+    The activities are held in buckets of at most 2 * BUCKET_SIZE sorted
+    starts, so finding and adding an activity take O(log N) comparisons and
+    only a bucket, never the whole index, is shifted by an insert.
+    """
+
+    BUCKET_SIZE = 512
+
+    def __init__(self, start: int = 120, duration: int = 120, distance=Decimal("0.1")):
+        """Create an empty DuplicateIndex with the specified tolerances."""
+
+        self.start_tolerance = timedelta(seconds=start)
+        self.duration_tolerance = timedelta(seconds=duration)
+        self.distance_tolerance = Decimal(distance)
+
+        # Each bucket is a sorted list of starts with a parallel list of
+        # activities.  The first start of each bucket is kept in firsts for
+        # locating the bucket.
+
+        self._starts = []
+        self._activities = []
+        self._firsts = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def is_duplicate(self, activity: Activity, other: Activity) -> bool:
+        """Return True if the two activities are near-duplicates."""
+
+        if abs(activity.start - other.start) > self.start_tolerance:
+            return False
+
+        if abs(activity.duration - other.duration) > self.duration_tolerance:
+            return False
+
+        distance = getattr(activity, "distance", None)
+        other_distance = getattr(other, "distance", None)
+        if distance and other_distance:
+            return abs(distance - other_distance) <= self.distance_tolerance
+
+        return True
+
+    def find(self, activity: Activity) -> Activity:
+        """Return the indexed activity that is a near-duplicate of activity
+        with the closest start, or None if there is none."""
+
+        if not self._starts:
+            return None
+
+        low = activity.start - self.start_tolerance
+        high = activity.start + self.start_tolerance
+
+        bucket = max(bisect_right(self._firsts, low) - 1, 0)
+        position = bisect_left(self._starts[bucket], low)
+
+        # Scan forward from the first start inside the tolerance window,
+        # crossing into following buckets as needed.
+
+        match = None
+        match_offset = None
+        while bucket < len(self._starts):
+            starts = self._starts[bucket]
+            activities = self._activities[bucket]
+            while position < len(starts):
+                if starts[position] > high:
+                    return match
+                candidate = activities[position]
+                offset = abs(candidate.start - activity.start)
+                if candidate is not activity and self.is_duplicate(activity, candidate):
+                    if match is None or offset < match_offset:
+                        match = candidate
+                        match_offset = offset
+                position += 1
+            bucket += 1
+            position = 0
+
+        return match
+
+    def add(self, activity: Activity) -> None:
+        """Add an activity to the index."""
+
+        start = activity.start
+
+        if not self._starts:
+            self._starts.append([start])
+            self._activities.append([activity])
+            self._firsts.append(start)
+            self._length = 1
+            return
+
+        bucket = max(bisect_right(self._firsts, start) - 1, 0)
+        starts = self._starts[bucket]
+        activities = self._activities[bucket]
+        position = bisect_right(starts, start)
+        starts.insert(position, start)
+        activities.insert(position, activity)
+        self._firsts[bucket] = starts[0]
+        self._length += 1
+
+        # Split a bucket that has grown too large in two.
+
+        if len(starts) > 2 * self.BUCKET_SIZE:
+            self._starts[bucket + 1 : bucket + 1] = [starts[self.BUCKET_SIZE :]]
+            self._activities[bucket + 1 : bucket + 1] = [activities[self.BUCKET_SIZE :]]
+            del starts[self.BUCKET_SIZE :]
+            del activities[self.BUCKET_SIZE :]
+            self._firsts.insert(bucket + 1, self._starts[bucket + 1][0])
+
+    def remove(self, activity: Activity) -> None:
+        """Remove an activity from the index, if it is there."""
+
+        start = activity.start
+
+        # Activities with the same start can end one bucket and begin the
+        # next, so the search starts in the bucket before the first bucket
+        # that begins with the start.
+
+        bucket = max(bisect_left(self._firsts, start) - 1, 0)
+        while bucket < len(self._starts) and self._firsts[bucket] <= start:
+            starts = self._starts[bucket]
+            activities = self._activities[bucket]
+            position = bisect_left(starts, start)
+            while position < len(starts) and starts[position] == start:
+                if activities[position] is activity:
+                    del starts[position]
+                    del activities[position]
+                    self._length -= 1
+                    if starts:
+                        self._firsts[bucket] = starts[0]
+                    else:
+                        del self._starts[bucket]
+                        del self._activities[bucket]
+                        del self._firsts[bucket]
+                    return
+                position += 1
+            bucket += 1
+
+    def sweep(self, activities) -> list:
+        """Return a list of (kept, duplicate) activity tuples for the
+        specified activities, in start order.
+
+        The activities are sorted by start and added to this index, which
+        should be empty, in a single pass.  An activity that is a
+        near-duplicate of one already kept is paired with it and not added,
+        so a group of near-duplicates is paired with its earliest activity.
+        """
+
+        pairs = []
+        for activity in sorted(activities, key=lambda activity: activity.start):
+            kept = self.find(activity)
+            if kept is None:
+                self.add(activity)
+            else:
+                pairs.append((kept, activity))
+        return pairs
+
+    @staticmethod
+    def merge(kept: Activity, duplicate: Activity) -> Activity:
+        """Return a copy of kept with the attributes that are missing from
+        kept but present in duplicate copied from duplicate.  Neither
+        activity is changed, as published snapshots may refer to them."""
+
+        merged = copy(kept)
+        for key, value in vars(duplicate).items():
+            if key.startswith("_") or value is None:
+                continue
+            if key in vars(merged) and getattr(merged, key) is None:
+                setattr(merged, key, value)
+        return merged
+
+
+class TextIndex:
+    """py_athletics TextIndex class.
+
+    A TextIndex is an inverted index of the words in activity descriptions.
+    Words are runs of letters and digits, compared without case.  For every
+    word the index keeps, for each Activity subclass name, a sorted array of
+    the starts, in microseconds since 1970, of the activities whose
+    descriptions contain the word.  The words themselves are also kept
+    sorted, so the words with a prefix are found by bisection.
+    """
+
+    __slots__ = ("_postings", "_words")
+
+    def __init__(self):
+        """Create an empty TextIndex."""
+
+        self._postings = {}
+        self._words = []
+
+    def __repr__(self) -> str:
+        return f"(TextIndex of {len(self)} words)"
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def copy(self):
+        """Return a copy of the TextIndex."""
+
+        copy = TextIndex()
+        copy._postings = {
+            word: {name: array("q", starts) for name, starts in postings.items()}
+            for word, postings in self._postings.items()
+        }
+        copy._words = list(self._words)
+        return copy
+
+    @staticmethod
+    def words(text: str) -> set:
+        """Return the set of words in a text, in lower case."""
+
+        import re
+
+        if not text:
+            return set()
+        return set(re.findall(r"\w+", text.casefold()))
+
+    def add(self, activity: Activity) -> None:
+        """Index the words in an activity's description."""
+
+        self.insert(type(activity).__name__, activity.start, activity.description)
+
+    def insert(self, name: str, start: datetime, text: str) -> None:
+        """Index the words in the description text of the activity of the
+        named Activity subclass with the specified start."""
+
+        start = (start - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND
+
+        for word in TextIndex.words(text):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                insort(self._words, word)
+
+            starts = postings.setdefault(name, array("q"))
+            index = bisect_left(starts, start)
+            if index == len(starts) or starts[index] != start:
+                starts.insert(index, start)
+
+    def extend(self, rows) -> None:
+        """Index the words in the description texts of many activities, an
+        iterable of (name, start, text) tuples as passed to insert.  The
+        postings of each word are collected first and then sorted and
+        merged into the index once, instead of once for each activity."""
+
+        # Descriptions repeat, so the starts are grouped by subclass name
+        # and description and each description is split into words once.
+
+        grouped = {}
+        epoch = ActivityBlock.EPOCH
+        microsecond = ActivityBlock.MICROSECOND
+        for name, start, text in rows:
+            grouped.setdefault((name, text), []).append((start - epoch) // microsecond)
+
+        collected = {}
+        for (name, text), starts in grouped.items():
+            for word in TextIndex.words(text):
+                collected.setdefault(word, {}).setdefault(name, []).extend(starts)
+
+        new_words = []
+        for word, new_postings in collected.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                new_words.append(word)
+            for name, starts in new_postings.items():
+                starts.extend(postings.get(name, ()))
+                postings[name] = array("q", sorted(set(starts)))
+
+        if new_words:
+            self._words = sorted(self._words + new_words)
+
+    def remove(self, activity: Activity) -> None:
+        """Remove the words in an activity's description from the index."""
+
+        name = type(activity).__name__
+        start = (activity.start - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND
+
+        for word in TextIndex.words(activity.description):
+            postings = self._postings.get(word)
+            if postings is None or name not in postings:
+                continue
+
+            starts = postings[name]
+            index = bisect_left(starts, start)
+            if index < len(starts) and starts[index] == start:
+                del starts[index]
+
+            if not starts:
+                del postings[name]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def search(
+        self,
+        words: list,
+        prefixes: list,
+        names: tuple,
+        start: date = None,
+        end: date = None,
+    ) -> list:
+        """Return (start, subclass name) tuples, in start order, for the
+        activities of the named Activity subclasses that started on or
+        between the start and end dates and whose descriptions contain every
+        word in words and a word beginning with every prefix in prefixes."""
+
+        first = ActivityBlock.NONE
+        if start is not None:
+            first = (
+                datetime(start.year, start.month, start.day) - ActivityBlock.EPOCH
+            ) // ActivityBlock.MICROSECOND
+        last = ActivityBlock.LARGEST
+        if end is not None:
+            last = (
+                datetime(end.year, end.month, end.day)
+                + timedelta(days=1)
+                - ActivityBlock.EPOCH
+            ) // ActivityBlock.MICROSECOND - 1
+
+        # Each word and prefix matches a set of (name, start) keys, and the
+        # result is their intersection, starting with the smallest.
+
+        matches = []
+        for word in words:
+            matches.append(self.__matches([word], names, first, last))
+        for prefix in prefixes:
+            index = bisect_left(self._words, prefix)
+            prefixed = []
+            while index < len(self._words) and self._words[index].startswith(prefix):
+                prefixed.append(self._words[index])
+                index += 1
+            matches.append(self.__matches(prefixed, names, first, last))
+
+        if not matches:
+            return []
+
+        matches.sort(key=len)
+        result = matches[0]
+        for other in matches[1:]:
+            result &= other
+
+        return sorted(
+            (ActivityBlock.EPOCH + timedelta(microseconds=start), name)
+            for name, start in result
+        )
+
+    def __matches(self, words: list, names: tuple, first: int, last: int) -> set:
+        """Return the set of (name, start) keys of the activities of the
+        named subclasses, started between first and last, with any of the
+        words."""
+
+        matches = set()
+        for word in words:
+            postings = self._postings.get(word, {})
+            for name in names:
+                starts = postings.get(name)
+                if starts is None:
+                    continue
+                low = bisect_left(starts, first)
+                high = bisect_right(starts, last)
+                matches.update((name, start) for start in starts[low:high])
+        return matches
+
+
+class TrainingLoad:
+    """py_athletics TrainingLoad class.
+
+    A TrainingLoad keeps an athlete's daily training stress, the sum of the
+    training stress scores of the activities on each day, and from it the
+    acute and chronic training loads, ATL and CTL, exponentially weighted
+    averages of the daily stress over ATL_DAYS and CTL_DAYS days.  The
+    training stress balance, TSB, for a day is the previous day's CTL less
+    its ATL.
+
+    The loads are kept in arrays with one value per day and are computed up
+    to the last day with stress the first time they are asked for.  Adding
+    stress on a day only discards the loads from that day on, so stress
+    added for the latest day costs one step of the averages, and a day
+    before the first shifts the arrays.  Days after the last day with
+    stress have no stress, so their loads decay geometrically and are not
+    stored.
+    """
+
+    __slots__ = ("_first", "_stress", "_atl", "_ctl")
+
+    ATL_DAYS = 7
+    CTL_DAYS = 42
+
+    def __init__(self):
+        """Create an empty TrainingLoad."""
+
+        self._first = None
+        self._stress = array("d")
+        self._atl = array("d")
+        self._ctl = array("d")
+
+    def __repr__(self) -> str:
+        return f"(TrainingLoad of {len(self._stress)} days)"
+
+    def copy(self):
+        """Return a copy of the TrainingLoad."""
+
+        copy = TrainingLoad()
+        copy._first = self._first
+        copy._stress = array("d", self._stress)
+        copy._atl = array("d", self._atl)
+        copy._ctl = array("d", self._ctl)
+        return copy
+
+    @property
+    def first_day(self) -> date:
+        """Get the first day with training stress, or None."""
+
+        return self._first
+
+    @property
+    def last_day(self) -> date:
+        """Get the last day with training stress, or None."""
+
+        if self._first is None:
+            return None
+        return self._first + timedelta(days=len(self._stress) - 1)
+
+    def add(self, day: date, stress, sign: int = 1) -> None:
+        """Add training stress to a day, or with a sign of -1 remove it."""
+
+        self.__cover(day, day)
+
+        index = (day - self._first).days
+        self._stress[index] += sign * float(stress)
+
+        del self._atl[index:]
+        del self._ctl[index:]
+
+    def extend(self, stresses) -> None:
+        """Add the training stress of many activities, an iterable of (day,
+        stress) tuples.  The arrays are resized and the loads discarded once,
+        not once for each activity."""
+
+        stresses = list(stresses)
+        if not stresses:
+            return
+
+        days = [day for day, _ in stresses]
+        first = min(days)
+        self.__cover(first, max(days))
+
+        stress = self._stress
+        for day, value in stresses:
+            stress[(day - self._first).days] += float(value)
+
+        index = (first - self._first).days
+        del self._atl[index:]
+        del self._ctl[index:]
+
+    def __cover(self, first: date, last: date) -> None:
+        """Extend the daily stress with days without stress so that it
+        covers the days from first to last."""
+
+        if self._first is None:
+            self._first = first
+
+        if first < self._first:
+            days = (self._first - first).days
+            self._stress = array("d", [0.0]) * days + self._stress
+            self._first = first
+            del self._atl[:]
+            del self._ctl[:]
+
+        index = (last - self._first).days
+        if index >= len(self._stress):
+            self._stress.extend(array("d", [0.0]) * (index + 1 - len(self._stress)))
+
+    def __update(self) -> None:
+        """Compute the loads of the days that do not have them yet."""
+
+        computed = len(self._atl)
+        if computed == len(self._stress):
+            return
+
+        atl = self._atl[-1] if computed else 0.0
+        ctl = self._ctl[-1] if computed else 0.0
+        for stress in self._stress[computed:]:
+            atl += (stress - atl) / TrainingLoad.ATL_DAYS
+            ctl += (stress - ctl) / TrainingLoad.CTL_DAYS
+            self._atl.append(atl)
+            self._ctl.append(ctl)
+
+    def values(self, day: date) -> tuple:
+        """Return the (stress, ATL, CTL) tuple for a day."""
+
+        if self._first is None or day < self._first:
+            return (0.0, 0.0, 0.0)
+
+        self.__update()
+
+        index = (day - self._first).days
+        if index < len(self._stress):
+            return (self._stress[index], self._atl[index], self._ctl[index])
+
+        days = index - len(self._stress) + 1
+        return (
+            0.0,
+            self._atl[-1] * (1 - 1 / TrainingLoad.ATL_DAYS) ** days,
+            self._ctl[-1] * (1 - 1 / TrainingLoad.CTL_DAYS) ** days,
+        )
+
+    def series(self, start: date, end: date) -> list:
+        """Return a list of (day, stress, ATL, CTL, TSB) tuples for the days
+        from start to end."""
+
+        series = []
+        _, atl, ctl = self.values(start - timedelta(days=1))
+        day = start
+        while day <= end:
+            balance = ctl - atl
+            stress, atl, ctl = self.values(day)
+            series.append((day, stress, atl, ctl, balance))
+            day += timedelta(days=1)
+        return series
+
+
+class StreakCounter:
+    """py_athletics StreakCounter class.
+
+    A StreakCounter keeps the periods, days or weeks numbered consecutively,
+    in which an athlete had activities, with the number of activities in
+    each, and the streaks and gaps among them: the longest streak of
+    consecutive periods, the streak ending with the latest period and the
+    longest gap between two periods.  A period after the latest extends the
+    latest streak or starts a new one in constant time.  Adding an earlier
+    period, or removing the last activity of a period, leaves the streaks to
+    be recomputed in one pass over the periods when they are next needed.
+    """
+
+    __slots__ = ("_counts", "_periods", "_streak", "_longest", "_gap", "_stale")
+
+    def __init__(self):
+        """Create an empty StreakCounter."""
+
+        self._counts = {}
+        self._periods = array("i")
+        self._streak = 0
+        self._longest = (0, None)
+        self._gap = (0, None)
+        self._stale = False
+
+    def __repr__(self) -> str:
+        return f"(StreakCounter of {len(self._periods)} periods)"
+
+    def __len__(self) -> int:
+        return len(self._periods)
+
+    def copy(self):
+        """Return a copy of the StreakCounter."""
+
+        copy = StreakCounter()
+        copy._counts = dict(self._counts)
+        copy._periods = array("i", self._periods)
+        copy._streak = self._streak
+        copy._longest = self._longest
+        copy._gap = self._gap
+        copy._stale = self._stale
+        return copy
+
+    def add(self, period: int, sign: int = 1) -> None:
+        """Add an activity in a period, or with a sign of -1 remove it."""
+
+        count = self._counts.get(period, 0) + sign
+        if count > 0:
+            self._counts[period] = count
+        else:
+            self._counts.pop(period, None)
+
+        periods = self._periods
+
+        if count == 0:
+            index = bisect_left(periods, period)
+            if index < len(periods) and periods[index] == period:
+                del periods[index]
+                self._stale = True
+            return
+
+        if sign < 0 or count > 1:
+            return
+
+        if periods and period < periods[-1]:
+            insort(periods, period)
+            self._stale = True
+            return
+
+        self.__extend(period)
+        periods.append(period)
+
+    def extend(self, periods) -> None:
+        """Add an activity in each of many periods.  New periods after the
+        latest extend the streaks in order, as add does, and earlier ones are
+        merged in at once, leaving the streaks to be recomputed."""
+
+        counts = self._counts
+        new = []
+        for period, count in Counter(periods).items():
+            if period not in counts:
+                new.append(period)
+            counts[period] = counts.get(period, 0) + count
+        new.sort()
+
+        periods = self._periods
+
+        if new and periods and new[0] < periods[-1]:
+            self._periods = array("i", merge(periods, new))
+            self._stale = True
+            return
+
+        for period in new:
+            self.__extend(period)
+            periods.append(period)
+
+    def __extend(self, period: int) -> None:
+        """Update the streaks for a period after the latest."""
+
+        periods = self._periods
+
+        if periods and period == periods[-1] + 1:
+            self._streak += 1
+        else:
+            if periods:
+                gap = period - periods[-1] - 1
+                if gap > self._gap[0]:
+                    self._gap = (gap, periods[-1] + 1)
+            self._streak = 1
+
+        if self._streak > self._longest[0]:
+            self._longest = (self._streak, period)
+
+    def __update(self) -> None:
+        """Recompute the streaks if periods were added out of order or
+        removed."""
+
+        if not self._stale:
+            return
+
+        periods = self._periods
+        self._periods = array("i")
+        self._streak = 0
+        self._longest = (0, None)
+        self._gap = (0, None)
+        for period in periods:
+            self.__extend(period)
+            self._periods.append(period)
+        self._stale = False
+
+    def summary(self, current: int) -> dict:
+        """Return a dictionary of the streaks and gaps as of the current
+        period.
+
+        The dictionary holds the last period with activities, the current
+        streak, which still counts if the last period is the one before the
+        current one, the current gap, the number of periods since the last,
+        the longest streak with the period it ended and the longest gap
+        between two periods with its first period.  Periods are None when
+        there are none.
+        """
+
+        self.__update()
+
+        last = self._periods[-1] if self._periods else None
+
+        current_streak = 0
+        current_gap = 0
+        if last is not None:
+            if last >= current - 1:
+                current_streak = self._streak
+            current_gap = max(0, current - last - 1)
+
+        return {
+            "last": last,
+            "current_streak": current_streak,
+            "current_gap": current_gap,
+            "longest_streak": self._longest[0],
+            "longest_streak_end": self._longest[1],
+            "longest_gap": self._gap[0],
+            "longest_gap_start": self._gap[1],
+        }
+
+
+class RecordTable:
+    """py_athletics RecordTable class.
+
+    A RecordTable keeps the personal records of one Activity subclass: for
+    each metric, such as duration or distance, the best values with the
+    starts of the activities that set them, at most size of them, kept in
+    a heap whose first entry is the worst.  Higher values are better,
+    except for paces, speeds given as a time of day meaning minutes and
+    seconds per mile, which are better lower.
+
+    If the table has distance bands, sorted lower bounds in miles starting
+    with 0, each metric also has records for the activities in each band.
+
+    The table also keeps the progression of each record, the activities
+    that beat every activity before them, in start order, so the records
+    set in a timeframe are found without looking at other activities.
+    Activities can be added in any order, but removing one that holds or
+    held a record leaves the table to be rebuilt, see remove.
+    """
+
+    __slots__ = ("metrics", "bands", "size", "_top", "_progress")
+
+    def __init__(self, metrics: tuple, bands: tuple = (), size: int = 5):
+        """Create an empty RecordTable for the named metrics, with the
+        specified distance bands, keeping size records for each."""
+
+        self.metrics = tuple(metrics)
+        self.bands = tuple(bands)
+        self.size = size
+        self._top = {}
+        self._progress = {}
+
+    def __repr__(self) -> str:
+        return f"(RecordTable of {len(self._top)} records)"
+
+    def copy(self):
+        """Return a copy of the RecordTable."""
+
+        copy = RecordTable(self.metrics, self.bands, self.size)
+        copy._top = {key: list(entries) for key, entries in self._top.items()}
+        copy._progress = {key: list(entries) for key, entries in self._progress.items()}
+        return copy
+
+    def band(self, distance) -> int:
+        """Return the index of the band of a distance, or None."""
+
+        if not self.bands or not distance:
+            return None
+        return bisect_right(self.bands, distance) - 1
+
+    @staticmethod
+    def __rank(value):
+        """Return a number that is larger for better values."""
+
+        if isinstance(value, timedelta):
+            return value.total_seconds()
+        if isinstance(value, time):
+            return -(value.hour * 3600 + value.minute * 60 + value.second)
+        return value
+
+    @staticmethod
+    def __ranks(values: list) -> list:
+        """Return the ranks of a list of values of one metric."""
+
+        kinds = {type(value) for value in values}
+        if kinds == {timedelta}:
+            return [value.total_seconds() for value in values]
+        if timedelta in kinds or time in kinds:
+            return [RecordTable.__rank(value) for value in values]
+        return values
+
+    def add(self, start: datetime, values: dict) -> None:
+        """Add the metric values, a dictionary keyed by metric name, of the
+        activity with the specified start.  The band is that of the
+        distance value, if any."""
+
+        band = self.band(values.get("distance"))
+        tiebreak = -((start - ActivityBlock.EPOCH) // ActivityBlock.MICROSECOND)
+
+        for metric in self.metrics:
+            value = values.get(metric)
+            if not value:
+                continue
+            rank = RecordTable.__rank(value)
+
+            keys = [(metric, None)]
+            if band is not None:
+                keys.append((metric, band))
+
+            # Among equal values the earliest activity holds the record.
+
+            entry = (rank, tiebreak, start, value)
+            for key in keys:
+                top = self._top.setdefault(key, [])
+                if len(top) < self.size:
+                    heappush(top, entry)
+                elif entry > top[0]:
+                    heapreplace(top, entry)
+
+                progress = self._progress.setdefault(key, [])
+                index = bisect_left(progress, (start,))
+                if index and progress[index - 1][1] >= rank:
+                    continue
+                progress.insert(index, (start, rank, value))
+                later = index + 1
+                while later < len(progress) and progress[later][1] <= rank:
+                    del progress[later]
+
+    def extend(self, rows) -> None:
+        """Add the metric values of many activities, an iterable of
+        (start, values) tuples as passed to add.  The best values of each
+        metric are selected once and its progression is merged once, in
+        start order, instead of once for each activity."""
+
+        rows = sorted(rows, key=itemgetter(0))
+        starts = [start for start, _ in rows]
+        dictionaries = [values for _, values in rows]
+        bands = None
+        if self.bands:
+            bands = [self.band(values.get("distance")) for values in dictionaries]
+
+        # The values are taken a metric at a time, in start order, and only
+        # the rows with a value are kept.
+
+        for metric in self.metrics:
+            column = list(map(dict.get, dictionaries, itertools.repeat(metric)))
+            values = list(filter(None, column))
+            if not values:
+                continue
+            ranks = RecordTable.__ranks(values)
+            metric_starts = list(itertools.compress(starts, column))
+            self.__merge_columns((metric, None), ranks, metric_starts, values)
+
+            if bands is not None:
+                present_bands = list(itertools.compress(bands, column))
+                for band in set(present_bands) - {None}:
+                    in_band = map(eq, present_bands, itertools.repeat(band))
+                    band_rows = list(itertools.compress(range(len(values)), in_band))
+                    self.__merge_columns(
+                        (metric, band),
+                        list(map(ranks.__getitem__, band_rows)),
+                        list(map(metric_starts.__getitem__, band_rows)),
+                        list(map(values.__getitem__, band_rows)),
+                    )
+
+    def __merge_columns(self, key: tuple, ranks: list, starts: list, values) -> None:
+        """Merge the ranks, starts and values of activities, in start order,
+        into the records and the progression of a key.
+
+        Entries are only made for the rows that can be records or in the
+        progression.  Among equal ranks nlargest keeps the first row, the
+        earliest activity, as the tiebreak of its entry would.
+        """
+
+        epoch = ActivityBlock.EPOCH
+        microsecond = ActivityBlock.MICROSECOND
+        entries = [
+            (
+                ranks[row],
+                -((starts[row] - epoch) // microsecond),
+                starts[row],
+                values[row],
+            )
+            for row in nlargest(self.size, range(len(ranks)), key=ranks.__getitem__)
+        ]
+        top = nlargest(self.size, self._top.get(key, []) + entries)
+        heapify(top)
+        self._top[key] = top
+
+        # Only rows that beat every new row before them can be in the
+        # progression, and one merge with it keeps those that beat every
+        # activity before them.
+
+        bests = itertools.accumulate(ranks, max)
+        beaten = itertools.compress(range(1, len(ranks)), map(gt, ranks[1:], bests))
+        candidates = [
+            (starts[row], ranks[row], values[row])
+            for row in itertools.chain((0,), beaten)
+        ]
+
+        progress = []
+        for entry in merge(self._progress.get(key, ()), candidates):
+            if not progress or entry[1] > progress[-1][1]:
+                progress.append(entry)
+        self._progress[key] = progress
+
+    def remove(self, start: datetime) -> bool:
+        """Return True if the activity with the specified start holds or
+        held a record, in which case the table is no longer correct
+        without it and must be rebuilt, and False if removing it changes
+        nothing."""
+
+        for top in self._top.values():
+            if any(entry[2] == start for entry in top):
+                return True
+        for progress in self._progress.values():
+            index = bisect_left(progress, (start,))
+            if index < len(progress) and progress[index][0] == start:
+                return True
+        return False
+
+    def top(self, metric: str, band: int = None) -> list:
+        """Return a list of (start, value) tuples for the records of a
+        metric, best first, for all activities or for a band."""
+
+        top = sorted(self._top.get((metric, band), ()), reverse=True)
+        return [(start, value) for _, _, start, value in top]
+
+    def progression(
+        self, metric: str, band: int = None, start: date = None, end: date = None
+    ) -> list:
+        """Return a list of (start, value) tuples for the activities that
+        set a record for a metric, for all activities or for a band, in
+        start order, limited to the activities that started on or between
+        the start and end dates."""
+
+        progress = self._progress.get((metric, band), ())
+        return [
+            (activity_start, value)
+            for activity_start, _, value in progress
+            if (start is None or activity_start.date() >= start)
+            and (end is None or activity_start.date() <= end)
+        ]
+
+
+class Journal:
+    """py_athletics Journal class.
+
+    A Journal is an append-only file of pickled records, one per change to
+    an Athlete, kept next to the Athlete's saved session file.  Records are
+    appended as changes are made and replayed after the session file is
+    loaded, so changes survive without saving the whole session.
+
+    A crash while a record is being appended can leave a partial record at
+    the end of the file.  Reading stops at the last complete record and the
+    partial record is truncated.
+    """
+
+    def __init__(self, path: str):
+        """Create a Journal for the file at path.  The file is created when
+        the first record is appended."""
+
+        self.path = path
+        self._file = None
+        self._valid_size = None
+        self._discarded = 0
+
+    def __repr__(self) -> str:
+        return f"(Journal {self.path} of {self.size()} bytes)"
+
+    def size(self) -> int:
+        """Return the size of the journal file in bytes."""
+
+        if self._file is not None:
+            return self._file.tell()
+
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def position(self) -> int:
+        """Return the position of the end of the journal, counting the bytes
+        of every record discarded since the Journal was created."""
+
+        return self._discarded + self.size()
+
+    def records(self) -> list:
+        """Return a list of the complete records in the journal file.  A
+        partial record at the end of the file is truncated."""
+
+        from pickle import load
+
+        records = []
+        try:
+            journal_file = open(self.path, "rb")
+        except FileNotFoundError:
+            self._valid_size = 0
+            return records
+
+        with journal_file:
+            while True:
+                offset = journal_file.tell()
+
+                # A partial record can fail to unpickle in many ways, not
+                # only with EOFError or UnpicklingError, depending on where
+                # it was cut off.
+
+                try:
+                    records.append(load(journal_file))
+                except Exception:
+                    break
+
+            journal_file.seek(0, os.SEEK_END)
+            size = journal_file.tell()
+
+        if size > offset and self._file is None:
+            with open(self.path, "r+b") as journal_file:
+                journal_file.truncate(offset)
+
+        self._valid_size = offset
+        return records
+
+    def append(self, record: tuple) -> None:
+        """Append a record.  Records are written to the operating system by
+        flush and made durable by sync."""
+
+        from pickle import dump, HIGHEST_PROTOCOL
+
+        if self._file is None:
+            if self._valid_size is None:
+                self.records()
+            self._file = open(self.path, "ab")
+            if self._file.tell() > self._valid_size:
+                self._file.truncate(self._valid_size)
+                self._file.seek(self._valid_size)
+
+        dump(record, self._file, HIGHEST_PROTOCOL)
+
+    def flush(self) -> None:
+        """Write appended records to the operating system."""
+
+        if self._file is not None:
+            self._file.flush()
+
+    def sync(self) -> None:
+        """Write appended records to the operating system and to disk."""
+
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the journal file."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def reset(self) -> None:
+        """Remove every record by removing the journal file."""
+
+        self._discarded += self.size()
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self._valid_size = 0
+
+    def discard(self, position: int) -> None:
+        """Remove the records before position, as returned by the position
+        method, keeping those appended since."""
+
+        count = position - self._discarded
+        if count <= 0:
+            return
+
+        self.close()
+        with open(self.path, "rb") as journal_file:
+            journal_file.seek(count)
+            remainder = journal_file.read()
+
+        if not remainder:
+            self.reset()
+            return
+
+        # Write the remaining records to a temporary file and rename it, so
+        # the journal is always complete.
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as journal_file:
+            journal_file.write(remainder)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(temporary, self.path)
+
+        self._discarded += count
+        self._valid_size = len(remainder)
+
+
+def read_partition(filename: str) -> list:
+    """Return the list of activities and ActivityBlocks in a partition
+    file."""
+
+    from pickle import load
+
+    with open(filename, "rb") as partition_file:
+        return load(partition_file)
+
+
+def write_partition(filename: str, activities: list) -> None:
+    """Write a list of activities and ActivityBlocks to a partition file.
+
+    The activities are written to a temporary file that is renamed, so the
+    partition file is always complete.
+    """
+
+    from pickle import dump, HIGHEST_PROTOCOL
+
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as partition_file:
+        dump(activities, partition_file, HIGHEST_PROTOCOL)
+        partition_file.flush()
+        os.fsync(partition_file.fileno())
+    os.replace(temporary, filename)
+
+
+def copy_partition(source: str, filename: str) -> None:
+    """Copy a partition file without loading its activities."""
+
+    from shutil import copyfileobj
+
+    temporary = filename + ".tmp"
+    with open(source, "rb") as source_file, open(temporary, "wb") as partition_file:
+        copyfileobj(source_file, partition_file)
+        partition_file.flush()
+        os.fsync(partition_file.fileno())
+    os.replace(temporary, filename)
@@ -0,0 +1,61 @@
+"""Fixtures for the py_athletics tests.
+
+The modules are imported from the src directory as py_athletics.py imports
+them, and the sample data is read from the test directory.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PACKAGE / "src"))
+
+from athlete.athlete import Athlete  # noqa: E402
+from roster.roster import Roster  # noqa: E402
+from shell.shell import PythonAthleticsShell  # noqa: E402
+
+
+@pytest.fixture
+def test_data() -> Path:
+    """Return the directory of the sample Garmin files."""
+
+    return PACKAGE / "test"
+
+
+@pytest.fixture
+def athlete(test_data) -> Athlete:
+    """Return an Athlete with the activities of the sample Garmin file."""
+
+    athlete = Athlete()
+    athlete.read_garmin_activity_file(str(test_data / "Activities.csv"))
+    return athlete
+
+
+@pytest.fixture
+def shell(monkeypatch, tmp_path) -> PythonAthleticsShell:
+    """Return a shell with a new athlete and roster, in a temporary
+    directory.  The shell keeps its state in class attributes, which are
+    restored after the test."""
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(PythonAthleticsShell, "athlete", Athlete())
+    monkeypatch.setattr(PythonAthleticsShell, "roster", Roster())
+    monkeypatch.setattr(PythonAthleticsShell, "session_filename", "py_athletics.pickle")
+    monkeypatch.setattr(PythonAthleticsShell, "autosave_every", 0)
+    return PythonAthleticsShell()
+
+
+@pytest.fixture
+def run(shell, capsys):
+    """Return a function that runs shell command lines through the command
+    loop, as run_script does, and returns what they printed."""
+
+    def run(*lines) -> str:
+        shell.cmdqueue.extend(lines)
+        shell.cmdqueue.append("exit")
+        shell.cmdloop(intro="")
+        return capsys.readouterr().out
+
+    return run
@@ -0,0 +1,53 @@
+"""Tests of near-duplicate detection across exercises."""
+
+from datetime import timedelta
+
+from activity.activity import Walk
+
+
+def walk_near(activity, seconds: int) -> Walk:
+    """Return a Walk that started the specified number of seconds after an
+    activity, with the same duration and distance."""
+
+    return Walk(
+        activity.start + timedelta(seconds=seconds),
+        activity.duration,
+        distance=activity.distance,
+    )
+
+
+def test_near_duplicate_of_another_exercise_is_flagged(athlete):
+    run = next(athlete.query(exercise="Run"))
+    count = athlete.activity_count()
+
+    walk = walk_near(run, 60)
+    athlete.add_activity(walk)
+
+    (existing, added), *_ = athlete.flagged_duplicates()
+    assert (type(existing), existing.start, added) == (type(run), run.start, walk)
+    assert athlete.activity_count() == count + 1
+
+
+def test_activities_outside_the_tolerances_are_not_flagged(athlete):
+    run = next(athlete.query(exercise="Run"))
+    duplicates = athlete.find_duplicates()
+
+    athlete.add_activity(walk_near(run, 300))
+
+    assert athlete.flagged_duplicates() == []
+    assert len(athlete.find_duplicates()) == len(duplicates)
+
+
+def test_merge_mode_removes_near_duplicates(athlete):
+    run = next(athlete.query(exercise="Run"))
+    count = athlete.activity_count() - len(athlete.find_duplicates())
+    walk = walk_near(run, 60)
+    athlete.add_activity(walk)
+
+    athlete.dedupe(mode="merge")
+
+    assert athlete.find_duplicates() == []
+    assert athlete.activity_count() == count
+    walks = [activity.start for activity in athlete.query(exercise="Walk")]
+    runs = [activity.start for activity in athlete.query(exercise="Run")]
+    assert walk.start not in walks and run.start in runs
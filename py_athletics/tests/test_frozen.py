@@ -0,0 +1,64 @@
+"""Tests of activities frozen in monthly blocks."""
+
+from datetime import date, datetime, timedelta
+
+from activity.activity import Run
+from athlete.athlete import Athlete
+
+
+def recent_run() -> Run:
+    """Return a Run that started two days ago, in a month that is not
+    frozen."""
+
+    start = datetime.now().replace(second=0, microsecond=0) - timedelta(days=2)
+    return Run(start, timedelta(minutes=30))
+
+
+def activity_values(athlete) -> list:
+    """Return the exercise and attributes of each of an athlete's
+    activities, in start order."""
+
+    return [
+        (type(activity), vars(activity))
+        for activity in athlete.query(order="ascending")
+    ]
+
+
+def test_old_months_are_frozen_and_recent_ones_are_not(athlete):
+    run = recent_run()
+    athlete.add_activity(run)
+    snapshot = athlete.snapshot()
+
+    blocks = snapshot.blocks(Run)
+    assert blocks and all(block.last_day() < date.today() for block in blocks)
+    assert list(snapshot.recent_activities(Run)) == [run]
+    assert snapshot.count(Run) == len(list(athlete.query(exercise="Run")))
+
+
+def test_save_and_load_round_trip_with_frozen_months(athlete, tmp_path):
+    filename = str(tmp_path / "session.pickle")
+    athlete.add_activity(recent_run())
+    athlete.save(filename)
+
+    loaded = Athlete.load(filename)
+
+    assert activity_values(loaded) == activity_values(athlete)
+    assert len(loaded.snapshot().blocks(Run)) == len(athlete.snapshot().blocks(Run))
+
+
+def test_activity_added_to_a_frozen_month_after_loading(athlete, tmp_path):
+    athlete.save(str(tmp_path / "first.pickle"))
+    loaded = Athlete.load(str(tmp_path / "first.pickle"))
+
+    run = Run(datetime(2021, 3, 31, 21, 0), timedelta(minutes=30))
+    loaded.add_activity(run)
+    loaded.save(str(tmp_path / "second.pickle"))
+    copy = Athlete.load(str(tmp_path / "second.pickle"))
+
+    march = [
+        activity.start
+        for activity in copy.query(exercise="Run", start="2021-03-01", end="2021-03-31")
+    ]
+    assert march[-1] == run.start and march == sorted(march)
+    assert activity_values(copy) == activity_values(loaded)
+    assert copy.activity_count() == athlete.activity_count() + 1
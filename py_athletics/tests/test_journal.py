@@ -0,0 +1,60 @@
+"""Tests of the journal of changes made since a session was saved."""
+
+import os
+from datetime import datetime, timedelta
+
+from activity.activity import Run
+from athlete.athlete import Athlete
+
+
+def run_on(day: int) -> Run:
+    """Return a Run on a day of June 2019, before the sample activities."""
+
+    return Run(datetime(2019, 6, day, 6, 0), timedelta(minutes=30))
+
+
+def starts(athlete) -> list:
+    """Return the starts of an athlete's Runs."""
+
+    return [activity.start for activity in athlete.query(exercise="Run")]
+
+
+def test_changes_since_the_save_are_replayed(athlete, tmp_path):
+    filename = str(tmp_path / "session.pickle")
+    athlete.save(filename)
+
+    athlete.add_activity(run_on(1))
+    athlete.add_goal(exercise="Run", metric="distance", timeframe="year", target=150)
+
+    loaded = Athlete.load(filename)
+    assert loaded.activity_count() == athlete.activity_count()
+    assert starts(loaded) == starts(athlete)
+    assert repr(loaded) == repr(athlete)
+
+
+def test_partial_record_at_the_end_is_dropped(athlete, tmp_path):
+    filename = str(tmp_path / "session.pickle")
+    journal = filename + ".journal"
+    athlete.save(filename)
+
+    first, second, third = run_on(1), run_on(2), run_on(3)
+    athlete.add_activity(first)
+    size = os.path.getsize(journal)
+    athlete.add_activity(second)
+
+    # A crash while the second record was written leaves part of it.
+
+    os.truncate(journal, os.path.getsize(journal) - 5)
+
+    loaded = Athlete.load(filename)
+    assert first.start in starts(loaded)
+    assert second.start not in starts(loaded)
+    assert os.path.getsize(journal) == size
+
+    # Records appended after the partial record was dropped are replayed.
+
+    loaded.add_activity(third)
+    reloaded = Athlete.load(filename)
+    assert {first.start, third.start} <= set(starts(reloaded))
+    assert second.start not in starts(reloaded)
+    assert reloaded.activity_count() == athlete.activity_count()
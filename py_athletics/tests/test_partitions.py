@@ -0,0 +1,65 @@
+"""Tests of sessions saved in year partitions."""
+
+import os
+from datetime import datetime, timedelta
+
+from activity.activity import Run
+import athlete.athlete as athlete_module
+from athlete.athlete import Athlete
+
+
+def activity_values(athlete) -> list:
+    """Return the exercise and attributes of each of an athlete's
+    activities, in start order."""
+
+    return [
+        (type(activity), vars(activity))
+        for activity in athlete.query(order="ascending")
+    ]
+
+
+def test_save_and_load_round_trip(athlete, tmp_path):
+    filename = str(tmp_path / "session.pickle")
+    athlete.add_activity(Run(datetime(2019, 6, 1, 6, 0), timedelta(minutes=30)))
+    athlete.save(filename)
+
+    loaded = Athlete.load(filename)
+
+    names = os.listdir(filename + ".partitions")
+    assert {"Run-2019", "Run-2021"} <= {name.rsplit("-", 1)[0] for name in names}
+    assert loaded.activity_count() == athlete.activity_count()
+    assert activity_values(loaded) == activity_values(athlete)
+
+
+def test_partitions_not_yet_read_are_saved_to_a_new_file(athlete, tmp_path):
+    athlete.save(str(tmp_path / "first.pickle"))
+    loaded = Athlete.load(str(tmp_path / "first.pickle"))
+
+    loaded.add_activity(Run(datetime(2019, 6, 1, 6, 0), timedelta(minutes=30)))
+    loaded.save(str(tmp_path / "second.pickle"))
+    copy = Athlete.load(str(tmp_path / "second.pickle"))
+
+    assert copy.activity_count() == athlete.activity_count() + 1
+    assert activity_values(copy) == activity_values(loaded)
+
+
+def test_query_reads_only_the_years_it_needs(athlete, tmp_path, monkeypatch):
+    filename = str(tmp_path / "session.pickle")
+    athlete.add_activity(Run(datetime(2019, 6, 1, 6, 0), timedelta(minutes=30)))
+    athlete.save(filename)
+
+    read = []
+    read_partition = athlete_module.read_partition
+
+    def record(partition_filename):
+        read.append(os.path.basename(partition_filename))
+        return read_partition(partition_filename)
+
+    monkeypatch.setattr(athlete_module, "read_partition", record)
+    loaded = Athlete.load(filename)
+    assert read == []
+
+    runs = list(loaded.query(exercise="Run", start="2019-01-01", end="2019-12-31"))
+
+    assert [run.start for run in runs] == [datetime(2019, 6, 1, 6, 0)]
+    assert [name.startswith("Run-2019-") for name in read] == [True]
@@ -0,0 +1,77 @@
+"""Tests of the records command."""
+
+from datetime import date
+
+from athlete.athlete import Athlete
+from shell.shell import PythonAthleticsShell
+
+
+def record_starts(output: str, prefix: str) -> list:
+    """Return the starts, as printed, of the records in a command's output
+    whose lines begin with prefix."""
+
+    return [
+        line.rsplit(" on ", 1)[1]
+        for line in output.splitlines()
+        if line.startswith(prefix)
+    ]
+
+
+def printed(activity) -> str:
+    """Return the start of an activity as records prints it."""
+
+    return activity.start.strftime("%Y-%m-%d at %H:%M")
+
+
+def test_best_durations_of_an_exercise(run, test_data):
+    output = run(f"read {test_data / 'Activities.csv'}", "records exercise=Run")
+
+    runs = list(PythonAthleticsShell.athlete.query(exercise="Run"))
+    best = sorted(runs, key=lambda activity: activity.duration, reverse=True)[:5]
+    assert record_starts(output, "Run     Duration") == [printed(run) for run in best]
+    assert record_starts(output, "Cycle") == []
+
+
+def test_durations_that_set_a_record_in_a_timeframe(run, test_data):
+    output = run(
+        f"read {test_data / 'Activities.csv'}",
+        "records exercise=Run start=2021-06-01 end=2021-12-31",
+    )
+
+    expected = []
+    longest = None
+    for activity in PythonAthleticsShell.athlete.query(
+        exercise="Run", order="ascending"
+    ):
+        if longest is None or activity.duration > longest:
+            longest = activity.duration
+            if activity.start.date() >= date(2021, 6, 1):
+                expected.append(printed(activity))
+    assert expected
+    assert record_starts(output, "Run     Duration") == expected
+
+
+def test_distance_band_from_an_integer_or_a_decimal(run, test_data):
+    output = run(
+        f"read {test_data / 'Activities.csv'}",
+        "records exercise=Run distance=4",
+        "records exercise=Run distance=4.5",
+        "records exercise=Run distance=-1",
+    )
+
+    lines = output.splitlines()
+    records = [line for line in lines if line.startswith("Run ")]
+    assert records and records[: len(records) // 2] == records[len(records) // 2 :]
+    assert "py_athletics command failed: invalid distance" in lines
+
+
+def test_records_after_save_and_load(athlete, tmp_path):
+    filename = str(tmp_path / "session.pickle")
+    athlete.save(filename)
+
+    loaded = Athlete.load(filename)
+
+    assert loaded.personal_records() == athlete.personal_records()
+    assert loaded.personal_records(distance=4) == athlete.personal_records(
+        distance="4.5"
+    )
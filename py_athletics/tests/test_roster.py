@@ -0,0 +1,111 @@
+"""Tests of roster athletes and their session files in the shell."""
+
+from pathlib import Path
+
+import pytest
+
+from athlete.athlete import Athlete
+
+
+@pytest.fixture
+def saves(monkeypatch) -> list:
+    """Return a list of the files saved in the background, and wait for
+    each save to complete before the command that started it returns."""
+
+    filenames = []
+    save_in_background = Athlete.save_in_background
+
+    def save(athlete, filename, callback=None):
+        filenames.append(filename)
+        future = save_in_background(athlete, filename, callback)
+        if future is not None:
+            future.result()
+        return future
+
+    monkeypatch.setattr(Athlete, "save_in_background", save)
+    return filenames
+
+
+@pytest.fixture
+def sessions(test_data, tmp_path) -> dict:
+    """Save the January and February sample files as the sessions of two
+    athletes and return their activity counts by session file."""
+
+    counts = {}
+    for filename, month in (("me.pickle", "2021-01"), ("alex.pickle", "2021-02")):
+        athlete = Athlete()
+        athlete.read_garmin_activity_file(
+            str(test_data / "garmin_data" / f"{month}.csv")
+        )
+        athlete.save(str(tmp_path / filename))
+        counts[filename] = athlete.activity_count()
+    return counts
+
+
+def test_roster_use_autosaves_to_the_roster_athletes_file(
+    run, saves, sessions, test_data
+):
+    march = test_data / "garmin_data" / "2021-03.csv"
+    saves.clear()
+
+    run(
+        "load me.pickle",
+        "roster add name=alex filename=alex.pickle",
+        "roster use name=alex",
+        "autosave every=1",
+        f"read {march}",
+    )
+
+    assert saves == ["alex.pickle"]
+    assert Athlete.load("me.pickle").activity_count() == sessions["me.pickle"]
+
+    expected = Athlete()
+    for month in ("2021-02", "2021-03"):
+        expected.read_garmin_activity_file(
+            str(test_data / "garmin_data" / f"{month}.csv")
+        )
+    assert Athlete.load("alex.pickle").activity_count() == expected.activity_count()
+
+
+def test_roster_use_of_an_athlete_added_without_a_file_keeps_its_session_file(
+    run, saves, sessions, test_data, tmp_path
+):
+    march = test_data / "garmin_data" / "2021-03.csv"
+    saves.clear()
+
+    run(
+        "load me.pickle",
+        "roster add name=me",
+        "load alex.pickle",
+        "autosave every=1",
+        "roster use name=me",
+        f"read {march}",
+    )
+
+    assert [Path(filename).resolve() for filename in saves] == [
+        (tmp_path / "me.pickle").resolve()
+    ]
+    assert Athlete.load("alex.pickle").activity_count() == sessions["alex.pickle"]
+
+
+def test_roster_use_of_an_athlete_without_a_session_file_turns_autosave_off(
+    run, saves, sessions, test_data
+):
+    march = test_data / "garmin_data" / "2021-03.csv"
+    april = test_data / "garmin_data" / "2021-04.csv"
+    saves.clear()
+
+    output = run(
+        f"read {march}",
+        "roster add name=new",
+        "load alex.pickle",
+        "autosave every=1",
+        "roster use name=new",
+        "autosave every=1",
+        f"read {april}",
+    )
+
+    assert "autosave off: the athlete has no session file" in output
+    assert "autosave command failed: the athlete has no session file" in output
+    assert saves == []
+    assert Athlete.load("alex.pickle").activity_count() == sessions["alex.pickle"]
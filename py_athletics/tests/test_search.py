@@ -0,0 +1,55 @@
+"""Tests of the search command."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from activity.activity import Run
+from shell.shell import PythonAthleticsShell
+
+
+def listed(output: str) -> list:
+    """Return the activities listed in a command's output."""
+
+    return [line for line in output.splitlines() if line.startswith("[")]
+
+
+def test_search_lists_matching_activities_in_time_order(run, test_data):
+    output = run(
+        f"read {test_data / 'Activities.csv'}",
+        "search query=chicago exercise=Run",
+    )
+
+    athlete = PythonAthleticsShell.athlete
+    expected = athlete.search_activities("chicago", exercise="Run")
+    assert expected
+    assert listed(output) == [repr(activity) for activity in expected]
+    assert [activity.start for activity in expected] == sorted(
+        activity.start for activity in expected
+    )
+
+
+def test_search_with_a_prefix_and_a_timeframe(run, test_data):
+    output = run(
+        f"read {test_data / 'Activities.csv'}",
+        "search query=chi* start=2021-05-01 end=2021-05-31",
+    )
+
+    lines = listed(output)
+    assert lines
+    assert all("Chicago" in line and " on 2021-05-" in line for line in lines)
+
+
+def test_search_for_a_number(run, test_data):
+    run(f"read {test_data / 'Activities.csv'}")
+    race = Run(
+        datetime(2021, 10, 10, 7, 30),
+        timedelta(hours=1, minutes=20),
+        distance=Decimal("10.00"),
+        description="Chicago 10 Miler",
+    )
+    PythonAthleticsShell.athlete.add_activity(race)
+
+    output = run("search query=10", 'search query="chicago 10" exercise=Run')
+
+    assert "failed" not in output
+    assert listed(output) == [repr(race), repr(race)]
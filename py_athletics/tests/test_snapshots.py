@@ -0,0 +1,55 @@
+"""Tests of the isolation of activity snapshots from later changes."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from activity.activity import Run
+from athlete.athlete import Athlete
+
+
+def run_days_ago(days: int, **details) -> Run:
+    """Return a Run that started the specified number of days ago, in a
+    recent month whose activities are not frozen."""
+
+    start = datetime.now().replace(second=0, microsecond=0) - timedelta(days=days)
+    return Run(start, timedelta(minutes=30), distance=Decimal("3.10"), **details)
+
+
+def test_snapshot_does_not_see_activities_added_later(athlete):
+    snapshot = athlete.snapshot()
+    starts = [activity.start for activity in snapshot]
+
+    athlete.add_activity(run_days_ago(2))
+    athlete.add_activity(Run(datetime(2019, 6, 1, 6, 0), timedelta(minutes=30)))
+
+    assert [activity.start for activity in snapshot] == starts
+    assert len(snapshot) == len(starts)
+    assert len(athlete.snapshot()) == len(starts) + 2
+
+
+def test_batch_is_published_when_it_ends(athlete):
+    count = len(athlete.snapshot())
+
+    with athlete.batch():
+        athlete.add_activity(run_days_ago(2))
+        athlete.add_activity(run_days_ago(3))
+        assert len(athlete.snapshot()) == count
+
+    assert len(athlete.snapshot()) == count + 2
+
+
+def test_merge_does_not_change_activities_in_earlier_snapshots():
+    athlete = Athlete()
+    athlete.dedupe(mode="merge")
+    kept = run_days_ago(2)
+    athlete.add_activity(kept)
+    snapshot = athlete.snapshot()
+
+    duplicate = run_days_ago(2, calories=350)
+    duplicate.start += timedelta(seconds=30)
+    athlete.add_activity(duplicate)
+
+    assert kept.calories is None
+    assert [activity.calories for activity in snapshot] == [None]
+    assert [activity.calories for activity in athlete.snapshot()] == [350]
+    assert athlete.activity_count() == 1
@@ -0,0 +1,52 @@
+"""Tests of the streaks command."""
+
+from datetime import date, datetime, timedelta
+
+from activity.activity import Run
+from shell.shell import PythonAthleticsShell
+
+
+def lines_of(output: str, prefix: str) -> list:
+    """Return the lines of a command's output that begin with prefix."""
+
+    return [line for line in output.splitlines() if line.startswith(prefix)]
+
+
+def test_streaks_of_an_exercise(run, test_data):
+    output = run(f"read {test_data / 'Activities.csv'}", "streaks exercise=Run")
+
+    (daily,) = lines_of(output, "Run     daily ")
+    (weekly,) = lines_of(output, "Run     weekly")
+    assert "Longest Streak:   2 days to 2021-01-26" in daily
+    assert "Longest Gap:  17 days from 2021-05-05" in daily
+    assert "Longest Streak:  14 weeks to 2021-04-05" in weekly
+    assert lines_of(output, "Cycle") == []
+
+
+def test_streaks_of_every_exercise(run, test_data):
+    output = run(f"read {test_data / 'Activities.csv'}", "streaks")
+
+    for name in ("Cycle", "Run", "Tennis", "Walk", "Workout"):
+        assert len(lines_of(output, name)) == 2
+
+
+def test_streak_extended_by_an_added_activity(run, test_data):
+    run(f"read {test_data / 'Activities.csv'}")
+    athlete = PythonAthleticsShell.athlete
+    athlete.add_activity(Run(datetime(2021, 1, 27, 7, 0), timedelta(minutes=30)))
+
+    output = run("streaks exercise=Run")
+
+    (daily,) = lines_of(output, "Run     daily ")
+    assert "Longest Streak:   3 days to 2021-01-27" in daily
+    streak = athlete.streaks("Run")["Run"]["daily"]
+    assert (streak["longest_streak"], streak["longest_streak_end"]) == (
+        3,
+        date(2021, 1, 27),
+    )
+
+
+def test_streaks_of_an_exercise_that_is_not_a_name(run, test_data):
+    output = run(f"read {test_data / 'Activities.csv'}", "streaks exercise=7")
+
+    assert "py_athletics command failed: class name must be a string" in output